@@ -0,0 +1 @@
+"""Performance benchmarks for CalcVisualizer; run with ``python -m benchmarks.run``"""
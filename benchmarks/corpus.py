@@ -0,0 +1,26 @@
+"""Expressions the benchmarks run on, grouped by the kind of work they cause"""
+from collections import namedtuple
+
+# integrate is False where SymPy takes many seconds, which would drown the rest
+Case = namedtuple('Case', ['name', 'category', 'expression', 'integrate'])
+
+CORPUS = [
+    Case("cubic", "polynomial", "x**3 - 3*x", True),
+    Case("septic", "polynomial", "x**7 - 4*x**5 + 2*x**2 - 1", True),
+    Case("factored", "polynomial", "(x - 1)*(x + 2)*(x - 3)*(x + 4)", True),
+    Case("sine", "trig", "sin(x)", True),
+    Case("product", "trig", "sin(3*x)*cos(x/2)", True),
+    Case("powers", "trig", "sin(x)**2 + cos(x)**3", True),
+    Case("gaussian-wave", "nested", "exp(-x**2/4)*sin(2*x)", False),
+    Case("softplus", "nested", "log(1 + exp(x))", True),
+    Case("exp-sin-log", "nested", "exp(sin(x))*log(x**2 + 1)", False),
+    Case("damped-log", "nested", "x*exp(-x)*log(x**2 + 1)", False),
+    Case("branches", "piecewise", "Piecewise((x**2, x < 0), (sin(x), True))", True),
+    Case("three-pieces", "piecewise", "Piecewise((x + 2, x < -1), (x**3, x < 1), (2 - x, True))", True),
+    Case("exp-cos", "piecewise", "Piecewise((exp(x), x < 0), (cos(x), True))", True),
+    Case("tangent", "poles", "tan(x)", True),
+    Case("hyperbola", "poles", "1/(x - 1)", True),
+    Case("cosecant", "poles", "1/sin(x)", True),
+    Case("log-square", "poles", "log(x**2)", True),
+    Case("rational", "poles", "x/(x**2 - 4)", True),
+]
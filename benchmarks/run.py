@@ -0,0 +1,276 @@
+"""Time parsing, calculus, evaluation and drawing over the corpus and compare runs
+
+    python -m benchmarks.run -o baseline.json
+    python -m benchmarks.run -o new.json --compare baseline.json
+
+Every benchmark runs once untimed and then repeatedly; the JSON holds the
+minimum, median and mean seconds per benchmark and case. With --compare the
+medians (or minimums, with --statistic min) are checked against a baseline,
+and the exit status is 1 when any of them grew by more than --threshold.
+"""
+from collections import namedtuple
+from contextlib import redirect_stdout
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+# Drawing needs no display
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import numpy as np
+
+from benchmarks.corpus import CORPUS
+from calcvisualizer.core.cache import expression_cache, NUMPY_FUNCTIONS
+from calcvisualizer.core.calculator import (parse_function, calculate_derivative, calculate_integral,
+                                            evaluate_function, evaluate_fused, find_critical_points)
+from calcvisualizer.core.symbolic import symbolic_store
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+X_MIN, X_MAX = -10.0, 10.0
+
+# setup(case, points) prepares the argument that run is timed with; only
+# cases for which applies(case) is true are run
+Benchmark = namedtuple('Benchmark', ['name', 'setup', 'run', 'applies'])
+
+def always(case):
+    return True
+
+def parsed(case, points=None):
+    return parse_function(case.expression)[0]
+
+def grid(points):
+    return np.linspace(X_MIN, X_MAX, points)
+
+def uncached_parse(expression):
+    expression_cache.cache_clear()
+    return parse_function(expression)
+
+def uncached_derivative(expression):
+    symbolic_store.clear()
+    return calculate_derivative(expression, 1)
+
+def uncached_integral(expression):
+    symbolic_store.clear()
+    return calculate_integral(expression)
+
+def setup_evaluate(case, points):
+    return parse_function(case.expression)[1], grid(points)
+
+def setup_fused(case, points):
+    kernel = symbolic_store.fused_function(parsed(case), 2, ["numpy", NUMPY_FUNCTIONS])
+    return kernel, grid(points)
+
+def setup_separate(case, points):
+    """f, f' and f'' as three lambdified functions, the way the fused kernel replaces"""
+    expression, func = parse_function(case.expression)
+    funcs = [func] + [symbolic_store.derivative_function(expression, order, ["numpy", NUMPY_FUNCTIONS])
+                      for order in (1, 2)]
+    return funcs, grid(points)
+
+def evaluate_separate(arguments):
+    funcs, x_values = arguments
+    return [evaluate_function(func, x_values) for func in funcs]
+
+def setup_critical_points(case, points):
+    expression, func = parse_function(case.expression)
+    derivative_func = symbolic_store.derivative_function(expression, 1)
+    x_values = grid(points)
+    return func, x_values, evaluate_function(derivative_func, x_values), derivative_func
+
+def critical_points(arguments):
+    func, x_values, derivative_values, derivative_func = arguments
+    return find_critical_points(func, x_values, derivative_values, derivative_func)
+
+_application = None
+
+def setup_draw(case, points):
+    """An offscreen canvas showing the function and its first two derivatives"""
+    global _application
+    from PyQt6.QtWidgets import QApplication
+    from calcvisualizer.ui.canvas import MplCanvas
+    if _application is None:
+        _application = QApplication.instance() or QApplication([])
+
+    expression, func = parse_function(case.expression)
+    kernel = symbolic_store.fused_function(expression, 2, ["numpy", NUMPY_FUNCTIONS])
+    x_values = grid(points)
+    canvas = MplCanvas(width=10, height=6)
+    canvas.begin_update(None)
+    for kind, values in zip(["f", "f'", "f''"], evaluate_fused(kernel, x_values)):
+        values = np.nan_to_num(values, nan=0.0, posinf=1e10, neginf=-1e10)
+        canvas.update_series((case.name, kind, 0), x_values, values, label=kind)
+    canvas.end_update()
+    return canvas
+
+BENCHMARKS = [
+    Benchmark("parse", lambda case, points: case.expression, uncached_parse, always),
+    Benchmark("differentiate", parsed, uncached_derivative, always),
+    Benchmark("integrate", parsed, uncached_integral, lambda case: case.integrate),
+    Benchmark("evaluate", setup_evaluate, lambda arguments: evaluate_function(*arguments), always),
+    Benchmark("evaluate_separate", setup_separate, evaluate_separate, always),
+    Benchmark("evaluate_fused", setup_fused, lambda arguments: evaluate_fused(*arguments), always),
+    Benchmark("critical_points", setup_critical_points, critical_points, always),
+    Benchmark("draw", setup_draw, lambda canvas: canvas.draw(), always),
+]
+
+def measure(run, argument, min_repeats, max_repeats, min_time, max_time):
+    """Seconds per call, repeated until min_time has passed or max_time is used up"""
+    run(argument)
+    samples = []
+    started = time.perf_counter()
+    while len(samples) < max_repeats:
+        call_started = time.perf_counter()
+        run(argument)
+        samples.append(time.perf_counter() - call_started)
+        elapsed = time.perf_counter() - started
+        if elapsed >= max_time or (len(samples) >= min_repeats and elapsed >= min_time):
+            break
+    return samples
+
+def summarize(samples):
+    return {"min": min(samples), "median": statistics.median(samples),
+            "mean": statistics.mean(samples),
+            "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+            "repeats": len(samples)}
+
+def environment():
+    """Versions and machine details stored with every run"""
+    import matplotlib
+    import sympy
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {"python": platform.python_version(), "numpy": np.__version__,
+            "sympy": sympy.__version__, "matplotlib": matplotlib.__version__,
+            "platform": platform.platform(), "machine": platform.machine(),
+            "processor": platform.processor(), "cpus": os.cpu_count(), "commit": commit,
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S")}
+
+def run_benchmarks(points, selected, min_repeats, max_repeats, min_time, max_time):
+    """Run every selected (benchmark, case) pair, printing each result as it comes"""
+    # Time the computations themselves, not the persistent symbolic store
+    symbolic_store.database = None
+    results = {}
+    for benchmark in BENCHMARKS:
+        for case in CORPUS:
+            name = f"{benchmark.name}/{case.name}"
+            if not benchmark.applies(case) or not selected(name):
+                continue
+            # The calculator reports unplottable results with print
+            with redirect_stdout(io.StringIO()):
+                try:
+                    argument = benchmark.setup(case, points)
+                    samples = measure(benchmark.run, argument, min_repeats, max_repeats,
+                                      min_time, max_time)
+                except ImportError as e:
+                    samples, error = None, f"skipped: {e}"
+                except Exception as e:
+                    samples, error = None, f"failed: {e}"
+            if samples is None:
+                print(f"{name:36} {error}")
+                continue
+            result = dict(summarize(samples), benchmark=benchmark.name, case=case.name,
+                          category=case.category)
+            results[name] = result
+            print(f"{name:36} {result['median'] * 1e3:11.3f} ms  (min {result['min'] * 1e3:.3f}, "
+                  f"{result['repeats']} runs)")
+    return results
+
+def fused_speedup(results, statistic="median"):
+    """Print how much faster the fused kernel is than separate f, f' and f'' per case"""
+    rows = []
+    for name, result in results.items():
+        if result["benchmark"] != "evaluate_fused":
+            continue
+        separate = results.get(f"evaluate_separate/{result['case']}")
+        if separate is not None and result[statistic] > 0:
+            rows.append((result["case"], separate[statistic] / result[statistic]))
+    if not rows:
+        return
+    print(f"\n{'fused vs separate':36} {'speedup':>8}  ({statistic})")
+    for case, speedup in rows:
+        print(f"{case:36} {speedup:7.2f}x")
+    print(f"{'geometric mean':36} {statistics.geometric_mean([row[1] for row in rows]):7.2f}x")
+
+def compare(results, baseline, threshold, statistic="median"):
+    """Print the change of every result against a baseline; returns the regressed names"""
+    regressions = []
+    print(f"\n{'benchmark':36} {'baseline ms':>12} {'current ms':>12} {'ratio':>7}  ({statistic})")
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        ratio = result[statistic] / base[statistic] if base[statistic] > 0 else float("inf")
+        flag = ""
+        if ratio > threshold:
+            regressions.append(name)
+            flag = "  slower"
+        elif ratio < 1 / threshold:
+            flag = "  faster"
+        print(f"{name:36} {base[statistic] * 1e3:12.3f} {result[statistic] * 1e3:12.3f} "
+              f"{ratio:7.2f}{flag}")
+    return regressions
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.run",
+        description="Time parsing, differentiation, integration, evaluation, critical points "
+                    "and drawing over a corpus of expressions.")
+    parser.add_argument("-o", "--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", metavar="BASELINE",
+                        help="JSON file of an earlier run to compare the medians with")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="slowdown ratio that counts as a regression (default: %(default)s)")
+    parser.add_argument("--statistic", choices=["median", "min", "mean"], default="median",
+                        help="statistic to compare; min is steadier on a busy machine "
+                             "(default: %(default)s)")
+    parser.add_argument("-k", "--filter", action="append", default=[],
+                        help="only run benchmarks whose benchmark/case name contains this; "
+                             "may be repeated")
+    parser.add_argument("--points", type=int, default=100_000,
+                        help="grid points for evaluation and drawing (default: %(default)s)")
+    parser.add_argument("--quick", action="store_true",
+                        help="fewer repeats, for a fast rough check")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.quick:
+        repeats = dict(min_repeats=1, max_repeats=5, min_time=0.05, max_time=0.5)
+    else:
+        repeats = dict(min_repeats=5, max_repeats=50, min_time=0.2, max_time=3.0)
+
+    def selected(name):
+        return not args.filter or any(pattern in name for pattern in args.filter)
+
+    started = time.perf_counter()
+    results = run_benchmarks(args.points, selected, **repeats)
+    print(f"\n{len(results)} benchmarks in {time.perf_counter() - started:.1f}s")
+    fused_speedup(results, args.statistic)
+
+    if args.output:
+        document = {"environment": environment(), "points": args.points, "results": results}
+        with open(args.output, "w") as output:
+            json.dump(document, output, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as source:
+            baseline = json.load(source)["results"]
+        regressions = compare(results, baseline, args.threshold, args.statistic)
+        if regressions:
+            print(f"\n{len(regressions)} benchmarks slower than {args.threshold:g}x the baseline")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,301 @@
+"""Headless batch analysis of expressions, without Qt"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from multiprocessing.connection import wait
+
+import numpy as np
+
+from calcvisualizer.core.background import get_context, DEFAULT_TIMEOUT
+from calcvisualizer.core.cache import compile_expression, NUMPY_FUNCTIONS
+from calcvisualizer.core.symbolic import symbolic_store
+from calcvisualizer.core.calculator import (evaluate_function, evaluate_fused, cumulative_integral,
+                                            find_critical_points)
+
+# Sampled columns of every result, in output order
+SAMPLE_COLUMNS = ["x", "f", "df", "d2f", "integral"]
+
+# Per-expression text fields of every result
+TEXT_FIELDS = ["expression", "status", "error", "derivative", "second_derivative",
+               "integral_expr", "integral_method"]
+
+def finite_or_nan(values):
+    values = np.asarray(values, dtype=float)
+    return np.where(np.isfinite(values), values, np.nan)
+
+def analyze_expression(expression, x_min, x_max, resolution, symbolic_integral=True):
+    """Compute the function, two derivatives, the integral and critical points on a grid"""
+    parsed_expr, func = compile_expression(expression, ["numpy", NUMPY_FUNCTIONS])
+    x_values = np.linspace(x_min, x_max, resolution)
+    # f, f' and f'' in one pass, sharing their common subexpressions
+    fused = symbolic_store.fused_function(parsed_expr, 2, ["numpy", NUMPY_FUNCTIONS])
+    y_values, d_values, d2_values = evaluate_fused(fused, x_values)
+    derivative_func = symbolic_store.derivative_function(parsed_expr, 1)
+
+    integral_expr, integral_method = "", "numeric"
+    if symbolic_integral:
+        try:
+            integral_expr = symbolic_store.integral(parsed_expr)
+            int_values = evaluate_function(symbolic_store.integral_function(parsed_expr), x_values)
+            integral_method = "symbolic"
+        except Exception:
+            integral_expr = ""
+    if integral_method == "numeric":
+        int_values, _ = cumulative_integral(x_values, y_values)
+
+    critical_points = find_critical_points(func, x_values, d_values, derivative_func)
+    return {
+        "expression": expression,
+        "status": "ok",
+        "error": "",
+        "derivative": str(symbolic_store.derivative(parsed_expr, 1)),
+        "second_derivative": str(symbolic_store.derivative(parsed_expr, 2)),
+        "integral_expr": str(integral_expr),
+        "integral_method": integral_method,
+        "x": x_values,
+        "f": finite_or_nan(y_values),
+        "df": finite_or_nan(d_values),
+        "d2f": finite_or_nan(d2_values),
+        "integral": finite_or_nan(int_values),
+        "critical_x": critical_points['x'],
+        "critical_y": critical_points['y'],
+        "critical_kind": critical_points['kind'],
+    }
+
+def failed_result(expression, status, error):
+    """Result record for an expression that could not be analyzed"""
+    result = {field: "" for field in TEXT_FIELDS}
+    result.update(expression=expression, status=status, error=error)
+    for column in SAMPLE_COLUMNS + ["critical_x", "critical_y"]:
+        result[column] = np.empty(0)
+    result["critical_kind"] = np.empty(0, dtype='U6')
+    return result
+
+def _batch_worker(connection):
+    """Analyze tasks sent over the connection until told to stop"""
+    while True:
+        task = connection.recv()
+        if task is None:
+            break
+        expression = task[0]
+        try:
+            result = analyze_expression(*task)
+        except Exception as e:
+            result = failed_result(expression, "error", str(e))
+        connection.send(result)
+        # Each expression is independent, so keep worker memory flat
+        symbolic_store.clear()
+
+class _Worker:
+    def __init__(self, context):
+        self.connection, child = context.Pipe()
+        self.process = context.Process(target=_batch_worker, args=(child,), daemon=True)
+        self.process.start()
+        child.close()
+        self.task = None
+        self.index = None
+        self.deadline = None
+
+    def start(self, index, task, timeout):
+        self.index, self.task = index, task
+        self.deadline = None if timeout is None else time.monotonic() + timeout
+        self.connection.send(task)
+
+    def stop(self):
+        try:
+            self.connection.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(1)
+        if self.process.is_alive():
+            self.process.kill()
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.connection.close()
+
+def run_batch(expressions, x_min=-10.0, x_max=10.0, resolution=400, jobs=None,
+              timeout=DEFAULT_TIMEOUT, symbolic_integral=True):
+    """Analyze expressions across worker processes, yielding (index, result) as they finish
+
+    A worker that exceeds ``timeout`` seconds on an expression is killed and
+    replaced. An expression that timed out during symbolic integration is
+    retried once with the numeric integral before it is reported as a timeout.
+    """
+    if not expressions:
+        return
+    context = get_context()
+    queue = [(index, (expression, x_min, x_max, resolution, symbolic_integral))
+             for index, expression in enumerate(expressions)]
+    queue.reverse()
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(queue)))
+    workers = [_Worker(context) for _ in range(jobs)]
+    busy = []
+    try:
+        while queue or busy:
+            for worker in workers:
+                if worker not in busy and queue:
+                    worker.start(*queue.pop(), timeout)
+                    busy.append(worker)
+
+            now = time.monotonic()
+            deadlines = [worker.deadline for worker in busy if worker.deadline is not None]
+            wait_time = max(0.0, min(deadlines) - now) if deadlines else None
+            ready = wait([worker.connection for worker in busy], wait_time)
+
+            for worker in list(busy):
+                if worker.connection in ready:
+                    try:
+                        result = worker.connection.recv()
+                    except EOFError:
+                        result = failed_result(worker.task[0], "error", "worker process exited")
+                        worker.kill()
+                        workers[workers.index(worker)] = _Worker(context)
+                    busy.remove(worker)
+                    yield worker.index, result
+                elif worker.deadline is not None and time.monotonic() >= worker.deadline:
+                    # The only way to stop a runaway computation is to kill its process
+                    busy.remove(worker)
+                    worker.kill()
+                    workers[workers.index(worker)] = _Worker(context)
+                    expression, *grid, symbolic = worker.task
+                    if symbolic:
+                        queue.append((worker.index, (expression, *grid, False)))
+                    else:
+                        yield worker.index, failed_result(
+                            expression, "timeout", f"time budget of {timeout:g}s exceeded")
+    finally:
+        for worker in workers:
+            if worker in busy:
+                worker.kill()
+            else:
+                worker.stop()
+
+def in_order(results):
+    """Re-order (index, result) pairs that finish out of order"""
+    finished = {}
+    next_index = 0
+    for index, result in results:
+        finished[index] = result
+        while next_index in finished:
+            yield next_index, finished.pop(next_index)
+            next_index += 1
+
+def read_expressions(source):
+    """Read one expression per line, skipping blank lines and # comments"""
+    expressions = []
+    for line in source:
+        line = line.strip()
+        if line and not line.startswith("#"):
+            expressions.append(line)
+    return expressions
+
+def to_json(result):
+    """Convert a result to JSON-ready values, with NaN as null"""
+    record = {field: result[field] for field in TEXT_FIELDS}
+    for column in SAMPLE_COLUMNS + ["critical_x", "critical_y"]:
+        values = np.asarray(result[column], dtype=float)
+        record[column] = [None if np.isnan(value) else value for value in values.tolist()]
+    record["critical_kind"] = result["critical_kind"].tolist()
+    return record
+
+def write_jsonl(results, output):
+    for index, result in results:
+        record = to_json(result)
+        record["index"] = index
+        output.write(json.dumps(record) + "\n")
+
+def write_csv(results, output):
+    """One row per grid point, then one row per critical point with its kind"""
+    writer = csv.writer(output)
+    writer.writerow(["index", "expression", "status"] + SAMPLE_COLUMNS + ["critical"])
+    for index, result in results:
+        prefix = [index, result["expression"], result["status"]]
+        if result["status"] != "ok":
+            writer.writerow(prefix + [""] * len(SAMPLE_COLUMNS) + [result["error"]])
+            continue
+        columns = np.column_stack([result[column] for column in SAMPLE_COLUMNS])
+        writer.writerows(prefix + row + [""] for row in columns.tolist())
+        for x, y, kind in zip(result["critical_x"], result["critical_y"], result["critical_kind"]):
+            writer.writerow(prefix + [x, y, "", "", "", kind])
+
+def write_npz(results, path):
+    """Concatenate every column; offsets[i]:offsets[i + 1] selects expression i"""
+    results = [result for _, result in results]
+    arrays = {field: np.array([result[field] for result in results], dtype=str)
+              for field in TEXT_FIELDS}
+    for prefix, columns in (("", SAMPLE_COLUMNS), ("critical_", ["critical_x", "critical_y"])):
+        lengths = [len(result[columns[0]]) for result in results]
+        arrays[prefix + "offsets"] = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+        for column in columns:
+            arrays[column] = np.concatenate([result[column] for result in results] or [np.empty(0)])
+    arrays["critical_kind"] = np.concatenate(
+        [result["critical_kind"] for result in results] or [np.empty(0, dtype='U6')])
+    np.savez_compressed(path, **arrays)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="calcvisualizer batch",
+        description="Compute functions, derivatives, integrals and critical points "
+                    "for many expressions without the GUI.")
+    parser.add_argument("input", nargs="?", default="-",
+                        help="file with one expression per line, or - for stdin (default)")
+    parser.add_argument("-o", "--output", default="-",
+                        help="output file, or - for stdout (default; not for npz)")
+    parser.add_argument("-f", "--format", choices=["npz", "csv", "jsonl"],
+                        help="output format (default: from the output extension, else jsonl)")
+    parser.add_argument("--x-min", type=float, default=-10.0)
+    parser.add_argument("--x-max", type=float, default=10.0)
+    parser.add_argument("--resolution", type=int, default=400, help="grid points per expression")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="worker processes (default: number of CPUs)")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT,
+                        help="seconds allowed per expression (default: %(default)s)")
+    parser.add_argument("--numeric-integral", action="store_true",
+                        help="skip symbolic integration and integrate numerically")
+    args = parser.parse_args(argv)
+    if args.format is None:
+        extension = os.path.splitext(args.output)[1].lstrip(".").lower()
+        args.format = extension if extension in ("npz", "csv", "jsonl") else "jsonl"
+    if args.format == "npz" and args.output == "-":
+        parser.error("npz output needs a file, use --output")
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.input == "-":
+        expressions = read_expressions(sys.stdin)
+    else:
+        with open(args.input) as source:
+            expressions = read_expressions(source)
+
+    counts = {}
+    def counted(results):
+        for index, result in results:
+            counts[result["status"]] = counts.get(result["status"], 0) + 1
+            yield index, result
+
+    started = time.perf_counter()
+    results = counted(in_order(run_batch(expressions, args.x_min, args.x_max, args.resolution, args.jobs,
+                                args.timeout, not args.numeric_integral)))
+    if args.format == "npz":
+        write_npz(results, args.output)
+    else:
+        writer = write_csv if args.format == "csv" else write_jsonl
+        if args.output == "-":
+            writer(results, sys.stdout)
+        else:
+            with open(args.output, "w", newline="") as output:
+                writer(results, output)
+
+    summary = ", ".join(f"{count} {status}" for status, count in sorted(counts.items()))
+    print(f"Analyzed {len(expressions)} expressions in {time.perf_counter() - started:.1f}s"
+          f" ({summary or 'nothing to do'})", file=sys.stderr)
+    return 0 if counts.get("ok", 0) == len(expressions) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,332 @@
+"""Forward-mode automatic differentiation with truncated Taylor series over NumPy
+
+A Jet holds the Taylor coefficients c[k] = f^(k)(x) / k! of a function at
+every grid point, so one traversal of the expression tree yields f and its
+first n derivatives without ever building a symbolic derivative.
+"""
+from collections import namedtuple
+from math import factorial
+
+import numpy as np
+
+class Jet:
+    """Truncated Taylor series; coefficients has shape (order + 1, points)"""
+
+    __slots__ = ('coefficients',)
+
+    def __init__(self, coefficients):
+        self.coefficients = coefficients
+
+    @classmethod
+    def variable(cls, x_values, order):
+        """The independent variable x, whose only non-zero derivative is the first"""
+        x_values = np.asarray(x_values, dtype=float)
+        coefficients = np.zeros((order + 1,) + x_values.shape)
+        coefficients[0] = x_values
+        if order >= 1:
+            coefficients[1] = 1.0
+        return cls(coefficients)
+
+    @property
+    def order(self):
+        return len(self.coefficients) - 1
+
+    def constant(self, value):
+        """A jet of this shape for a constant"""
+        coefficients = np.zeros_like(self.coefficients)
+        coefficients[0] = value
+        return Jet(coefficients)
+
+    def derivatives(self):
+        """Return f, f', ..., f^(order) as rows"""
+        return [factorial(k) * row for k, row in enumerate(self.coefficients)]
+
+# Jets and plain floats mix freely; these helpers give the result of each operation
+
+def add(a, b):
+    if not isinstance(a, Jet):
+        a, b = b, a
+    if not isinstance(a, Jet):
+        return a + b
+    if isinstance(b, Jet):
+        return Jet(a.coefficients + b.coefficients)
+    coefficients = a.coefficients.copy()
+    coefficients[0] += b
+    return Jet(coefficients)
+
+def mul(a, b):
+    if not isinstance(a, Jet):
+        a, b = b, a
+    if not isinstance(a, Jet):
+        return a * b
+    if not isinstance(b, Jet):
+        return Jet(a.coefficients * b)
+    a, b = a.coefficients, b.coefficients
+    result = np.empty_like(a)
+    for k in range(len(a)):
+        # Cauchy product of the two series, truncated at the order
+        result[k] = sum(a[j] * b[k - j] for j in range(k + 1))
+    return Jet(result)
+
+def reciprocal(a):
+    """1 / a by q_k = -(sum_{j=1..k} a_j q_{k-j}) / a_0"""
+    if not isinstance(a, Jet):
+        return 1.0 / a
+    a = a.coefficients
+    result = np.empty_like(a)
+    result[0] = 1.0 / a[0]
+    for k in range(1, len(a)):
+        result[k] = -sum(a[j] * result[k - j] for j in range(1, k + 1)) / a[0]
+    return Jet(result)
+
+def chain(a, value, derivative):
+    """Series of g(a) from g(a_0) and the series of g'(a), via h' = g'(a) a'
+
+    h_k = (1/k) sum_{j=1..k} j a_j u_{k-j}, where u is the series of g'(a).
+    """
+    a = a.coefficients
+    u = derivative.coefficients if isinstance(derivative, Jet) else None
+    result = np.empty_like(a)
+    result[0] = value
+    for k in range(1, len(a)):
+        if u is None:
+            result[k] = derivative * a[k]
+        else:
+            result[k] = sum(j * a[j] * u[k - j] for j in range(1, k + 1)) / k
+    return Jet(result)
+
+def exp(a):
+    if not isinstance(a, Jet):
+        return np.exp(a)
+    a = a.coefficients
+    result = np.empty_like(a)
+    result[0] = np.exp(a[0])
+    for k in range(1, len(a)):
+        result[k] = sum(j * a[j] * result[k - j] for j in range(1, k + 1)) / k
+    return Jet(result)
+
+def log(a):
+    if not isinstance(a, Jet):
+        return np.log(a)
+    return chain(a, np.log(a.coefficients[0]), reciprocal(a))
+
+def sin_cos(a):
+    """Sine and cosine series, each built from the other"""
+    a = a.coefficients
+    sin, cos = np.empty_like(a), np.empty_like(a)
+    sin[0], cos[0] = np.sin(a[0]), np.cos(a[0])
+    for k in range(1, len(a)):
+        sin[k] = sum(j * a[j] * cos[k - j] for j in range(1, k + 1)) / k
+        cos[k] = -sum(j * a[j] * sin[k - j] for j in range(1, k + 1)) / k
+    return Jet(sin), Jet(cos)
+
+def sinh_cosh(a):
+    a = a.coefficients
+    sinh, cosh = np.empty_like(a), np.empty_like(a)
+    sinh[0], cosh[0] = np.sinh(a[0]), np.cosh(a[0])
+    for k in range(1, len(a)):
+        sinh[k] = sum(j * a[j] * cosh[k - j] for j in range(1, k + 1)) / k
+        cosh[k] = sum(j * a[j] * sinh[k - j] for j in range(1, k + 1)) / k
+    return Jet(sinh), Jet(cosh)
+
+def power(a, exponent):
+    """a ** exponent for a constant exponent
+
+    Integer powers multiply, so they stay exact where a is zero; other
+    powers use p_k = (1 / (k a_0)) sum_{j=1..k} ((r + 1) j - k) a_j p_{k-j}.
+    """
+    if not isinstance(a, Jet):
+        return np.power(a, exponent)
+    if float(exponent).is_integer():
+        n = int(exponent)
+        if n < 0:
+            return reciprocal(power(a, -n))
+        result, base = a.constant(1.0), a
+        while n:
+            if n & 1:
+                result = mul(result, base)
+            n >>= 1
+            if n:
+                base = mul(base, base)
+        return result
+    a = a.coefficients
+    result = np.empty_like(a)
+    result[0] = np.power(a[0], exponent)
+    for k in range(1, len(a)):
+        total = sum(((exponent + 1) * j - k) * a[j] * result[k - j] for j in range(1, k + 1))
+        result[k] = total / (k * a[0])
+    return Jet(result)
+
+def pow_(base, exponent):
+    if not isinstance(exponent, Jet):
+        return power(base, exponent)
+    return exp(mul(exponent, log(base)))
+
+def sin(a):
+    return sin_cos(a)[0] if isinstance(a, Jet) else np.sin(a)
+
+def cos(a):
+    return sin_cos(a)[1] if isinstance(a, Jet) else np.cos(a)
+
+def tan(a):
+    if not isinstance(a, Jet):
+        return np.tan(a)
+    sine, cosine = sin_cos(a)
+    return mul(sine, reciprocal(cosine))
+
+def sinh(a):
+    return sinh_cosh(a)[0] if isinstance(a, Jet) else np.sinh(a)
+
+def cosh(a):
+    return sinh_cosh(a)[1] if isinstance(a, Jet) else np.cosh(a)
+
+def tanh(a):
+    if not isinstance(a, Jet):
+        return np.tanh(a)
+    sine, cosine = sinh_cosh(a)
+    return mul(sine, reciprocal(cosine))
+
+def sqrt(a):
+    return power(a, 0.5)
+
+def atan(a):
+    if not isinstance(a, Jet):
+        return np.arctan(a)
+    return chain(a, np.arctan(a.coefficients[0]), reciprocal(add(mul(a, a), 1.0)))
+
+def asin(a):
+    if not isinstance(a, Jet):
+        return np.arcsin(a)
+    return chain(a, np.arcsin(a.coefficients[0]), power(add(mul(mul(a, a), -1.0), 1.0), -0.5))
+
+def acos(a):
+    if not isinstance(a, Jet):
+        return np.arccos(a)
+    return chain(a, np.arccos(a.coefficients[0]),
+                 mul(power(add(mul(mul(a, a), -1.0), 1.0), -0.5), -1.0))
+
+def abs_(a):
+    if not isinstance(a, Jet):
+        return np.abs(a)
+    return Jet(np.sign(a.coefficients[0]) * a.coefficients)
+
+# SymPy function names and their Taylor-series implementations
+FUNCTIONS = {
+    "exp": exp, "log": log, "sqrt": sqrt, "Abs": abs_,
+    "sin": sin, "cos": cos, "tan": tan,
+    "sinh": sinh, "cosh": cosh, "tanh": tanh,
+    "atan": atan, "asin": asin, "acos": acos,
+}
+
+# Straight-line program for an expression: slots starts with x followed by the
+# constants, each step appends function(*slots[arguments]) and frees the
+# slots in release, and output is the slot holding the result
+Tape = namedtuple('Tape', ['constants', 'steps', 'output'])
+
+def compile_tape(expression, variable='x'):
+    """Flatten an expression tree into a Tape, sharing repeated subexpressions
+
+    Raises ValueError for anything the Taylor evaluator cannot handle.
+    """
+    constants = []
+    steps = []
+    slots = {}
+
+    def slot_for(node):
+        if node in slots:
+            return slots[node]
+        if node.is_Symbol:
+            if node.name != variable:
+                raise ValueError(f"unknown symbol '{node}'")
+            slots[node] = 0
+            return 0
+        if not node.free_symbols:
+            # Constant subexpressions are evaluated once, as plain numbers
+            constants.append(float(node))
+            slots[node] = len(constants)
+            return slots[node]
+
+        if node.is_Add or node.is_Mul:
+            function = add if node.is_Add else mul
+            result = slot_for(node.args[0])
+            for arg in node.args[1:]:
+                steps.append((function, (result, slot_for(arg))))
+                result = -len(steps)
+        elif node.is_Pow:
+            steps.append((pow_, (slot_for(node.base), slot_for(node.exp))))
+        else:
+            function = FUNCTIONS.get(type(node).__name__)
+            if function is None or len(node.args) != 1:
+                raise ValueError(f"'{type(node).__name__}' is not supported by automatic differentiation")
+            steps.append((function, (slot_for(node.args[0]),)))
+        slots[node] = -len(steps)
+        return slots[node]
+
+    output = slot_for(expression)
+
+    # Step results are numbered after x and the constants
+    base = len(constants) + 1
+    def index(slot):
+        return slot if slot >= 0 else base - slot - 1
+    steps = [(function, tuple(index(slot) for slot in arguments)) for function, arguments in steps]
+    output = index(output)
+
+    # Free every step result after its last use to bound the memory in use
+    last_use = {}
+    for position, (_, arguments) in enumerate(steps):
+        for slot in arguments:
+            if slot >= base:
+                last_use[slot] = position
+    releases = [[] for _ in steps]
+    for slot, position in last_use.items():
+        if slot != output:
+            releases[position].append(slot)
+    steps = [(function, arguments, tuple(release))
+             for (function, arguments), release in zip(steps, releases)]
+    return Tape(tuple(constants), steps, output)
+
+def run_tape(tape, x_values, order):
+    """Evaluate a Tape as a Jet, or a float when it does not depend on x"""
+    slots = [Jet.variable(x_values, order)] + list(tape.constants)
+    with np.errstate(all='ignore'):
+        for function, arguments, release in tape.steps:
+            slots.append(function(*[slots[slot] for slot in arguments]))
+            for slot in release:
+                slots[slot] = None
+    return slots[tape.output]
+
+def jet_function(expression, order=2):
+    """Return a callable giving f and its first order derivatives on a grid
+
+    It returns a list of order + 1 values like SymbolicStore.fused_function,
+    so calculator.evaluate_fused can run either.
+    """
+    tape = compile_tape(expression)
+
+    def evaluate(x_values):
+        result = run_tape(tape, x_values, order)
+        if isinstance(result, Jet):
+            return result.derivatives()
+        return [result] + [0.0] * order
+
+    return evaluate
+
+def derivative_function(expression, order=1):
+    """Return a callable for the order-th derivative alone, evaluated by automatic differentiation"""
+    tape = compile_tape(expression)
+
+    def evaluate(x_values):
+        result = run_tape(tape, x_values, order)
+        if isinstance(result, Jet):
+            return factorial(order) * result.coefficients[order]
+        return result if order == 0 else 0.0
+
+    return evaluate
+
+def supports(expression):
+    """Check whether an expression can be evaluated by automatic differentiation"""
+    try:
+        compile_tape(expression)
+        return True
+    except (ValueError, TypeError):
+        return False
@@ -0,0 +1,114 @@
+import multiprocessing
+import time
+
+from calcvisualizer.utils.helpers import lazy_import
+
+sympy = lazy_import("sympy")
+
+# Default time budget in seconds for a single symbolic computation
+DEFAULT_TIMEOUT = 10.0
+
+_context = None
+
+def get_context():
+    """Return the multiprocessing context used for symbolic workers"""
+    global _context
+    if _context is None:
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            # Workers fork from a server that already imported SymPy, so a new
+            # task starts in milliseconds without forking the GUI process
+            _context = multiprocessing.get_context("forkserver")
+            _context.set_forkserver_preload(["__main__", "sympy", "calcvisualizer.core.background"])
+        else:
+            _context = multiprocessing.get_context("spawn")
+    return _context
+
+def compute_symbolic(kind, expression, order=1):
+    """Run a symbolic operation in the current process"""
+    x = sympy.symbols('x')
+    if kind == "integral":
+        return sympy.integrate(expression, x)
+    if kind == "derivative":
+        return sympy.diff(expression, x, order)
+    raise ValueError(f"Unknown symbolic operation '{kind}'")
+
+def _symbolic_worker(connection, kind, expression, order):
+    try:
+        connection.send(("ok", compute_symbolic(kind, expression, order)))
+    except Exception as e:
+        connection.send(("error", str(e)))
+    finally:
+        connection.close()
+
+class SymbolicTask:
+    """A symbolic computation running in its own process under a time budget
+
+    The task is polled rather than joined so the GUI event loop never blocks.
+    Cancelling or running over budget terminates the worker process.
+    """
+
+    def __init__(self, kind, expression, order=1, timeout=DEFAULT_TIMEOUT):
+        self.kind = kind
+        self.expression = expression
+        self.order = order
+        self.status = "running"
+        self.result = None
+        self.error = None
+        self.started = time.monotonic()
+        self.deadline = None if timeout is None else self.started + timeout
+
+        context = get_context()
+        self._receiver, sender = context.Pipe(duplex=False)
+        self._process = context.Process(target=_symbolic_worker,
+                                        args=(sender, kind, expression, order),
+                                        daemon=True)
+        self._process.start()
+        sender.close()
+
+    @property
+    def done(self):
+        return self.status != "running"
+
+    def poll(self):
+        """Collect the result if available and enforce the deadline"""
+        if self.done:
+            return True
+
+        if self._receiver.poll():
+            try:
+                status, value = self._receiver.recv()
+            except EOFError:
+                status, value = "error", "worker exited without a result"
+            if status == "ok":
+                self.result = value
+            else:
+                self.error = value
+            self.status = status
+            self._cleanup()
+        elif not self._process.is_alive():
+            self.status = "error"
+            self.error = "worker exited without a result"
+            self._cleanup()
+        elif self.deadline is not None and time.monotonic() > self.deadline:
+            self.cancel("timeout")
+            self.error = "time budget exceeded"
+
+        return self.done
+
+    def wait(self, interval=0.01):
+        """Block until the task finishes, times out or is cancelled"""
+        while not self.poll():
+            time.sleep(interval)
+        return self.result
+
+    def cancel(self, status="cancelled"):
+        """Terminate the worker process if it is still running"""
+        if self.done:
+            return
+        self._process.terminate()
+        self.status = status
+        self._cleanup()
+
+    def _cleanup(self):
+        self._process.join(1.0)
+        self._receiver.close()
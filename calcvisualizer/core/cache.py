@@ -0,0 +1,96 @@
+from collections import OrderedDict, namedtuple
+import threading
+
+import numpy as np
+
+from calcvisualizer.utils.helpers import lazy_import
+from calcvisualizer.utils.tracing import span
+
+# SymPy takes most of a second to import, so it loads with the first parse
+sympy = lazy_import("sympy")
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+MATH_FUNCTION_NAMES = ["sin", "cos", "exp", "log", "tan", "sqrt", "pi"]
+
+def math_functions():
+    """SymPy functions that may appear in an expression, by name"""
+    return {name: getattr(sympy, name) for name in MATH_FUNCTION_NAMES}
+
+# Numpy overrides used by the GUI so poles and negative roots stay plottable
+NUMPY_FUNCTIONS = {
+    "sin": np.sin, "cos": np.cos, "exp": np.exp, "log": np.log,
+    "tan": lambda x: np.sin(x) / np.cos(x),
+    "sqrt": lambda x: np.sqrt(np.maximum(x, 0)),
+    "pi": np.pi
+}
+
+def normalize_expression(expression):
+    """Return the text used to key an expression
+
+    Runs of whitespace collapse to one space rather than being removed, so
+    "x y" and "xy" stay different expressions.
+    """
+    return " ".join(expression.split())
+
+def modules_key(modules):
+    """Build a hashable key for a lambdify module specification"""
+    if isinstance(modules, str):
+        return modules
+    if isinstance(modules, dict):
+        return tuple(sorted((name, id(value)) for name, value in modules.items()))
+    return tuple(modules_key(module) for module in modules)
+
+class ExpressionCache:
+    """Size-bounded LRU cache of (parsed expression, numpy callable) pairs"""
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, expression, modules="numpy"):
+        """Return the parsed expression and its lambdified callable"""
+        key = (normalize_expression(expression), modules_key(modules))
+        text = expression.strip()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        # Parse outside the lock, errors propagate to the caller uncached
+        with span("sympify", "sympy", expression=text):
+            parsed_expr = sympy.sympify(text, locals=math_functions())
+        with span("lambdify", "sympy", expression=text):
+            entry = (parsed_expr, sympy.lambdify(sympy.symbols('x'), parsed_expr, modules=modules))
+
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return entry
+
+    def cache_info(self):
+        """Report hit/miss counters in the style of functools.lru_cache"""
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.maxsize, len(self._entries))
+
+    def cache_clear(self):
+        """Drop all entries and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+expression_cache = ExpressionCache()
+
+def compile_expression(expression, modules="numpy"):
+    """Parse and lambdify an expression through the shared cache"""
+    return expression_cache.get(expression, modules)
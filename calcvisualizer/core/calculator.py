@@ -1,64 +1,274 @@
 import numpy as np
-import matplotlib.pyplot as plt
-import sympy as sp
-from sympy import symbols, diff, integrate, lambdify, sympify, sin, cos, exp, log, tan, sqrt, pi
-from matplotlib.figure import Figure
+from calcvisualizer.core.cache import compile_expression
+from calcvisualizer.core.symbolic import symbolic_store
+from calcvisualizer.utils.tracing import traced
 
+@traced(category="calculator")
 def parse_function(expression):
-    x = symbols('x')
-    math_functions = {
-        "sin": sin, 
-        "cos": cos, 
-        "exp": exp, 
-        "log": log,
-        "tan": tan, 
-        "sqrt": sqrt, 
-        "pi": pi
-    }
-    
     try:
-        parsed_expr = sympify(expression.strip(), locals=math_functions)
-        return parsed_expr, lambdify(x, parsed_expr, 'numpy')
+        return compile_expression(expression, 'numpy')
     except Exception as e:
         print(f"Error parsing expression '{expression}': {e}")
         return None, None
 
+@traced(category="calculator")
 def calculate_derivative(expression, order=1):
-    x = symbols('x')
-    
     try:
-        derivative_expr = expression
-        for _ in range(order):
-            derivative_expr = diff(derivative_expr, x)
-        
-        derivative_func = lambdify(x, derivative_expr, 'numpy')
+        derivative_expr = symbolic_store.derivative(expression, order)
+        derivative_func = symbolic_store.derivative_function(expression, order)
         return derivative_expr, derivative_func
     except Exception as e:
         print(f"Error calculating derivative: {e}")
         return None, None
 
+@traced(category="calculator")
 def calculate_integral(expression, with_constant=True):
-    x = symbols('x')
-    
     try:
-        integral_expr = integrate(expression, x)
-        integral_func = lambdify(x, integral_expr, 'numpy')
+        integral_expr = symbolic_store.integral(expression)
+        integral_func = symbolic_store.integral_function(expression)
         return integral_expr, integral_func
     except Exception as e:
         print(f"Error calculating integral: {e}")
         return None, None
         
-def find_critical_points(func, x_range, derivative_values=None):
+CRITICAL_POINT_DTYPE = np.dtype([('x', float), ('y', float), ('kind', 'U6')])
+
+@traced(category="calculator")
+def find_critical_points(func, x_range, derivative_values=None, derivative_func=None,
+                         iterations=60):
+    """Locate and classify the zeros of the derivative on a grid
+
+    Sign changes of the sampled derivative are detected in one NumPy pass,
+    runs of exact zeros collapse to a single candidate, and each bracket is
+    refined by vectorized bisection on ``derivative_func`` when given
+    (linear interpolation otherwise). Where the derivative dips towards zero
+    without changing sign, as for x**3, the dip is refined with
+    ``touch_points`` and kept as a saddle if it reaches zero. Returns a
+    structured array of (x, y, kind) with kind one of 'min', 'max' or
+    'saddle', in increasing x.
+    """
+    x_range = np.asarray(x_range, dtype=float)
     if derivative_values is None:
-        return []
-    
-    critical_points = []
-    
-    for i in range(1, len(x_range)):
-        if (derivative_values[i-1] < 0 and derivative_values[i] > 0) or \
-           (derivative_values[i-1] > 0 and derivative_values[i] < 0):
-            x = x_range[i]
-            y = func(x)
-            critical_points.append((x, y))
-    
-    return critical_points
\ No newline at end of file
+        if derivative_func is None:
+            return np.empty(0, dtype=CRITICAL_POINT_DTYPE)
+        derivative_values = evaluate_function(derivative_func, x_range)
+    d = np.asarray(derivative_values, dtype=float)
+
+    # Signs of the usable samples; zeros and non-finite values are skipped
+    signs = np.sign(d)
+    nonzero = np.flatnonzero(np.isfinite(d) & (signs != 0))
+    if len(nonzero) < 2:
+        return np.empty(0, dtype=CRITICAL_POINT_DTYPE)
+    left, right = nonzero[:-1], nonzero[1:]
+    usable_sign = signs[nonzero]
+    left_sign, right_sign = usable_sign[:-1], usable_sign[1:]
+
+    # Non-finite samples between two neighbours mean a pole, not a critical point
+    finite_count = np.cumsum(np.isfinite(d))
+    gap_finite = finite_count[right - 1] - finite_count[left] == right - left - 1
+    changes = (left_sign != right_sign) & gap_finite
+    steady = (left_sign == right_sign) & gap_finite
+    # A run of exact zeros without a sign change is a stationary (saddle) point
+    touches = steady & (right - left > 1)
+    candidates = changes | touches
+    dips = None
+    if derivative_func is not None:
+        # |f'| has a local minimum at a usable sample between two of the same sign;
+        # pairs around a run of zeros are already touches
+        magnitude = np.abs(d[nonzero])
+        adjacent = steady & (right - left == 1)
+        dips = np.flatnonzero(adjacent[:-1] & adjacent[1:] & (magnitude[1:-1] < magnitude[:-2])
+                              & (magnitude[1:-1] <= magnitude[2:]))
+    left, right = left[candidates], right[candidates]
+    left_sign, right_sign = left_sign[candidates], right_sign[candidates]
+
+    # Zero runs sit exactly between their neighbours; adjacent samples need a root
+    zero_run = right - left > 1
+    a, b = x_range[left], x_range[right]
+    da, db = d[left], d[right]
+    with np.errstate(all='ignore'):
+        points = np.where(zero_run, 0.5 * (x_range[left + 1] + x_range[right - 1]),
+                          a - da * (b - a) / (db - da))
+
+    bracket = ~zero_run
+    if derivative_func is not None and np.any(bracket):
+        a, b, da = a[bracket], b[bracket], da[bracket]
+        for _ in range(iterations):
+            mid = 0.5 * (a + b)
+            dm = evaluate_function(derivative_func, mid)
+            same = np.sign(dm) == np.sign(da)
+            a = np.where(same, mid, a)
+            da = np.where(same, dm, da)
+            b = np.where(same, b, mid)
+            if np.all(b - a <= 4 * np.finfo(float).eps * np.maximum(1.0, np.abs(a))):
+                break
+        roots = 0.5 * (a + b)
+        # Brackets that collapse onto a pole keep a huge derivative; drop them
+        residual = np.abs(evaluate_function(derivative_func, roots))
+        scale = np.maximum(np.abs(d[left[bracket]]), np.abs(d[right[bracket]]))
+        keep = np.ones(len(points), dtype=bool)
+        keep[bracket] = ~(residual > scale)
+        points[bracket] = roots
+        points, left_sign, right_sign = points[keep], left_sign[keep], right_sign[keep]
+
+    kinds = np.where(left_sign == right_sign, 'saddle',
+                     np.where(left_sign < right_sign, 'min', 'max'))
+
+    if dips is not None and len(dips):
+        before, after = nonzero[dips], nonzero[dips + 2]
+        scale = np.maximum(np.abs(d[before]), np.abs(d[after]))
+        saddles = touch_points(derivative_func, x_range[before], x_range[after], scale, iterations)
+        points = np.concatenate([points, saddles])
+        kinds = np.concatenate([kinds, np.full(len(saddles), 'saddle')])
+        order = np.argsort(points, kind='stable')
+        points, kinds = points[order], kinds[order]
+
+    result = np.empty(len(points), dtype=CRITICAL_POINT_DTYPE)
+    result['x'] = points
+    result['y'] = evaluate_function(func, points) if len(points) else []
+    result['kind'] = kinds
+    return result
+
+# Golden-section ratio
+GOLDEN = (np.sqrt(5) - 1) / 2
+
+def touch_points(derivative_func, a, b, scale, iterations=60):
+    """Points where the derivative touches zero without changing sign
+
+    Each [a, b] brackets a local minimum of |f'|; it is found by vectorized
+    golden-section search and kept when |f'| there is negligible next to
+    ``scale``, the size of the derivative at the bracket ends.
+    """
+    a, b = a.astype(float), b.astype(float)
+    c = b - GOLDEN * (b - a)
+    e = a + GOLDEN * (b - a)
+    fc = np.abs(evaluate_function(derivative_func, c))
+    fe = np.abs(evaluate_function(derivative_func, e))
+    for _ in range(iterations):
+        # Keep the side of the smaller |f'|; the inner point kept there is reused
+        left = fc < fe
+        a, b = np.where(left, a, c), np.where(left, e, b)
+        kept, f_kept = np.where(left, c, e), np.where(left, fc, fe)
+        probe = np.where(left, b - GOLDEN * (b - a), a + GOLDEN * (b - a))
+        f_probe = np.abs(evaluate_function(derivative_func, probe))
+        c, fc = np.where(left, probe, kept), np.where(left, f_probe, f_kept)
+        e, fe = np.where(left, kept, probe), np.where(left, f_kept, f_probe)
+        if np.all(b - a <= 4 * np.finfo(float).eps * np.maximum(1.0, np.abs(a))):
+            break
+    x = np.where(fc < fe, c, e)
+    residual = np.minimum(fc, fe)
+    return x[residual <= np.sqrt(np.finfo(float).eps) * scale]
+
+@traced(category="calculator")
+def evaluate_function(func, x_range):
+    """Evaluate a lambdified function on a grid, broadcasting constant results"""
+    with np.errstate(all='ignore'):
+        values = func(x_range)
+    return np.array(np.broadcast_to(values, np.shape(x_range)), dtype=float)
+
+# Grid points per call of a fused kernel; its intermediate arrays stay this small
+FUSED_CHUNK = 1 << 16
+
+@traced(category="calculator")
+def evaluate_fused(func, x_range, chunk=FUSED_CHUNK):
+    """Evaluate a fused kernel on a grid in chunks, one row per returned series"""
+    x_range = np.asarray(x_range, dtype=float)
+    values = None
+    with np.errstate(all='ignore'):
+        for start in range(0, max(len(x_range), 1), chunk):
+            stop = start + chunk
+            results = func(x_range[start:stop])
+            if values is None:
+                values = np.empty((len(results), len(x_range)))
+            for row, result in zip(values, results):
+                # Constant results broadcast over the chunk
+                row[start:stop] = result
+    return values
+
+@traced(category="calculator")
+def cumulative_integral(x_range, y_values, initial=0.0):
+    """Cumulative integral of sampled values using piecewise quadratic (Simpson) panels
+
+    Works on non-uniform grids in a single vectorized pass. Returns the
+    antiderivative at every sample and an accumulated error estimate taken
+    from the disagreement between the forward and backward quadratic panels.
+    Non-finite samples split the grid into segments; each segment restarts
+    at ``initial`` so a pole never poisons the rest of the curve.
+    """
+    x = np.asarray(x_range, dtype=float)
+    y = np.asarray(y_values, dtype=float)
+    n = len(x)
+    values = np.full(n, np.nan)
+    errors = np.zeros(n)
+    if n == 0:
+        return values, errors
+    finite = np.isfinite(y)
+    if n == 1:
+        values[0] = initial if finite[0] else np.nan
+        return values, errors
+
+    with np.errstate(all='ignore'):
+        h = np.diff(x)
+        trapezoid = 0.5 * h * (y[:-1] + y[1:])
+        panels = trapezoid.copy()
+        error = np.zeros(n - 1)
+
+        if n >= 3:
+            h0, h1 = h[:-1], h[1:]
+            y0, y1, y2 = y[:-2], y[1:-1], y[2:]
+            ok = finite[:-2] & finite[1:-1] & finite[2:]
+
+            # Quadratic through (i, i+1, i+2) integrated over the first and second interval
+            forward = h0 / 6 * (y0 * (2 * h0 + 3 * h1) / (h0 + h1)
+                                + y1 * (h0 + 3 * h1) / h1
+                                - y2 * h0 ** 2 / (h1 * (h0 + h1)))
+            backward = h1 / 6 * (-y0 * h1 ** 2 / (h0 * (h0 + h1))
+                                 + y1 * (3 * h0 + h1) / h0
+                                 + y2 * (3 * h0 + 2 * h1) / (h0 + h1))
+
+            # Interval i has a forward estimate for i <= n-3 and a backward one for i >= 1
+            fwd = np.full(n - 1, np.nan)
+            bwd = np.full(n - 1, np.nan)
+            fwd[:-1] = np.where(ok, forward, np.nan)
+            bwd[1:] = np.where(ok, backward, np.nan)
+
+            both = np.isfinite(fwd) & np.isfinite(bwd)
+            only_fwd = np.isfinite(fwd) & ~both
+            only_bwd = np.isfinite(bwd) & ~both
+            panels = np.where(both, 0.5 * (fwd + bwd), panels)
+            panels = np.where(only_fwd, fwd, panels)
+            panels = np.where(only_bwd, bwd, panels)
+            error = np.where(both, 0.5 * np.abs(fwd - bwd), error)
+            error = np.where(only_fwd, np.abs(fwd - trapezoid), error)
+            error = np.where(only_bwd, np.abs(bwd - trapezoid), error)
+
+        # Intervals touching a non-finite sample break the curve
+        bad = ~(finite[:-1] & finite[1:]) | ~np.isfinite(panels)
+        panels = np.where(bad, 0.0, panels)
+        error = np.where(bad, 0.0, error)
+        total = np.cumsum(panels)
+        total_error = np.cumsum(error)
+
+        # Restart the running sum after every bad interval
+        last_bad = np.maximum.accumulate(np.where(bad, np.arange(n - 1), -1))
+        base = np.where(last_bad >= 0, total[np.maximum(last_bad, 0)], 0.0)
+        base_error = np.where(last_bad >= 0, total_error[np.maximum(last_bad, 0)], 0.0)
+
+    values[0] = initial
+    values[1:] = initial + total - base
+    errors[1:] = total_error - base_error
+    values[1:][bad] = np.nan
+    errors[1:][bad] = np.nan
+
+    # A finite sample right after a break starts a new segment
+    restart = np.zeros(n, dtype=bool)
+    restart[1:] = bad & finite[1:]
+    values[restart] = initial
+    errors[restart] = 0.0
+    values[~finite] = np.nan
+    return values, errors
+
+@traced(category="calculator")
+def numeric_integral(func, x_range, initial=0.0):
+    """Numeric antiderivative of a lambdified function over a grid"""
+    return cumulative_integral(x_range, evaluate_function(func, x_range), initial)
@@ -0,0 +1,113 @@
+"""Reduce a sampled series to what a given number of pixel columns can show
+
+m4 keeps the first, last, minimum and maximum sample of every pixel column,
+which draws the same line as the full series. lttb keeps a fixed number of
+visually significant points. Both expect x in increasing order and keep NaN
+gaps as gaps.
+"""
+import numpy as np
+
+from calcvisualizer.utils.tracing import traced
+
+def m4_indices(x_values, y_values, width, x_min=None, x_max=None):
+    """Indices of the samples M4 keeps for width columns spanning [x_min, x_max]
+
+    Samples left or right of the range are gathered in one extra column on
+    each side, so lines still run to the edges of the view.
+    """
+    n = len(x_values)
+    if x_min is None:
+        x_min, x_max = x_values[0], x_values[-1]
+    span = x_max - x_min
+    if span <= 0 or not np.isfinite(span):
+        return np.arange(n)
+
+    columns = np.floor((x_values - x_min) * (width / span))
+    columns = np.clip(columns, -1, width).astype(np.int64)
+    starts = np.concatenate([[0], np.flatnonzero(np.diff(columns)) + 1])
+    ends = np.concatenate([starts[1:], [n]])
+
+    finite = np.isfinite(y_values)
+    index = np.arange(n)
+    with np.errstate(invalid='ignore'):
+        low = np.where(finite, y_values, np.inf)
+        high = np.where(finite, y_values, -np.inf)
+        is_min = low == np.repeat(np.minimum.reduceat(low, starts), ends - starts)
+        is_max = high == np.repeat(np.maximum.reduceat(high, starts), ends - starts)
+    first_min = np.minimum.reduceat(np.where(is_min & finite, index, n), starts)
+    first_max = np.minimum.reduceat(np.where(is_max & finite, index, n), starts)
+
+    # The first sample of every run of non-finite values keeps the gap
+    gaps = np.flatnonzero(~finite & np.concatenate([[True], finite[:-1]]))
+    keep = np.concatenate([starts, ends - 1, first_min, first_max, gaps])
+    return np.unique(keep[keep < n])
+
+def m4(x_values, y_values, width, x_min=None, x_max=None):
+    """Return (x, y) reduced to at most four samples per pixel column"""
+    x_values = np.asarray(x_values, dtype=float)
+    y_values = np.asarray(y_values, dtype=float)
+    if len(x_values) <= 4 * width:
+        return x_values, y_values
+    keep = m4_indices(x_values, y_values, width, x_min, x_max)
+    return x_values[keep], y_values[keep]
+
+def lttb_indices(x_values, y_values, threshold):
+    """Largest-Triangle-Three-Buckets on finite data: indices of threshold samples"""
+    n = len(x_values)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    # The first and last samples are always kept; the rest is split evenly
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    keep = np.empty(threshold, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        # Average of the next bucket, or the last sample for the final one
+        next_start, next_stop = stop, edges[bucket + 2] if bucket + 2 < len(edges) else n
+        avg_x = x_values[next_start:next_stop].mean()
+        avg_y = y_values[next_start:next_stop].mean()
+        px, py = x_values[previous], y_values[previous]
+        area = np.abs((px - avg_x) * (y_values[start:stop] - py)
+                      - (px - x_values[start:stop]) * (avg_y - py))
+        previous = start + int(np.argmax(area))
+        keep[bucket + 1] = previous
+    return keep
+
+def lttb(x_values, y_values, threshold):
+    """Return (x, y) reduced to about threshold samples, split at NaN gaps"""
+    x_values = np.asarray(x_values, dtype=float)
+    y_values = np.asarray(y_values, dtype=float)
+    n = len(x_values)
+    if n <= threshold:
+        return x_values, y_values
+
+    finite = np.isfinite(y_values)
+    if finite.all():
+        keep = lttb_indices(x_values, y_values, threshold)
+        return x_values[keep], y_values[keep]
+
+    # Each finite run gets its share of the points, runs are joined by a gap
+    breaks = np.flatnonzero(np.diff(finite.astype(np.int8))) + 1
+    bounds = np.concatenate([[0], breaks, [n]])
+    total = max(int(finite.sum()), 1)
+    pieces = []
+    for start, stop in zip(bounds[:-1], bounds[1:]):
+        if not finite[start]:
+            pieces.append(np.array([start]))
+            continue
+        share = max(3, threshold * (stop - start) // total)
+        pieces.append(start + lttb_indices(x_values[start:stop], y_values[start:stop], share))
+    keep = np.concatenate(pieces)
+    return x_values[keep], y_values[keep]
+
+@traced(category="render")
+def decimate(x_values, y_values, width, method="m4", x_min=None, x_max=None):
+    """Reduce a series for a plot width pixels wide
+
+    M4 works on the columns of [x_min, x_max] (the data range by default);
+    LTTB keeps two points per pixel.
+    """
+    if method == "lttb":
+        return lttb(x_values, y_values, 2 * width)
+    return m4(x_values, y_values, width, x_min, x_max)
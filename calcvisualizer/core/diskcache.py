@@ -0,0 +1,225 @@
+"""Evaluated series kept on disk between sessions
+
+Each entry is a directory named after the hash of its key, holding one
+.npy file per array and a meta.json. Arrays are opened memory-mapped, so a
+cached series is only read from disk as far as it is used. The cache has a
+size cap; the entries used longest ago are removed first.
+
+Run ``python main.py cache`` to inspect or purge it.
+"""
+from collections import namedtuple
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from calcvisualizer.core.symbolicdb import symbolic_database
+from calcvisualizer.utils.helpers import user_cache_dir
+
+# Size cap in bytes; CALCVISUALIZER_CACHE_SIZE sets it in megabytes
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+META_FILE = "meta.json"
+
+# One stored entry; last_used is a timestamp and size is in bytes
+CacheEntry = namedtuple('CacheEntry', ['key', 'path', 'size', 'last_used', 'meta'])
+
+def cache_key(*parts):
+    """Hex digest naming the entry for a tuple of key parts"""
+    return hashlib.sha256(repr(parts).encode()).hexdigest()[:32]
+
+def format_size(size):
+    for unit in ["B", "KB", "MB", "GB"]:
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+class DiskCache:
+    """Size-capped LRU store of named NumPy arrays on disk"""
+
+    def __init__(self, directory=None, max_bytes=None):
+        self._directory = directory
+        if max_bytes is None:
+            megabytes = os.environ.get("CALCVISUALIZER_CACHE_SIZE")
+            max_bytes = int(float(megabytes) * 1024 * 1024) if megabytes else DEFAULT_MAX_BYTES
+        self.max_bytes = max_bytes
+        # CALCVISUALIZER_DISK_CACHE=0 turns the cache off
+        self.enabled = os.environ.get("CALCVISUALIZER_DISK_CACHE", "1") != "0"
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @property
+    def directory(self):
+        # Resolved on use, so importing never touches the file system
+        return self._directory or os.path.join(user_cache_dir(), "series")
+
+    def load(self, key):
+        """Return (arrays, meta) with the arrays memory-mapped read-only, or None"""
+        path = os.path.join(self.directory, key)
+        meta_path = os.path.join(path, META_FILE)
+        try:
+            with open(meta_path) as source:
+                meta = json.load(source)
+            arrays = {name: np.load(os.path.join(path, name + ".npy"), mmap_mode='r')
+                      for name in meta["arrays"]}
+            # The meta file's modification time records the last use
+            os.utime(meta_path)
+        except (OSError, ValueError, KeyError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return arrays, meta
+
+    def store(self, key, arrays, meta=None, evict=True):
+        """Write an entry, then evict old entries above the size cap
+
+        The entry is written to a temporary directory and renamed into place,
+        so readers never see it half written. Pass evict=False when storing
+        several entries at once and call evict() after the last one.
+        """
+        directory = self.directory
+        staging = None
+        try:
+            os.makedirs(directory, exist_ok=True)
+            staging = tempfile.mkdtemp(prefix=".tmp-", dir=directory)
+            for name, values in arrays.items():
+                np.save(os.path.join(staging, name + ".npy"), np.asarray(values))
+            meta = dict(meta or {}, arrays=sorted(arrays), created=time.time())
+            with open(os.path.join(staging, META_FILE), "w") as output:
+                json.dump(meta, output)
+            path = os.path.join(directory, key)
+            if os.path.exists(path):
+                # Another build stored the same entry first
+                shutil.rmtree(staging, ignore_errors=True)
+            else:
+                os.rename(staging, path)
+        except OSError as e:
+            print(f"Could not write cache entry {key}: {e}")
+            if staging is not None:
+                shutil.rmtree(staging, ignore_errors=True)
+            return False
+        if evict:
+            self.evict()
+        return True
+
+    def entries(self):
+        """Every stored entry, least recently used first"""
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return []
+        entries = []
+        for name in names:
+            if name.startswith("."):
+                continue
+            path = os.path.join(self.directory, name)
+            meta_path = os.path.join(path, META_FILE)
+            try:
+                size = sum(os.path.getsize(os.path.join(path, item)) for item in os.listdir(path))
+                last_used = os.path.getmtime(meta_path)
+                with open(meta_path) as source:
+                    meta = json.load(source)
+            except (OSError, ValueError):
+                continue
+            entries.append(CacheEntry(name, path, size, last_used, meta))
+        entries.sort(key=lambda entry: entry.last_used)
+        return entries
+
+    def total_size(self):
+        return sum(entry.size for entry in self.entries())
+
+    def evict(self, max_bytes=None):
+        """Remove least recently used entries until the cache fits; returns how many went"""
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        entries = self.entries()
+        total = sum(entry.size for entry in entries)
+        removed = 0
+        for entry in entries:
+            if total <= limit:
+                break
+            try:
+                shutil.rmtree(entry.path)
+            except OSError:
+                # Still mapped by a plot on platforms that lock open files
+                continue
+            total -= entry.size
+            removed += 1
+        return removed
+
+    def purge(self):
+        """Remove every entry, including leftovers of interrupted writes"""
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return 0
+        removed = 0
+        for name in names:
+            path = os.path.join(self.directory, name)
+            if not os.path.isdir(path):
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            if not name.startswith("."):
+                removed += 1
+        return removed
+
+disk_cache = DiskCache()
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="calcvisualizer cache",
+        description="Inspect or purge the on-disk caches of evaluated series and symbolic results.")
+    parser.add_argument("command", nargs="?", choices=["info", "list", "purge"], default="info",
+                        help="info: size and location (default); list: every entry, "
+                             "least recently used first; purge: remove everything")
+    parser.add_argument("--keep", type=float, default=None, metavar="MB",
+                        help="with purge, only remove the least recently used series "
+                             "until they fit in MB megabytes, keeping symbolic results")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    cache = disk_cache
+
+    if args.command == "purge":
+        if args.keep is None:
+            removed = cache.purge()
+            symbolic_database.clear()
+            print(f"Removed the symbolic results in {symbolic_database.path}")
+        else:
+            removed = cache.evict(int(args.keep * 1024 * 1024))
+        print(f"Removed {removed} entries from {cache.directory}")
+        return 0
+
+    entries = cache.entries()
+    if args.command == "list":
+        for entry in entries:
+            meta = entry.meta
+            used = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry.last_used))
+            print(f"{used}  {format_size(entry.size):>9}  {meta.get('kind', '?'):8}  "
+                  f"{meta.get('text', '?')}  [{meta.get('x_min')}, {meta.get('x_max')}] "
+                  f"{meta.get('resolution')} {meta.get('sampler', '')}")
+        return 0
+
+    total = sum(entry.size for entry in entries)
+    print(f"Directory: {cache.directory}")
+    print(f"Entries:   {len(entries)}")
+    print(f"Size:      {format_size(total)} of {format_size(cache.max_bytes)}")
+    counts = symbolic_database.count()
+    print(f"Symbolic:  {sum(counts.values())} results in {symbolic_database.path}"
+          + "".join(f", {count} {kind}s" for kind, count in sorted(counts.items())))
+    if not cache.enabled:
+        print("Disabled by CALCVISUALIZER_DISK_CACHE=0")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+"""Headless figure export, rendered from plot data in worker processes"""
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+import os
+
+import numpy as np
+
+from calcvisualizer.core.background import get_context
+from calcvisualizer.core.decimate import decimate
+
+EXPORT_FORMATS = ["png", "jpg", "svg", "pdf"]
+
+# One line of a plot; style holds the Line2D properties needed to redraw it
+LineSpec = namedtuple('LineSpec', ['x', 'y', 'style'])
+
+# Text placed at a data point, offset by xytext points
+AnnotationSpec = namedtuple('AnnotationSpec', ['text', 'xy', 'xytext'])
+
+# Colors and line styles of the axes, as applied by the selected theme
+ThemeSpec = namedtuple('ThemeSpec', ['figure_color', 'axes_color', 'text_color', 'spine_color',
+                                     'spine_width', 'grid'])
+
+# Everything needed to redraw one axes without the GUI; name is the file stem
+PlotSnapshot = namedtuple('PlotSnapshot', ['name', 'lines', 'annotations', 'xlim', 'ylim',
+                                           'xscale', 'yscale', 'yscale_options', 'xlabel',
+                                           'ylabel', 'title', 'legend', 'theme'])
+
+LINE_PROPERTIES = ['color', 'linewidth', 'linestyle', 'marker', 'markersize', 'label',
+                   'alpha', 'zorder']
+
+def snapshot_axes(name, axes, full_data=None):
+    """Capture the visible lines, annotations, limits and styling of an axes
+
+    full_data maps lines drawn decimated to their full (x, y) samples, so the
+    export is decimated for its own size instead of the screen's.
+    """
+    full_data = full_data or {}
+    lines = []
+    for line in axes.get_lines():
+        if not line.get_visible():
+            continue
+        style = {prop: getattr(line, "get_" + prop)() for prop in LINE_PROPERTIES}
+        x_values, y_values = full_data.get(line, (line.get_xdata(), line.get_ydata()))
+        lines.append(LineSpec(np.asarray(x_values, dtype=float),
+                              np.asarray(y_values, dtype=float), style))
+
+    annotations = [AnnotationSpec(text.get_text(), tuple(text.xy), tuple(text.xyann))
+                   for text in axes.texts
+                   if hasattr(text, 'xyann') and text.get_visible()]
+
+    yscale_options = {}
+    if axes.get_yscale() == 'symlog':
+        yscale_options['linthresh'] = axes.yaxis.get_transform().linthresh
+
+    gridlines = axes.xaxis.get_gridlines()
+    grid = None
+    if len(gridlines) and gridlines[0].get_visible():
+        grid = {'linestyle': gridlines[0].get_linestyle(), 'alpha': gridlines[0].get_alpha(),
+                'color': gridlines[0].get_color()}
+    spine = axes.spines['left']
+    theme = ThemeSpec(axes.figure.get_facecolor(), axes.get_facecolor(),
+                      axes.xaxis.label.get_color(), spine.get_edgecolor(),
+                      spine.get_linewidth(), grid)
+
+    return PlotSnapshot(name, lines, annotations, axes.get_xlim(), axes.get_ylim(),
+                        axes.get_xscale(), axes.get_yscale(), yscale_options,
+                        axes.get_xlabel(), axes.get_ylabel(), axes.get_title(),
+                        axes.get_legend() is not None, theme)
+
+def canvas_class(file_format):
+    """Non-interactive canvas for a format, so workers never touch a GUI backend"""
+    if file_format == "svg":
+        from matplotlib.backends.backend_svg import FigureCanvasSVG
+        return FigureCanvasSVG
+    if file_format == "pdf":
+        from matplotlib.backends.backend_pdf import FigureCanvasPdf
+        return FigureCanvasPdf
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    return FigureCanvasAgg
+
+def render_snapshot(snapshot, path, dpi=100, size=(10, 6)):
+    """Draw a snapshot on a new figure and save it; the format follows the extension"""
+    from matplotlib.figure import Figure
+
+    file_format = os.path.splitext(path)[1].lstrip(".").lower()
+    fig = Figure(figsize=size, dpi=dpi, facecolor=snapshot.theme.figure_color,
+                 layout="constrained")
+    canvas_class(file_format)(fig)
+    ax = fig.add_subplot(111)
+
+    theme = snapshot.theme
+    ax.set_facecolor(theme.axes_color)
+    ax.tick_params(colors=theme.text_color)
+    for spine in ax.spines.values():
+        spine.set_color(theme.spine_color)
+        spine.set_linewidth(theme.spine_width)
+    if theme.grid is not None:
+        ax.grid(True, **theme.grid)
+
+    width = max(int(ax.bbox.width), 2)
+    for line in snapshot.lines:
+        x_values, y_values = decimate(line.x, line.y, width, x_min=snapshot.xlim[0],
+                                      x_max=snapshot.xlim[1])
+        ax.plot(x_values, y_values, **line.style)
+    for annotation in snapshot.annotations:
+        ax.annotate(annotation.text, annotation.xy, textcoords="offset points",
+                    xytext=annotation.xytext, ha='center', color=theme.text_color)
+
+    ax.set_xscale(snapshot.xscale)
+    ax.set_yscale(snapshot.yscale, **snapshot.yscale_options)
+    ax.set_xlim(snapshot.xlim)
+    ax.set_ylim(snapshot.ylim)
+    ax.set_xlabel(snapshot.xlabel, color=theme.text_color)
+    ax.set_ylabel(snapshot.ylabel, color=theme.text_color)
+    if snapshot.title:
+        ax.set_title(snapshot.title, color=theme.text_color)
+    if snapshot.legend and any(not line.style['label'].startswith('_') for line in snapshot.lines):
+        ax.legend(loc='upper left', fontsize='small')
+
+    fig.savefig(path, dpi=dpi, format=file_format, facecolor=theme.figure_color)
+    return path
+
+class ExportBatch:
+    """Snapshots rendered concurrently in worker processes
+
+    The batch is polled for progress; nothing here blocks the caller.
+    """
+
+    def __init__(self, snapshots, directory, file_format="png", dpi=100, size=(10, 6),
+                 max_workers=None):
+        self.paths = [os.path.join(directory, f"{snapshot.name}.{file_format}")
+                      for snapshot in snapshots]
+        workers = max(1, min(len(snapshots), max_workers or os.cpu_count() or 1))
+        self._executor = ProcessPoolExecutor(max_workers=workers, mp_context=get_context())
+        self.futures = [self._executor.submit(render_snapshot, snapshot, path, dpi, size)
+                        for snapshot, path in zip(snapshots, self.paths)]
+        # Queued renders still run; the pool's processes exit once they are done
+        self._executor.shutdown(wait=False)
+
+    def progress(self):
+        """Return (finished, total)"""
+        return sum(future.done() for future in self.futures), len(self.futures)
+
+    def done(self):
+        return all(future.done() for future in self.futures)
+
+    def results(self):
+        """Return the saved paths and (path, error message) pairs for failures"""
+        saved, errors = [], []
+        for path, future in zip(self.paths, self.futures):
+            if future.cancelled():
+                continue
+            error = future.exception()
+            if error is None:
+                saved.append(path)
+            else:
+                errors.append((path, str(error)))
+        return saved, errors
+
+    def cancel(self):
+        """Drop renders that have not started yet"""
+        for future in self.futures:
+            future.cancel()
@@ -0,0 +1,360 @@
+from collections import namedtuple
+
+import numpy as np
+
+from calcvisualizer.core.cache import compile_expression, NUMPY_FUNCTIONS, sympy
+from calcvisualizer.core.diskcache import disk_cache, cache_key
+from calcvisualizer.core.symbolic import symbolic_store
+from calcvisualizer.core.calculator import (evaluate_function, evaluate_fused, cumulative_integral,
+                                            find_critical_points)
+from calcvisualizer.core.sampling import adaptive_sample
+from calcvisualizer.core import autodiff
+from calcvisualizer.core.streaming import stream_series
+from calcvisualizer.utils.tracing import span, traced
+
+# Uniform grids finer than this are evaluated in blocks and reduced to an envelope
+STREAMING_RESOLUTION = 100_000
+
+# Grids at least this fine are kept in the disk cache
+DISK_CACHE_RESOLUTION = 20_000
+
+# Everything that changes the computed values; equal settings give equal models
+PlotSettings = namedtuple('PlotSettings', ['x_min', 'x_max', 'resolution', 'adaptive',
+                                           'normalize', 'symbolic_integral', 'autodiff'])
+
+# One plottable curve. kind is 'f', "f'", "f''" or 'integral'; func re-samples
+# it for another x-range (None for numeric integrals) and y is already divided
+# by scale. expression is the symbolic form, or a description when there is none;
+# derivatives evaluated by automatic differentiation have None until their
+# symbolic form is known (see derivative_expression).
+Series = namedtuple('Series', ['kind', 'x', 'y', 'func', 'scale', 'expression'])
+
+class FunctionModel(namedtuple('FunctionModel', ['index', 'text', 'expression', 'series',
+                                                 'critical_points'])):
+    """All series of one input expression"""
+
+    __slots__ = ()
+
+    def get(self, kind):
+        """Return the series of the given kind, or None when it could not be computed"""
+        for series in self.series:
+            if series.kind == kind:
+                return series
+        return None
+
+# functions holds a FunctionModel per plotted expression; pending lists the
+# parsed expressions whose symbolic integral has not been computed yet
+PlotModel = namedtuple('PlotModel', ['settings', 'expressions', 'functions', 'pending'])
+
+def read_only(values):
+    """Return a read-only float array so a model cannot be changed by its views"""
+    values = np.asarray(values, dtype=float)
+    values.setflags(write=False)
+    return values
+
+def sample(func, settings):
+    """Sample a function on the uniform grid or adaptively, per the settings"""
+    if settings.adaptive:
+        return adaptive_sample(func, settings.x_min, settings.x_max, pixel_width=settings.resolution)
+    x_values = np.linspace(settings.x_min, settings.x_max, settings.resolution)
+    return x_values, evaluate_function(func, x_values)
+
+def clean_values(values, settings):
+    """Replace non-finite values for plotting"""
+    if settings.adaptive:
+        # Adaptive samples mark discontinuities with NaN gaps
+        return np.where(np.isfinite(values), values, np.nan)
+    return np.nan_to_num(values, nan=0.0, posinf=1e10, neginf=-1e10)
+
+def normalization_scale(values):
+    """Largest finite magnitude of the values, or 1 when there is none"""
+    finite = np.isfinite(values)
+    if not np.any(finite):
+        return 1.0
+    value_max = np.max(np.abs(values[finite]))
+    return value_max if value_max > 0 else 1.0
+
+def make_series(kind, x_values, values, func, expression, settings):
+    scale = normalization_scale(values) if settings.normalize else 1.0
+    return Series(kind, read_only(x_values), read_only(values / scale), func, scale, expression)
+
+def integral_series(parsed_expr, samples, settings):
+    """Symbolic integral when it is known, numeric cumulative integral otherwise"""
+    if settings.symbolic_integral and symbolic_store.has_integral(parsed_expr):
+        try:
+            integral_expr = symbolic_store.integral(parsed_expr)
+            integral_func = symbolic_store.integral_function(parsed_expr)
+            x_values, int_values = sample(integral_func, settings)
+            # Singularities become gaps in the curve
+            int_values = np.where(np.isfinite(int_values), int_values, np.nan)
+            return make_series('integral', x_values, int_values, integral_func, integral_expr, settings)
+        except Exception as e:
+            print(f"Symbolic integral unavailable for '{parsed_expr}', using numeric: {e}")
+
+    x_values, y_values = samples
+    int_values, error = cumulative_integral(x_values, y_values)
+    max_error = np.nanmax(error) if np.any(np.isfinite(error)) else 0.0
+    return make_series('integral', x_values, int_values, None, f"numeric ±{max_error:.1e}", settings)
+
+def uses_autodiff(parsed_expr, settings):
+    """Whether derivatives are evaluated by automatic differentiation for this expression"""
+    return settings.autodiff and autodiff.supports(parsed_expr)
+
+def derivative_function(parsed_expr, order, settings):
+    """Callable for the order-th derivative, without a symbolic derivative in AD mode"""
+    if uses_autodiff(parsed_expr, settings):
+        return autodiff.derivative_function(parsed_expr, order)
+    return symbolic_store.derivative_function(parsed_expr, order)
+
+def derivative_expression(parsed_expr, order, settings):
+    """Symbolic order-th derivative for labels
+
+    In AD mode only a derivative computed earlier is returned, None otherwise,
+    so building a model never waits for sympy.diff.
+    """
+    if uses_autodiff(parsed_expr, settings):
+        return symbolic_store.known_derivative(parsed_expr, order)
+    return symbolic_store.derivative(parsed_expr, order)
+
+def fused_kernel(parsed_expr, settings):
+    """One callable returning f, f' and f'' on a grid"""
+    if uses_autodiff(parsed_expr, settings):
+        return autodiff.jet_function(parsed_expr, 2)
+    return symbolic_store.fused_function(parsed_expr, 2, ["numpy", NUMPY_FUNCTIONS])
+
+def sample_series(parsed_expr, func, derivative_func, settings):
+    """Sample f, f' and f'' as (x, y) pairs; f'' is None when it cannot be computed
+
+    On the uniform grid one fused kernel evaluates all three in a single pass.
+    Adaptive sampling refines each curve on its own x values.
+    """
+    if not settings.adaptive:
+        x_values = np.linspace(settings.x_min, settings.x_max, settings.resolution)
+        try:
+            raw_y, raw_d, raw_d2 = evaluate_fused(fused_kernel(parsed_expr, settings), x_values)
+            return (x_values, raw_y), (x_values, raw_d), (x_values, raw_d2)
+        except Exception as e:
+            print(f"Fused evaluation failed for '{parsed_expr}', sampling separately: {e}")
+
+    samples = sample(func, settings)
+    derivative_samples = sample(derivative_func, settings)
+    try:
+        second_samples = sample(derivative_function(parsed_expr, 2, settings), settings)
+    except Exception as e:
+        print(f"Error calculating second derivative for '{parsed_expr}': {e}")
+        second_samples = None
+    return samples, derivative_samples, second_samples
+
+def build_streamed_function_model(index, text, parsed_expr, func, derivative_func, settings,
+                                  cancelled=None):
+    """Compute the series of one expression on a very fine grid in bounded memory
+
+    Each series is reduced to its min/max envelope, so the plotted lines keep
+    every extreme of the full grid. Returns None when cancelled.
+    """
+    kernel = fused_kernel(parsed_expr, settings)
+    kinds = ['f', "f'", "f''"]
+    clean = {kind: lambda values: clean_values(values, settings) for kind in kinds}
+    integral_func = None
+    integral_expr = None
+    if settings.symbolic_integral and symbolic_store.has_integral(parsed_expr):
+        try:
+            integral_expr = symbolic_store.integral(parsed_expr)
+            integral_func = symbolic_store.integral_function(parsed_expr)
+        except Exception as e:
+            print(f"Symbolic integral unavailable for '{parsed_expr}', using numeric: {e}")
+    if integral_func is not None:
+        fused = kernel
+        kernel = lambda x_values: list(fused(x_values)) + [integral_func(x_values)]
+        kinds.append('integral')
+        # Singularities become gaps in the curve
+        clean['integral'] = lambda values: np.where(np.isfinite(values), values, np.nan)
+
+    streamed = stream_series(settings.x_min, settings.x_max, settings.resolution, kernel, kinds,
+                             func, derivative_func, clean, numeric_integral=integral_func is None,
+                             cancelled=cancelled)
+    if streamed is None:
+        return None
+    lines, critical_points, max_error = streamed
+
+    funcs = {'f': func, "f'": derivative_func, "f''": derivative_function(parsed_expr, 2, settings),
+             'integral': integral_func}
+    expressions = {'f': parsed_expr, "f'": derivative_expression(parsed_expr, 1, settings),
+                   "f''": derivative_expression(parsed_expr, 2, settings),
+                   'integral': integral_expr if integral_func is not None
+                   else f"numeric ±{max_error:.1e}"}
+    series = tuple(make_series(kind, *lines[kind], funcs[kind], expressions[kind], settings)
+                   for kind in ['f', "f'", "f''", 'integral'])
+
+    critical_points['y'] /= series[0].scale
+    critical_points.setflags(write=False)
+    return FunctionModel(index, text, parsed_expr, series, critical_points)
+
+def integral_method(parsed_expr, settings):
+    """"symbolic" when the symbolic integral is known and wanted, "numeric" otherwise"""
+    if settings.symbolic_integral and symbolic_store.has_integral(parsed_expr):
+        try:
+            symbolic_store.integral(parsed_expr)
+            return "symbolic"
+        except Exception:
+            pass
+    return "numeric"
+
+def series_cache_key(parsed_expr, kind, settings, method):
+    """Disk cache key of one series; kind 'critical' stands for the critical points
+
+    method is how the values were computed: "symbolic" or "autodiff" for
+    derivatives, "symbolic" or "numeric" for the integral.
+    """
+    sampler = "adaptive" if settings.adaptive else "uniform"
+    return cache_key(sympy.srepr(parsed_expr), kind, float(settings.x_min), float(settings.x_max),
+                     settings.resolution, sampler, settings.normalize, method)
+
+def cache_meta(parsed_expr, kind, settings):
+    return {"kind": kind, "text": str(parsed_expr), "x_min": settings.x_min,
+            "x_max": settings.x_max, "resolution": settings.resolution,
+            "sampler": "adaptive" if settings.adaptive else "uniform"}
+
+@traced("disk cache store", "pipeline")
+def store_function_model(model, settings):
+    """Write the series and critical points of a function model to the disk cache"""
+    derivatives = "autodiff" if uses_autodiff(model.expression, settings) else "symbolic"
+    for series in model.series:
+        if series.kind == 'integral':
+            method = "numeric" if series.func is None else "symbolic"
+        else:
+            method = derivatives
+        meta = cache_meta(model.expression, series.kind, settings)
+        meta["scale"] = float(series.scale)
+        if series.expression is not None:
+            meta["expression"] = str(series.expression)
+        if series.kind == 'f':
+            # Loading needs every stored kind, so a missing f'' stays missing
+            meta["kinds"] = [item.kind for item in model.series]
+        disk_cache.store(series_cache_key(model.expression, series.kind, settings, method),
+                         {"x": series.x, "y": series.y}, meta, evict=False)
+    disk_cache.store(series_cache_key(model.expression, 'critical', settings, derivatives),
+                     {"points": model.critical_points},
+                     cache_meta(model.expression, 'critical', settings), evict=False)
+    # One scan of the cache for the whole model
+    disk_cache.evict()
+
+@traced("disk cache load", "pipeline")
+def load_function_model(index, text, parsed_expr, func, derivative_func, settings):
+    """Assemble a function model from the disk cache, or return None on a miss
+
+    The arrays stay memory-mapped, so they go to plotting without a copy.
+    """
+    derivatives = "autodiff" if uses_autodiff(parsed_expr, settings) else "symbolic"
+    integral = integral_method(parsed_expr, settings)
+    f_entry = disk_cache.load(series_cache_key(parsed_expr, 'f', settings, derivatives))
+    points = disk_cache.load(series_cache_key(parsed_expr, 'critical', settings, derivatives))
+    if f_entry is None or points is None:
+        return None
+
+    series = []
+    for kind in f_entry[1]["kinds"]:
+        if kind == 'f':
+            entry = f_entry
+        else:
+            method = integral if kind == 'integral' else derivatives
+            entry = disk_cache.load(series_cache_key(parsed_expr, kind, settings, method))
+            if entry is None:
+                return None
+        arrays, meta = entry
+        if kind == 'f':
+            kind_func, expression = func, parsed_expr
+        elif kind == 'integral' and integral == "numeric":
+            kind_func, expression = None, meta["expression"]
+        elif kind == 'integral':
+            kind_func = symbolic_store.integral_function(parsed_expr)
+            expression = symbolic_store.integral(parsed_expr)
+        else:
+            order = 1 if kind == "f'" else 2
+            kind_func = derivative_func if order == 1 else derivative_function(parsed_expr, 2, settings)
+            expression = derivative_expression(parsed_expr, order, settings)
+        series.append(Series(kind, arrays['x'], arrays['y'], kind_func, meta["scale"], expression))
+    return FunctionModel(index, text, parsed_expr, tuple(series), points[0]['points'])
+
+def build_function_model(index, text, settings, cancelled=None):
+    """Compute every series and the critical points of one expression
+
+    Fine grids are read from the disk cache when they were computed before,
+    and stored there otherwise.
+    """
+    parsed_expr, func = compile_expression(text, ["numpy", NUMPY_FUNCTIONS])
+    if settings.autodiff and not uses_autodiff(parsed_expr, settings):
+        print(f"Automatic differentiation unavailable for '{text}', using symbolic derivatives")
+    derivative_func = derivative_function(parsed_expr, 1, settings)
+    if not disk_cache.enabled or settings.resolution < DISK_CACHE_RESOLUTION:
+        return compute_function_model(index, text, parsed_expr, func, derivative_func, settings,
+                                      cancelled)
+
+    model = load_function_model(index, text, parsed_expr, func, derivative_func, settings)
+    if model is None:
+        model = compute_function_model(index, text, parsed_expr, func, derivative_func, settings,
+                                       cancelled)
+        if model is not None:
+            store_function_model(model, settings)
+    return model
+
+def compute_function_model(index, text, parsed_expr, func, derivative_func, settings,
+                           cancelled=None):
+    """Evaluate every series and find the critical points of one expression"""
+    if not settings.adaptive and settings.resolution > STREAMING_RESOLUTION:
+        return build_streamed_function_model(index, text, parsed_expr, func, derivative_func,
+                                             settings, cancelled)
+    (x_f, raw_y), (x_d, raw_d), second_samples = sample_series(parsed_expr, func, derivative_func,
+                                                               settings)
+
+    # Each series has its own x values when sampled adaptively
+    f_series = make_series('f', x_f, clean_values(raw_y, settings), func, parsed_expr, settings)
+    series = [f_series]
+    series.append(make_series("f'", x_d, clean_values(raw_d, settings), derivative_func,
+                              derivative_expression(parsed_expr, 1, settings), settings))
+
+    if second_samples is not None:
+        x_d2, raw_d2 = second_samples
+        series.append(make_series("f''", x_d2, clean_values(raw_d2, settings),
+                                  derivative_function(parsed_expr, 2, settings),
+                                  derivative_expression(parsed_expr, 2, settings), settings))
+
+    try:
+        series.append(integral_series(parsed_expr, (x_f, raw_y), settings))
+    except Exception as e:
+        print(f"Error calculating integral for '{text}': {e}")
+
+    # Critical points use the raw derivative samples, on the function's scale
+    critical_points = find_critical_points(func, x_d, raw_d, derivative_func)
+    critical_points['y'] /= f_series.scale
+    critical_points.setflags(write=False)
+    return FunctionModel(index, text, parsed_expr, tuple(series), critical_points)
+
+@traced(category="pipeline")
+def build_plot_model(expressions, settings, hidden=(), cancelled=None):
+    """Compute the PlotModel for a list of expression strings
+
+    Expressions whose index is in hidden are skipped, as are ones that fail
+    to parse or evaluate. ``cancelled`` is polled between expressions and
+    between the blocks of a streamed grid; once it returns True the build
+    stops and None is returned.
+    """
+    functions = []
+    pending = []
+    for index, text in enumerate(expressions):
+        if cancelled is not None and cancelled():
+            return None
+        if index in hidden:
+            continue
+        try:
+            with span("build_function_model", "pipeline", expression=text):
+                function = build_function_model(index, text, settings, cancelled)
+        except Exception as e:
+            print(f"Error computing '{text}': {e}")
+            continue
+        if function is None:
+            return None
+        functions.append(function)
+        if settings.symbolic_integral and not symbolic_store.has_integral(function.expression):
+            pending.append(function.expression)
+    return PlotModel(settings, tuple(expressions), tuple(functions), tuple(pending))
@@ -0,0 +1,92 @@
+import numpy as np
+
+from calcvisualizer.core.calculator import evaluate_function
+from calcvisualizer.utils.tracing import traced
+
+def uniform_sample(func, x_min, x_max, resolution):
+    """Evaluate a function on an evenly spaced grid"""
+    x_values = np.linspace(x_min, x_max, resolution)
+    return x_values, evaluate_function(func, x_values)
+
+@traced(category="calculator")
+def adaptive_sample(func, x_min, x_max, pixel_width=800, pixel_height=600, y_range=None,
+                    tolerance=0.5, initial_points=65, max_depth=12, min_width=0.25,
+                    max_points=20000):
+    """Sample a function with recursive refinement driven by on-screen error
+
+    Each round evaluates the midpoints of the candidate intervals in a single
+    vectorized call. An interval is split when its midpoint deviates from the
+    chord by more than ``tolerance`` pixels, or when it mixes finite and
+    non-finite values, until it is narrower than ``min_width`` pixels.
+    Intervals that still jump by more than the visible height at that point
+    are treated as discontinuities and broken with a NaN so poles are not
+    joined by vertical lines. Returns the compact, non-uniform (x, y) samples.
+    """
+    x = np.linspace(x_min, x_max, initial_points)
+    y = evaluate_function(func, x)
+    y[~np.isfinite(y)] = np.nan
+
+    # Pixel size in data units; without an explicit y-range use the robust
+    # spread of the initial samples so a pole does not flatten everything else
+    pixel_x = (x_max - x_min) / max(pixel_width, 1)
+    if y_range is None:
+        finite = y[np.isfinite(y)]
+        if len(finite):
+            low, high = np.percentile(finite, [2, 98])
+            y_span = high - low
+        else:
+            y_span = 0.0
+    else:
+        y_span = y_range[1] - y_range[0]
+    if not y_span > 0:
+        y_span = 1.0
+    pixel_y = y_span / max(pixel_height, 1)
+
+    candidates = np.arange(len(x) - 1)
+    failing = []
+    for _ in range(max_depth):
+        if len(candidates) == 0:
+            break
+        left, right = x[candidates], x[candidates + 1]
+        mid = 0.5 * (left + right)
+        y_mid = evaluate_function(func, mid)
+        y_mid[~np.isfinite(y_mid)] = np.nan
+
+        y_left, y_right = y[candidates], y[candidates + 1]
+        with np.errstate(invalid='ignore'):
+            error = np.abs(y_mid - 0.5 * (y_left + y_right)) / pixel_y
+        finite = np.isfinite([y_left, y_mid, y_right])
+        mixed = finite.any(axis=0) & ~finite.all(axis=0)
+        split = (error > tolerance) | mixed
+
+        # Intervals at the width floor are settled; remember the ones still failing
+        wide = (right - left) > 2 * min_width * pixel_x
+        failing.append(left[split & ~wide])
+        split &= wide
+        if not np.any(split):
+            break
+        if len(x) + np.count_nonzero(split) > max_points:
+            failing.append(left[split])
+            break
+
+        # Insert the accepted midpoints and queue both halves for the next round
+        split_index = candidates[split]
+        x = np.insert(x, split_index + 1, mid[split])
+        y = np.insert(y, split_index + 1, y_mid[split])
+        shifted = split_index + np.arange(len(split_index))
+        candidates = np.sort(np.concatenate([shifted, shifted + 1]))
+    else:
+        failing.append(x[candidates])
+
+    # Break the line across jumps taller than the visible range; settled
+    # intervals are never split again so their left edge identifies them
+    if failing:
+        failing = np.searchsorted(x, np.concatenate(failing))
+        with np.errstate(invalid='ignore'):
+            jump = np.abs(y[failing + 1] - y[failing]) > y_span
+        breaks = np.unique(failing[jump])
+        if len(breaks):
+            x = np.insert(x, breaks + 1, 0.5 * (x[breaks] + x[breaks + 1]))
+            y = np.insert(y, breaks + 1, np.nan)
+
+    return x, y
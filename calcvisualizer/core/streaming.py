@@ -0,0 +1,177 @@
+"""Chunked evaluation of very fine uniform grids with bounded memory
+
+The grid is never built in full. Blocks of it flow through a generator
+pipeline (evaluate, integrate, find critical points), and reducers keep only
+what is plotted: a min/max envelope per bin. Peak memory depends on the
+chunk size and the number of bins, not on the resolution.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from calcvisualizer.core.calculator import cumulative_integral, find_critical_points
+from calcvisualizer.utils.tracing import traced
+
+# Grid points per block
+STREAM_CHUNK = 1 << 16
+
+# Envelope columns; more than any screen is wide
+ENVELOPE_BINS = 4096
+
+# One block of the grid: start is the index of x[0] in the full grid, values
+# maps series kinds to their samples and critical_points holds the points
+# found in the block
+Chunk = namedtuple('Chunk', ['start', 'x', 'values', 'critical_points'])
+
+def grid_chunks(x_min, x_max, resolution, chunk=STREAM_CHUNK):
+    """Yield the blocks of np.linspace(x_min, x_max, resolution) without building it"""
+    step = (x_max - x_min) / (resolution - 1) if resolution > 1 else 0.0
+    for start in range(0, resolution, chunk):
+        stop = min(start + chunk, resolution)
+        x_values = x_min + np.arange(start, stop) * step
+        if stop == resolution:
+            x_values[-1] = x_max
+        yield Chunk(start, x_values, {}, None)
+
+def evaluate_chunks(chunks, kernel, kinds):
+    """Evaluate a kernel returning one value per kind, such as a fused f/f'/f'' kernel"""
+    for chunk in chunks:
+        with np.errstate(all='ignore'):
+            results = kernel(chunk.x)
+        values = dict(chunk.values)
+        for kind, result in zip(kinds, results):
+            values[kind] = np.array(np.broadcast_to(result, chunk.x.shape), dtype=float)
+        yield chunk._replace(values=values)
+
+def integrate_chunks(chunks, kind='f', errors=None):
+    """Add the cumulative integral of a series, carrying the running total across blocks
+
+    Each block is integrated together with the last two samples of the
+    previous one, so the quadratic panels span the boundary. Like
+    cumulative_integral, the total restarts at zero after a non-finite
+    sample. The largest error estimate is appended to errors.
+    """
+    previous_x = previous_y = np.empty(0)
+    offset = error_offset = 0.0
+    max_error = 0.0
+    for chunk in chunks:
+        x_values = np.concatenate([previous_x, chunk.x])
+        y_values = np.concatenate([previous_y, chunk.values[kind]])
+        values, error = cumulative_integral(x_values, y_values)
+
+        # Shift the segment through the previous block's last sample onto its running total
+        carried = len(previous_x) - 1
+        if carried >= 0 and np.isfinite(values[carried]):
+            breaks = np.flatnonzero(~np.isfinite(values[carried:]))
+            end = carried + breaks[0] if len(breaks) else len(values)
+            values[carried:end] += offset - values[carried]
+            error[carried:end] += error_offset - error[carried]
+        values, error = values[len(previous_x):], error[len(previous_x):]
+
+        if np.any(np.isfinite(error)):
+            max_error = max(max_error, np.nanmax(error))
+        previous_x, previous_y = x_values[-2:], y_values[-2:]
+        finite_end = len(values) and np.isfinite(values[-1])
+        offset = values[-1] if finite_end else 0.0
+        error_offset = error[-1] if finite_end else 0.0
+
+        out = dict(chunk.values)
+        out['integral'] = values
+        yield chunk._replace(values=out)
+    if errors is not None:
+        errors.append(max_error)
+
+def critical_point_chunks(chunks, func, derivative_func, kind="f'"):
+    """Find the critical points of each block, including sign changes across block boundaries
+
+    The last usable (finite, non-zero) derivative sample of a block and the
+    zeros after it are carried into the next one, so a bracket split by the
+    boundary is still found exactly once. The usable sample before it comes
+    along when the two are neighbours of the same sign, so a dip of the
+    derivative at the boundary sample is found too.
+    """
+    tail_x = tail_d = np.empty(0)
+    for chunk in chunks:
+        x_values = np.concatenate([tail_x, chunk.x])
+        d_values = np.concatenate([tail_d, chunk.values[kind]])
+        points = find_critical_points(func, x_values, d_values, derivative_func)
+
+        usable = np.flatnonzero(np.isfinite(d_values) & (d_values != 0))
+        tail = np.arange(usable[-1], len(d_values)) if len(usable) else np.empty(0, dtype=int)
+        if not np.all(np.isfinite(d_values[tail])):
+            # A pole after the last usable sample; no bracket can start there
+            tail = tail[:0]
+        elif len(tail) > 3:
+            # Only the ends of a run of zeros matter to find_critical_points
+            tail = tail[[0, 1, -1]]
+        if (len(tail) and len(usable) > 1 and usable[-2] == usable[-1] - 1
+                and np.sign(d_values[usable[-2]]) == np.sign(d_values[usable[-1]])):
+            tail = np.concatenate([[usable[-2]], tail])
+        tail_x, tail_d = x_values[tail], d_values[tail]
+        yield chunk._replace(critical_points=points)
+
+class Envelope:
+    """Minimum and maximum of a series over equal-width bins of the grid"""
+
+    def __init__(self, resolution, bins=ENVELOPE_BINS):
+        self.resolution = resolution
+        self.bins = min(bins, resolution)
+        self.low = np.full(self.bins, np.nan)
+        self.high = np.full(self.bins, np.nan)
+
+    def update(self, start, values):
+        index = (np.arange(start, start + len(values)) * self.bins) // self.resolution
+        # Bin indices only grow, so each block covers consecutive bins
+        starts = np.concatenate([[0], np.flatnonzero(np.diff(index)) + 1])
+        bins = index[starts]
+        with np.errstate(all='ignore'):
+            self.low[bins] = np.fmin(self.low[bins], np.fmin.reduceat(values, starts))
+            self.high[bins] = np.fmax(self.high[bins], np.fmax.reduceat(values, starts))
+
+    def line(self, x_min, x_max):
+        """Return (x, y) tracing the low and high value of every bin in turn"""
+        edges = np.linspace(x_min, x_max, self.bins + 1)
+        x_values = np.repeat(0.5 * (edges[:-1] + edges[1:]), 2)
+        y_values = np.column_stack([self.low, self.high]).ravel()
+        return x_values, y_values
+
+@traced(category="calculator")
+def stream_series(x_min, x_max, resolution, kernel, kinds, func, derivative_func,
+                  clean=None, numeric_integral=True, bins=ENVELOPE_BINS, chunk=STREAM_CHUNK,
+                  cancelled=None):
+    """Evaluate every series of one function over a fine grid, block by block
+
+    Returns a dict of kind to the (x, y) envelope line, the critical points
+    and the largest integral error estimate (None without a numeric
+    integral). ``clean`` maps kinds to a function applied to each block of
+    that series before it is reduced. ``cancelled`` is polled between
+    blocks; once it returns True None is returned.
+    """
+    clean = clean or {}
+    chunks = evaluate_chunks(grid_chunks(x_min, x_max, resolution, chunk), kernel, kinds)
+    errors = []
+    if numeric_integral:
+        chunks = integrate_chunks(chunks, errors=errors)
+    if derivative_func is not None:
+        chunks = critical_point_chunks(chunks, func, derivative_func)
+
+    envelopes = {}
+    critical_points = []
+    for block in chunks:
+        if cancelled is not None and cancelled():
+            return None
+        for kind, values in block.values.items():
+            if kind not in envelopes:
+                envelopes[kind] = Envelope(resolution, bins)
+            if kind in clean:
+                values = clean[kind](values)
+            envelopes[kind].update(block.start, values)
+        if block.critical_points is not None and len(block.critical_points):
+            critical_points.append(block.critical_points)
+
+    lines = {kind: envelope.line(x_min, x_max) for kind, envelope in envelopes.items()}
+    if critical_points:
+        critical_points = np.concatenate(critical_points)
+    else:
+        critical_points = find_critical_points(func, np.empty(0), np.empty(0))
+    return lines, critical_points, errors[0] if errors else None
@@ -0,0 +1,190 @@
+from collections import OrderedDict
+import threading
+
+from calcvisualizer.core.cache import modules_key, sympy
+from calcvisualizer.core.symbolicdb import symbolic_database
+from calcvisualizer.utils.tracing import span
+
+class SymbolicStore:
+    """Memoized derivatives, integrals and compiled callables per expression
+
+    Derivatives and integrals are also looked up in, and saved to, an
+    optional persistent database, so they are computed once across sessions.
+    """
+
+    def __init__(self, maxsize=128, database=None):
+        self.maxsize = maxsize
+        self.database = database
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+
+    def _entry(self, expression):
+        with self._lock:
+            entry = self._entries.get(expression)
+            if entry is None:
+                entry = {"derivatives": {0: expression}, "integral": None, "callables": {}}
+                self._entries[expression] = entry
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+            else:
+                self._entries.move_to_end(expression)
+            return entry
+
+    def derivative(self, expression, order=1):
+        """Return the order-th derivative, building it from the highest known lower order
+
+        SymPy runs outside the lock, so other threads are never held up by an
+        unrelated differentiation; the result is published under it.
+        """
+        x = sympy.symbols('x')
+        entry = self._entry(expression)
+        while True:
+            with self._lock:
+                derivatives = entry["derivatives"]
+                if order in derivatives:
+                    return derivatives[order]
+                known = max(k for k in derivatives if k < order)
+                current, previous = known + 1, derivatives[known]
+            result = self._load("derivative", expression, current)
+            if result is None:
+                with span("diff", "sympy", expression=expression, order=current):
+                    result = sympy.diff(previous, x)
+                self._save("derivative", expression, result, current)
+            with self._lock:
+                # Another thread may have published this order meanwhile
+                derivatives.setdefault(current, result)
+
+    def known_derivative(self, expression, order=1):
+        """Return the order-th derivative if it was computed before, here or in an earlier session
+
+        Never differentiates; returns None when the derivative is unknown.
+        """
+        entry = self._entry(expression)
+        with self._lock:
+            result = entry["derivatives"].get(order)
+        if result is not None:
+            return result
+        result = self._load("derivative", expression, order)
+        if result is not None:
+            with self._lock:
+                entry["derivatives"].setdefault(order, result)
+        return result
+
+    def set_derivative(self, expression, order, derivative_expr):
+        """Record a derivative computed elsewhere"""
+        entry = self._entry(expression)
+        with self._lock:
+            entry["derivatives"].setdefault(order, derivative_expr)
+        self._save("derivative", expression, derivative_expr, order)
+
+    def integral(self, expression):
+        """Return the indefinite integral, computing it at most once"""
+        entry = self._entry(expression)
+        with self._lock:
+            result = entry["integral"]
+        if result is None:
+            stored = self._load("integral", expression)
+            if stored is not None:
+                result = ("ok", stored)
+            else:
+                try:
+                    with span("integrate", "sympy", expression=expression):
+                        result = ("ok", sympy.integrate(expression, sympy.symbols('x')))
+                    self._save("integral", expression, result[1])
+                except Exception as e:
+                    result = ("error", e)
+            with self._lock:
+                entry["integral"] = result
+        if result[0] == "error":
+            raise result[1]
+        return result[1]
+
+    def set_integral(self, expression, integral_expr):
+        """Record an integral computed elsewhere"""
+        entry = self._entry(expression)
+        with self._lock:
+            entry["integral"] = ("ok", integral_expr)
+        self._save("integral", expression, integral_expr)
+
+    def set_integral_error(self, expression, error):
+        """Record that the integral could not be computed"""
+        entry = self._entry(expression)
+        with self._lock:
+            entry["integral"] = ("error", ValueError(error))
+
+    def has_integral(self, expression):
+        """Check whether the integral has already been attempted, in this or an earlier session"""
+        with self._lock:
+            entry = self._entries.get(expression)
+            if entry is not None and entry["integral"] is not None:
+                return True
+        stored = self._load("integral", expression)
+        if stored is None:
+            return False
+        entry = self._entry(expression)
+        with self._lock:
+            entry["integral"] = ("ok", stored)
+        return True
+
+    def _load(self, kind, expression, order=0):
+        if self.database is None:
+            return None
+        return self.database.get(kind, expression, order)
+
+    def _save(self, kind, expression, result, order=0):
+        if self.database is not None:
+            self.database.put(kind, expression, result, order)
+
+    def derivative_function(self, expression, order=1, modules="numpy"):
+        """Return the cached numpy callable for the order-th derivative"""
+        key = ("derivative", order, modules_key(modules))
+        entry = self._entry(expression)
+        with self._lock:
+            func = entry["callables"].get(key)
+        if func is None:
+            derivative = self.derivative(expression, order)
+            with span("lambdify", "sympy", expression=derivative):
+                func = sympy.lambdify(sympy.symbols('x'), derivative, modules)
+            with self._lock:
+                entry["callables"][key] = func
+        return func
+
+    def integral_function(self, expression, modules="numpy"):
+        """Return the cached numpy callable for the indefinite integral"""
+        key = ("integral", 0, modules_key(modules))
+        entry = self._entry(expression)
+        with self._lock:
+            func = entry["callables"].get(key)
+        if func is None:
+            integral = self.integral(expression)
+            with span("lambdify", "sympy", expression=integral):
+                func = sympy.lambdify(sympy.symbols('x'), integral, modules)
+            with self._lock:
+                entry["callables"][key] = func
+        return func
+
+    def fused_function(self, expression, order=2, modules="numpy"):
+        """Return one cached callable evaluating the expression and its first order derivatives
+
+        Common subexpressions are eliminated across all of them, so a term
+        such as exp(x**2) is computed once per point. The callable returns a
+        list of order + 1 values; see calculator.evaluate_fused.
+        """
+        key = ("fused", order, modules_key(modules))
+        entry = self._entry(expression)
+        with self._lock:
+            func = entry["callables"].get(key)
+        if func is None:
+            series = [self.derivative(expression, k) for k in range(order + 1)]
+            with span("lambdify", "sympy", expression=expression, fused=order):
+                func = sympy.lambdify(sympy.symbols('x'), series, modules, cse=True)
+            with self._lock:
+                entry["callables"][key] = func
+        return func
+
+    def clear(self):
+        """Forget every result held in memory; the database is left as it is"""
+        with self._lock:
+            self._entries.clear()
+
+symbolic_store = SymbolicStore(database=symbolic_database)
@@ -0,0 +1,112 @@
+"""SQLite store of symbolic results, so derivatives and integrals survive restarts
+
+Rows are keyed on the operation, the srepr of the expression, the
+derivative order and the SymPy version, and hold the pickled result.
+Pickles are exact for every SymPy object, including ones srepr cannot
+rebuild such as NonElementaryIntegral.
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from calcvisualizer.utils.helpers import lazy_import, user_cache_dir
+
+sympy = lazy_import("sympy")
+
+DATABASE_FILE = "symbolic.sqlite3"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    kind TEXT NOT NULL,
+    expression TEXT NOT NULL,
+    parameter INTEGER NOT NULL,
+    sympy_version TEXT NOT NULL,
+    result BLOB NOT NULL,
+    created REAL NOT NULL,
+    PRIMARY KEY (kind, expression, parameter, sympy_version)
+)
+"""
+
+class SymbolicDatabase:
+    """Persistent (kind, expression, parameter) -> SymPy result mapping"""
+
+    def __init__(self, path=None):
+        self._path = path
+        # CALCVISUALIZER_DISK_CACHE=0 turns the persistent caches off
+        self.enabled = os.environ.get("CALCVISUALIZER_DISK_CACHE", "1") != "0"
+        self._connection = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def path(self):
+        return self._path or os.path.join(user_cache_dir(), DATABASE_FILE)
+
+    def _connect(self):
+        """Open the database on first use, and again in a forked process"""
+        if self._connection is not None and self._pid == os.getpid():
+            return self._connection
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        # Shared by the GUI and model threads; the lock serializes its use
+        connection = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(SCHEMA)
+        connection.commit()
+        self._connection, self._pid = connection, os.getpid()
+        return connection
+
+    def _run(self, query, parameters=()):
+        """Run a query and return its rows, or None when the database is unusable"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            try:
+                connection = self._connect()
+                with connection:
+                    return connection.execute(query, parameters).fetchall()
+            except (OSError, sqlite3.Error) as e:
+                print(f"Symbolic cache unavailable, continuing without it: {e}")
+                self.enabled = False
+                return None
+
+    def key(self, kind, expression, parameter=0):
+        return (kind, sympy.srepr(expression), int(parameter), sympy.__version__)
+
+    def get(self, kind, expression, parameter=0):
+        """Return the stored result, or None when there is none"""
+        rows = self._run("SELECT result FROM results WHERE kind = ? AND expression = ? "
+                         "AND parameter = ? AND sympy_version = ?",
+                         self.key(kind, expression, parameter))
+        if not rows:
+            return None
+        try:
+            return pickle.loads(rows[0][0])
+        except Exception as e:
+            print(f"Ignoring unreadable cached {kind} of '{expression}': {e}")
+            return None
+
+    def put(self, kind, expression, result, parameter=0):
+        """Store a result, replacing any earlier one"""
+        try:
+            payload = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            print(f"Cannot cache {kind} of '{expression}': {e}")
+            return
+        self._run("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)",
+                  self.key(kind, expression, parameter) + (payload, time.time()))
+
+    def count(self):
+        """Number of stored results, by kind"""
+        if not os.path.exists(self.path):
+            return {}
+        rows = self._run("SELECT kind, COUNT(*) FROM results GROUP BY kind")
+        return dict(rows or [])
+
+    def clear(self):
+        """Delete every stored result"""
+        if os.path.exists(self.path):
+            self._run("DELETE FROM results")
+
+symbolic_database = SymbolicDatabase()
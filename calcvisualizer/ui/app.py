@@ -1,24 +1,52 @@
 import sys
 import os
-import numpy as np
 from datetime import datetime
-from sympy import symbols, sympify, diff, integrate, sin, cos, tan, exp, log, sqrt, pi
-from sympy.utilities.lambdify import lambdify
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
                            QGroupBox, QLabel, QLineEdit, QPushButton, QGridLayout, QSlider, 
                            QSpinBox, QComboBox, QCheckBox, QSplitter, QScrollArea, QFrame,
-                           QTabWidget, QFileDialog, QMessageBox, QDoubleSpinBox, QSizePolicy,)
-from PyQt6.QtCore import Qt
+                           QTabWidget, QFileDialog, QMessageBox, QDoubleSpinBox, QSizePolicy,
+                           QProgressDialog,)
+from PyQt6.QtCore import Qt, QTimer
 from PyQt6.QtGui import QIcon
-from matplotlib.figure import Figure
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg
-from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT
-from calcvisualizer.ui.canvas import MplCanvas
+from calcvisualizer.core.symbolic import symbolic_store
+from calcvisualizer.core.pipeline import PlotSettings, build_plot_model, STREAMING_RESOLUTION
+from calcvisualizer.core.export import EXPORT_FORMATS, snapshot_axes
+from calcvisualizer.core.background import DEFAULT_TIMEOUT
+from calcvisualizer.ui.workers import SymbolicWorker, ModelWorker, ExportWorker
+from calcvisualizer.utils import tracing
+from calcvisualizer.utils.tracing import span, traced
 from assets.assets import WINDOW_ICON
 
+# Colors for different functions
+PLOT_COLORS = ['#3a86ff', '#ff3a5e', '#38b000', '#fcbf49', '#9d4edd',
+               '#f72585', '#4cc9f0', '#fb8500', '#0077b6', '#7209b7']
+
+# Legend labels per series kind, filled with the expression
+SERIES_LABELS = {'f': "f(x) = {}", "f'": "f'(x) = {}", "f''": "f''(x) = {}",
+                 'integral': "∫f(x)dx = {} + C"}
+
+# Stand-ins for a derivative whose symbolic form is still being computed
+PENDING_DERIVATIVE_LABELS = {"f'": "d/dx({})", "f''": "d²/dx²({})"}
+
+# Resolution slider stops: 100 to 700 per decade, from 100 to 100 million points
+RESOLUTION_STEPS = [m * 10 ** e for e in range(7) for m in (100, 150, 200, 300, 400, 500, 700)
+                    if m * 10 ** e <= 10 ** 8]
+
+# Series shown by each "Plot ..." button
+PLOT_TYPE_KINDS = {"functions": 'f', "derivatives": "f'", "integrals": 'integral'}
+
 class GraphingApp(QMainWindow):
+    # Pause in typing before a live replot starts
+    LIVE_DEBOUNCE_MS = 300
+    
     def __init__(self):
         super().__init__()
+        # Matplotlib loads with the first window rather than with this module
+        from calcvisualizer.ui.canvas import MplCanvas, RenderScheduler
+        from calcvisualizer.ui.pool import CanvasPool
+        
+        # Visible canvases are drawn first, hidden ones when they are shown
+        self.render_scheduler = RenderScheduler(self)
         
         # Set application style
         self.setStyleSheet("""
@@ -152,6 +180,11 @@ class GraphingApp(QMainWindow):
         function_layout.addWidget(self.function_label)
         function_layout.addWidget(self.function_input)
         
+        # Live mode replots while typing, computing in the background
+        self.live_plot = QCheckBox("Live Plot (update while typing)")
+        self.live_plot.setChecked(False)
+        function_layout.addWidget(self.live_plot)
+        
         # X Range settings
         range_layout = QVBoxLayout()
         self.x_min_label = QLabel("X Min:")
@@ -252,9 +285,10 @@ class GraphingApp(QMainWindow):
         resolution_layout = QHBoxLayout()
         self.resolution_label = QLabel("Resolution:")
         self.resolution_slider = QSlider(Qt.Orientation.Horizontal)
-        self.resolution_slider.setRange(100, 1000)
-        self.resolution_slider.setValue(400)
-        self.resolution_slider.setTickInterval(100)
+        self.resolution_slider.setRange(0, len(RESOLUTION_STEPS) - 1)
+        self.resolution_slider.setValue(RESOLUTION_STEPS.index(400))
+        # One tick per decade
+        self.resolution_slider.setTickInterval(7)
         self.resolution_slider.setTickPosition(QSlider.TickPosition.TicksBelow)
         self.resolution_value = QLabel("400 points")
 
@@ -333,6 +367,9 @@ class GraphingApp(QMainWindow):
         self.auto_scale_y = QCheckBox("Auto Y Scale")
         self.auto_scale_y.setChecked(True)
         self.auto_scale_y.stateChanged.connect(self.toggle_y_scale_controls)
+        self.show_critical_points = QCheckBox("Show Critical Points")
+        self.show_critical_points.setChecked(True)
+        self.show_critical_points.toggled.connect(self.toggle_critical_points)
 
         # Add checkboxes to layout (2 columns)
         checkbox_layout.addWidget(self.show_function, 0, 0)
@@ -343,6 +380,7 @@ class GraphingApp(QMainWindow):
         checkbox_layout.addWidget(self.legend, 2, 1)
         checkbox_layout.addWidget(self.normalize, 3, 0)
         checkbox_layout.addWidget(self.auto_scale_y, 3, 1)
+        checkbox_layout.addWidget(self.show_critical_points, 4, 0)
 
         # Dropdown section at the bottom
         dropdown_layout = QGridLayout()
@@ -351,16 +389,48 @@ class GraphingApp(QMainWindow):
         self.y_scale_combo = QComboBox()
         self.y_scale_combo.addItems(["Linear", "Logarithmic", "Symmetric Log"])
 
+        # Sampling options
+        self.sampling_label = QLabel("Sampling:")
+        self.sampling_combo = QComboBox()
+        self.sampling_combo.addItems(["Uniform", "Adaptive"])
+
         # Theme options
         self.theme_label = QLabel("Graph Theme:")
         self.theme_combo = QComboBox()
         self.theme_combo.addItems(["Default", "Dark", "Seaborn", "Science", "High Contrast"])
 
+        # Integration method: symbolic with numeric fallback, or numeric only
+        self.integral_method_label = QLabel("Integration:")
+        self.integral_method_combo = QComboBox()
+        self.integral_method_combo.addItems(["Symbolic", "Numeric"])
+
+        # Derivatives from symbolic expressions, or by automatic differentiation
+        self.derivative_mode_label = QLabel("Derivatives:")
+        self.derivative_mode_combo = QComboBox()
+        self.derivative_mode_combo.addItems(["Symbolic", "Automatic"])
+
+        # Time budget for symbolic integration running in the background
+        self.integral_budget_label = QLabel("Integral Budget:")
+        self.integral_budget_input = QDoubleSpinBox()
+        self.integral_budget_input.setRange(0.5, 300)
+        self.integral_budget_input.setValue(DEFAULT_TIMEOUT)
+        self.integral_budget_input.setSingleStep(0.5)
+        self.integral_budget_input.setDecimals(1)
+        self.integral_budget_input.setSuffix(" s")
+
         # Add dropdowns to layout
         dropdown_layout.addWidget(self.y_scale_label, 0, 0)
         dropdown_layout.addWidget(self.y_scale_combo, 0, 1)
         dropdown_layout.addWidget(self.theme_label, 1, 0)
         dropdown_layout.addWidget(self.theme_combo, 1, 1)
+        dropdown_layout.addWidget(self.sampling_label, 2, 0)
+        dropdown_layout.addWidget(self.sampling_combo, 2, 1)
+        dropdown_layout.addWidget(self.derivative_mode_label, 3, 0)
+        dropdown_layout.addWidget(self.derivative_mode_combo, 3, 1)
+        dropdown_layout.addWidget(self.integral_method_label, 4, 0)
+        dropdown_layout.addWidget(self.integral_method_combo, 4, 1)
+        dropdown_layout.addWidget(self.integral_budget_label, 5, 0)
+        dropdown_layout.addWidget(self.integral_budget_input, 5, 1)
 
         # Add layouts to main visualization layout
         viz_layout.addLayout(checkbox_layout)
@@ -464,6 +534,7 @@ class GraphingApp(QMainWindow):
 
         # Will dynamically create/populate these in plot_all_graphs
         self.function_canvases = []
+        self.function_pool = CanvasPool(width=14, height=5)
         self.entire_top_scrollarea = QScrollArea()
         self.entire_top_scrollarea.setWidgetResizable(True)
         self.entire_top_scrollarea.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOn)
@@ -556,6 +627,11 @@ class GraphingApp(QMainWindow):
         self.individual_graphs_layout.setSpacing(10)
         individual_layout.addWidget(self.individual_graphs_container)
 
+        # Canvases and toolbars are recycled across replots
+        self.individual_pool = CanvasPool(width=8, height=6,
+                                          toolbar_factory=self.create_navigation_toolbar)
+        self.individual_layout_expressions = None
+        
         # Create initial empty graph
         self.create_empty_individual_graph()
         
@@ -604,6 +680,41 @@ class GraphingApp(QMainWindow):
         # Initialize visibility and function list
         self.function_visibility = {}
         
+        # Symbolic integration runs in worker processes; finished integrals
+        # trigger a refill of the last plot request
+        self.symbolic_worker = SymbolicWorker(self, timeout=self.integral_budget_input.value())
+        self.symbolic_worker.finished.connect(self.on_symbolic_finished)
+        self.integral_budget_input.valueChanged.connect(self.set_integral_budget)
+        self.last_plot_request = None
+        self.plot_model = None
+        self.plot_model_key = None
+        
+        # Live plotting: input changes are debounced and the model is built on
+        # a worker thread; only the newest request is rendered
+        self.model_worker = ModelWorker(self)
+        self.model_worker.finished.connect(self.on_model_ready)
+        self.render_scheduler.drained.connect(self.on_render_drained)
+        self.live_timer = QTimer(self)
+        self.live_timer.setSingleShot(True)
+        self.live_timer.setInterval(self.LIVE_DEBOUNCE_MS)
+        self.live_timer.timeout.connect(self.request_live_plot)
+        self.live_plot.toggled.connect(self.schedule_live_plot)
+        self.function_input.textChanged.connect(self.schedule_live_plot)
+        self.x_min_input.valueChanged.connect(self.schedule_live_plot)
+        self.x_max_input.valueChanged.connect(self.schedule_live_plot)
+        self.resolution_slider.valueChanged.connect(self.schedule_live_plot)
+        
+        # Figure export renders in worker processes and reports progress
+        self.export_worker = ExportWorker(self)
+        self.export_worker.progress.connect(self.on_export_progress)
+        self.export_worker.finished.connect(self.on_export_finished)
+        self.export_progress = None
+        self.export_dir = None
+        self.refill_timer = QTimer(self)
+        self.refill_timer.setSingleShot(True)
+        self.refill_timer.setInterval(100)
+        self.refill_timer.timeout.connect(self.refill_last_plot)
+        
         # Initialize with empty plots and show empty graph in Entire View
         self.initialize_plots()
         self.create_dynamic_canvases([], force_empty=True)  
@@ -627,9 +738,70 @@ class GraphingApp(QMainWindow):
         self.y_min_input.setEnabled(not checked)
         self.y_max_input.setEnabled(not checked)
     
+    def toggle_critical_points(self, checked):
+        """Show or hide critical points on the overlay without replotting"""
+        canvases = [self.combined_canvas, self.analysis_canvas,
+                    self.combined_small_canvas, self.analysis_small_canvas,
+                    self.canvas1, self.canvas2, self.canvas3] + self.function_canvases
+        for canvas in canvases:
+            if canvas:
+                canvas.set_overlay_visible(checked)
+    
+    def closeEvent(self, event):
+        """Stop background workers before the window closes"""
+        self.symbolic_worker.cancel_all()
+        self.model_worker.shutdown()
+        super().closeEvent(event)
+    
+    def set_integral_budget(self, value):
+        """Update the time budget for background symbolic integration"""
+        self.symbolic_worker.timeout = value
+    
+    def on_symbolic_finished(self, kind, expression, order, result, error):
+        """Store a background result and schedule a refill of the current plot"""
+        if kind == "derivative":
+            if result is None:
+                print(f"Error calculating derivative of '{expression}': {error}")
+                return
+            symbolic_store.set_derivative(expression, order, result)
+            # Only labels change, so the cached model is redrawn as it is
+            self.refill_timer.start()
+            return
+        if kind != "integral":
+            return
+        if result is None:
+            print(f"Error calculating integral for '{expression}': {error}")
+            symbolic_store.set_integral_error(expression, error)
+        else:
+            symbolic_store.set_integral(expression, result)
+        # The cached model still holds the numeric stand-in
+        self.plot_model = None
+        self.refill_timer.start()
+    
+    def refill_last_plot(self):
+        """Redraw the last plot request so newly arrived integrals and derivative labels are shown"""
+        if self.last_plot_request is None:
+            return
+        plot_type, text = self.last_plot_request
+        # A newer request with different input will plot on its own
+        if text != self.function_input.text():
+            return
+        if self.live_plot.isChecked():
+            self.request_live_plot()
+        elif plot_type == "all":
+            if (self.show_integral.isChecked() or self.show_derivative.isChecked()
+                    or self.show_second_derivative.isChecked()):
+                self.plot_all_graphs()
+        elif plot_type in ("integrals", "derivatives"):
+            self.plot_specific(plot_type)
+    
+    def resolution(self):
+        """Number of grid points selected on the resolution slider"""
+        return RESOLUTION_STEPS[self.resolution_slider.value()]
+    
     def update_resolution_label(self, value):
         """Update the resolution label when slider value changes"""
-        self.resolution_value.setText(f"{value} points")
+        self.resolution_value.setText(f"{RESOLUTION_STEPS[value]:,} points")
         # Don't trigger plot updates automatically
     
     def initialize_plots(self):
@@ -640,15 +812,21 @@ class GraphingApp(QMainWindow):
 
         for canvas in canvases:
             if canvas:  # Check if canvas exists
-                canvas.axes.clear()
+                canvas.reset()
                 canvas.axes.grid(True, linestyle='--', alpha=0.7)
                 canvas.axes.set_xlabel('x')
                 canvas.axes.set_ylabel('y')
                 canvas.axes.autoscale(enable=True, axis='y')  # Enable dynamic Y-axis scaling
-                canvas.draw()
+        self.render_scheduler.schedule(canvases)
     
     def add_navigation_toolbar(self, canvas):
         """Add a navigation toolbar for zooming and panning to a canvas."""
+        canvas_layout = canvas.parent().layout()
+        canvas_layout.addWidget(self.create_navigation_toolbar(canvas))
+    
+    def create_navigation_toolbar(self, canvas):
+        """Create a styled navigation toolbar for a canvas"""
+        from matplotlib.backends.backend_qtagg import NavigationToolbar2QT
         toolbar = NavigationToolbar2QT(canvas, self)
         toolbar.setStyleSheet("""
             QToolBar {
@@ -665,13 +843,19 @@ class GraphingApp(QMainWindow):
                 background-color: #4a94ff;
             }
         """)
-        canvas_layout = canvas.parent().layout()
-        canvas_layout.addWidget(toolbar)
+        return toolbar
     
     def create_dynamic_canvases(self, expressions, force_empty=False):
         """Create canvases dynamically based on the number of functions"""
-        # Clear any existing content
+        # The same functions keep their frames, canvases and plotted lines
+        if (not force_empty and expressions and self.function_canvases
+                and list(expressions) == self.function_canvas_expressions):
+            return
+
+        # Clear any existing content, keeping the canvases for reuse
         self.function_canvases = []
+        self.function_canvas_expressions = [] if force_empty else list(expressions)
+        self.function_pool.release_all()
         
         # Clear layout
         while self.entire_top_scrolllayout.count():
@@ -714,6 +898,7 @@ class GraphingApp(QMainWindow):
         
         # Update function visibility checkboxes
         self.update_function_visibility_checkboxes(expressions)
+        self.function_pool.trim()
 
         # Force layout update
         self.entire_top_scrollcontent.adjustSize()
@@ -734,19 +919,19 @@ class GraphingApp(QMainWindow):
         canvas_frame_layout = QVBoxLayout(canvas_frame)
         canvas_frame_layout.setContentsMargins(0, 0, 0, 0)
 
-        # Create empty canvas
-        canvas = MplCanvas(width=14, height=5, dpi=100)
+        # Take an empty canvas from the pool
+        canvas, _ = self.function_pool.acquire()
         canvas.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
 
         # Set up empty graph with axes
-        canvas.axes.clear()
         canvas.axes.grid(self.grid_lines.isChecked(), linestyle='--', alpha=0.7)
         canvas.axes.set_xlabel('x')
         canvas.axes.set_ylabel('y')
         self.apply_plot_theme(canvas.axes)
-        canvas.draw()
+        self.render_scheduler.schedule([canvas])
 
         canvas_frame_layout.addWidget(canvas)
+        canvas.show()
         self.function_canvases.append(canvas)
 
         # Add canvas frame to container
@@ -796,18 +981,20 @@ class GraphingApp(QMainWindow):
         canvas_frame_layout = QVBoxLayout(canvas_frame)
         canvas_frame_layout.setContentsMargins(0, 0, 0, 0)
 
-        # Create canvas with responsive size
-        canvas = MplCanvas(width=14, height=5, dpi=100)
+        # Take a canvas from the pool, it resizes with its frame; the one that
+        # showed this expression before comes back with its plot
+        canvas, _ = self.function_pool.acquire(expr)
         canvas.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
         
         # Set up empty graph with axes
-        canvas.axes.clear()
-        canvas.axes.grid(self.grid_lines.isChecked(), linestyle='--', alpha=0.7)
-        canvas.axes.set_xlabel('x')
-        canvas.axes.set_ylabel('y')
-        self.apply_plot_theme(canvas.axes)
+        if canvas.decoration is None:
+            canvas.axes.grid(self.grid_lines.isChecked(), linestyle='--', alpha=0.7)
+            canvas.axes.set_xlabel('x')
+            canvas.axes.set_ylabel('y')
+            self.apply_plot_theme(canvas.axes)
 
         canvas_frame_layout.addWidget(canvas)
+        canvas.show()
         self.function_canvases.append(canvas)
 
         # Add canvas frame to container
@@ -868,26 +1055,45 @@ class GraphingApp(QMainWindow):
                 self.function_visibility[i] = True
                 layout.insertWidget(i, function_checkbox)
     
-    def parse_function(self, expression):
-        """Parse function expression using sympy"""
-        x = symbols('x')
-        math_functions = {"sin": sin, "cos": cos, "exp": exp, "log": log, 
-                         "tan": tan, "sqrt": sqrt, "pi": pi}
-        
-        try:
-            parsed_expr = sympify(expression.strip(), locals=math_functions)
-
-            numpy_functions = {
-                "sin": np.sin, "cos": np.cos, "exp": np.exp, "log": np.log,
-                "tan": lambda x: np.sin(x) / np.cos(x),  
-                "sqrt": lambda x: np.sqrt(np.maximum(x, 0)),  
-                "pi": np.pi
-            }
-
-            return parsed_expr, lambdify(x, parsed_expr, modules=["numpy", numpy_functions])
-        except Exception as e:
-            print(f"Error parsing expression '{expression}': {e}")
-            return None, None
+    def prepare_canvas(self, canvas):
+        """Begin a replot, redoing grid, scale and theme only when those options changed"""
+        decoration = (self.theme_combo.currentText(), self.grid_lines.isChecked(),
+                      self.y_scale_combo.currentText())
+        canvas.overlay_visible = self.show_critical_points.isChecked()
+        if canvas.begin_update(decoration):
+            canvas.axes.grid(self.grid_lines.isChecked(), linestyle='--', alpha=0.7)
+            self.set_y_scale(canvas.axes)
+            self.apply_plot_theme(canvas.axes)
+            canvas.axes.set_xlabel('x')
+            canvas.axes.set_ylabel('y')
+    
+    def finish_canvas(self, canvas):
+        """Remove stale series, rescale and update the legend"""
+        canvas.end_update(self.legend.isChecked())
+        # Apply axis limits if auto-scale is disabled
+        self.apply_axis_limits(canvas.axes)
+    
+    def plot_series(self, canvas, key, x_values, y_values, func=None, scale=1.0, **style):
+        """Update the series for key in place and let it re-sample from func on pan and zoom"""
+        # Reused lines keep old properties unless every call spells them out
+        style.setdefault('linestyle', '-')
+        style.setdefault('marker', 'None')
+        style.setdefault('label', '_nolegend_')
+        line = canvas.update_series(key, x_values, y_values, **style)
+        if func is not None:
+            canvas.register_series(line, func, scale, self.sampling_combo.currentText() == "Adaptive")
+        else:
+            canvas.live_series.pop(line, None)
+        return line
+    
+    def plot_critical_points(self, canvas, all_critical_points):
+        """Plot critical point markers with their coordinates"""
+        annotations = []
+        for expr, points, color, index in all_critical_points:
+            self.plot_series(canvas, (expr, "critical", index), points['x'], points['y'],
+                             overlay=True, color=color, linestyle='None', marker='o', markersize=6)
+            annotations.extend((f"({x:.2f}, {y:.2f})", (x, y)) for x, y in zip(points['x'], points['y']))
+        canvas.set_annotations(annotations)
     
     def set_y_scale(self, ax):
         """Set the y-scale for an axis based on user selection"""
@@ -910,448 +1116,223 @@ class GraphingApp(QMainWindow):
             y_max = self.y_max_input.value()
             ax.set_ylim(y_min, y_max)
     
-    def plot_all_graphs(self):
-        """Plot all graphs: individual functions, combined view, and analysis"""
-        expressions = [expr.strip() for expr in self.function_input.text().split(",") if expr.strip()]
-        
-        # Create x range from user inputs
-        x_min = self.x_min_input.value()
-        x_max = self.x_max_input.value()
-        resolution = self.resolution_slider.value()
-        x_range = np.linspace(x_min, x_max, resolution)
-        x = symbols('x')  # Define symbolic x variable
-        
-        # Update individual tab layout first to create canvases
-        self.update_individual_tab_layout(expressions)
-        
-        # Create dynamic canvases for the Entire View tab
-        self.create_dynamic_canvases(expressions)
-        
-        # Clear all canvases and apply theme
-        canvases = [self.combined_canvas, self.analysis_canvas, 
+    def plot_settings(self):
+        """Collect the options that affect computed values"""
+        return PlotSettings(self.x_min_input.value(), self.x_max_input.value(),
+                            self.resolution(),
+                            self.sampling_combo.currentText() == "Adaptive",
+                            self.normalize.isChecked(),
+                            self.integral_method_combo.currentText() == "Symbolic",
+                            self.derivative_mode_combo.currentText() == "Automatic")
+    
+    def current_expressions(self):
+        return [expr.strip() for expr in self.function_input.text().split(",") if expr.strip()]
+    
+    def model_key(self, expressions):
+        """Everything a plot model depends on: expressions, settings and hidden functions"""
+        hidden = frozenset(i for i, visible in self.function_visibility.items() if not visible)
+        return (tuple(expressions), self.plot_settings(), hidden)
+    
+    def get_plot_model(self, expressions):
+        """Return the plot model for the expressions, computing it only when inputs changed"""
+        key = self.model_key(expressions)
+        if self.plot_model is None or self.plot_model_key != key:
+            self.plot_model = build_plot_model(*key)
+            self.plot_model_key = key
+        
+        # Symbolic integrals are filled in when the worker delivers them; the
+        # numeric engine covers the meantime
+        for parsed_expr in self.plot_model.pending:
+            self.symbolic_worker.submit("integral", parsed_expr)
+        requested = set()
+        if key[1].symbolic_integral:
+            requested.update(("integral", function.expression) for function in self.plot_model.functions)
+        # Derivatives evaluated by automatic differentiation get their symbolic
+        # form for the legend the same way
+        for function in self.plot_model.functions:
+            for order, kind in enumerate(["f'", "f''"], 1):
+                series = function.get(kind)
+                if series is not None and series.expression is None:
+                    self.symbolic_worker.submit("derivative", function.expression, order)
+                    requested.add(("derivative", function.expression))
+        self.symbolic_worker.cancel_except(requested)
+        return self.plot_model
+    
+    def plot_model_series(self, canvas, function, kind, key_kind=None, label=None, **style):
+        """Plot one series of a function model, if it could be computed"""
+        series = function.get(kind)
+        if series is None:
+            return
+        if label is None:
+            label = SERIES_LABELS[kind].format(self.series_expression(function, series))
+        self.plot_series(canvas, (function.text, key_kind or kind, function.index),
+                         series.x, series.y, series.func, series.scale,
+                         color=PLOT_COLORS[function.index % len(PLOT_COLORS)], label=label, **style)
+    
+    def series_expression(self, function, series):
+        """Text for the legend of a series, with a placeholder while a derivative is pending"""
+        if series.kind == 'f':
+            return function.text
+        if series.expression is not None:
+            return series.expression
+        derivative = symbolic_store.known_derivative(function.expression,
+                                                     1 if series.kind == "f'" else 2)
+        if derivative is not None:
+            return derivative
+        return PENDING_DERIVATIVE_LABELS[series.kind].format(function.text)
+    
+    @traced(category="ui")
+    def render_model(self, model, plot_type):
+        """Plot a model on every view; plot_type is "all" or one of PLOT_TYPE_KINDS"""
+        # Start updating every canvas; existing lines are reused in place
+        canvases = [self.combined_canvas, self.analysis_canvas,
                     self.combined_small_canvas, self.analysis_small_canvas,
-                    self.canvas1, self.canvas2, self.canvas3]
-
+                    self.canvas1, self.canvas2, self.canvas3] + self.function_canvases
+        canvases = [canvas for canvas in canvases if canvas]
         for canvas in canvases:
-            if canvas:  # Check if canvas exists
-                canvas.axes.clear()
-                canvas.axes.grid(self.grid_lines.isChecked(), linestyle='--', alpha=0.7)
-                canvas.axes.autoscale(enable=True, axis='y')  # Enable dynamic Y-axis scaling
-                self.set_y_scale(canvas.axes)
-                self.apply_plot_theme(canvas.axes)
-        
-        # Clear the function canvases and apply theme
-        for canvas in self.function_canvases:
-            canvas.axes.clear()
-            canvas.axes.grid(self.grid_lines.isChecked(), linestyle='--', alpha=0.7)
-            self.set_y_scale(canvas.axes)
-            self.apply_plot_theme(canvas.axes)  # Apply theme to each canvas
-        
-        # Colors for different functions
-        colors = ['#3a86ff', '#ff3a5e', '#38b000', '#fcbf49', '#9d4edd', 
-                 '#f72585', '#4cc9f0', '#fb8500', '#0077b6', '#7209b7']
-        
-        # For displaying group plots in Entire View
-        all_functions_data = []
-        all_derivatives_data = []
-        all_integrals_data = []
-        all_critical_points = []
-        
-        # Update function visibility from checkboxes
-        for checkbox in self.function_visibility_checkboxes:
-            index = checkbox.property("function_index")
-            self.function_visibility[index] = checkbox.isChecked()
-        
-        # Plot individual functions
-        for i, expr in enumerate(expressions):
-            # Skip if function is hidden
-            if i in self.function_visibility and not self.function_visibility[i]:
-                continue
-                
-            parsed_expr, func = self.parse_function(expr)
-            
-            if parsed_expr is None or func is None:
-                continue
-                
-            try:
-                # Calculate function, derivative, and integral
-                y_values = func(x_range)
-                
-                # Handle NaN or inf values for proper plotting
-                y_values = np.nan_to_num(y_values, nan=0.0, posinf=1e10, neginf=-1e10)
-                
-                # Normalize values if selected
-                if self.normalize.isChecked():
-                    # Avoid division by zero
-                    y_max = max(abs(np.max(y_values)), abs(np.min(y_values)))
-                    if y_max > 0:
-                        y_values = y_values / y_max
-                
-                # Calculate derivative
-                derivative_expr = diff(parsed_expr, x)
-                derivative_func = lambdify(x, derivative_expr, 'numpy')
-                d_values = derivative_func(x_range)
-                d_values = np.nan_to_num(d_values, nan=0.0, posinf=1e10, neginf=-1e10)
-                
-                if self.normalize.isChecked():
-                    d_max = max(abs(np.max(d_values)), abs(np.min(d_values)))
-                    if d_max > 0:
-                        d_values = d_values / d_max
-                
-                # Second derivative if selected
+            self.prepare_canvas(canvas)
+        
+        individual_canvases = [self.canvas1, self.canvas2, self.canvas3]
+        for function in model.functions:
+            i = function.index
+            # The individual tab canvas and the function-specific canvas in Entire View
+            targets = [individual_canvases[i] if i < len(individual_canvases) else None,
+                       self.function_canvases[i] if i < len(self.function_canvases) else None]
+            for canvas in targets:
+                if canvas is None:
+                    continue
+                if plot_type != "all":
+                    self.plot_model_series(canvas, function, PLOT_TYPE_KINDS[plot_type], linewidth=2)
+                    continue
+                if self.show_function.isChecked():
+                    self.plot_model_series(canvas, function, 'f', linewidth=2)
+                if self.show_derivative.isChecked():
+                    self.plot_model_series(canvas, function, "f'", linewidth=1.5, linestyle='--')
                 if self.show_second_derivative.isChecked():
-                    second_derivative_expr = diff(derivative_expr, x)
-                    second_derivative_func = lambdify(x, second_derivative_expr, 'numpy')
-                    try:
-                        d2_values = second_derivative_func(x_range)
-                        # Handle scalar output by converting to array
-                        if not isinstance(d2_values, np.ndarray):
-                            d2_values = np.full_like(x_range, d2_values)
-                        d2_values = np.nan_to_num(d2_values, nan=0.0, posinf=1e10, neginf=-1e10)
-                        
-                        if self.normalize.isChecked():
-                            d2_max = max(abs(np.max(d2_values)), abs(np.min(d2_values)))
-                            if d2_max > 0:
-                                d2_values = d2_values / d2_max
-                    except Exception as e:
-                        print(f"Error calculating second derivative for '{expr}': {e}")
-                        d2_values = None
-                
-                # Calculate integral
-                try:
-                    integral_expr = integrate(parsed_expr, x)
-                    integral_func = lambdify(x, integral_expr, 'numpy')
-                    int_values = integral_func(x_range)
-                    
-                    # Handle special cases for functions like tan(x)
-                    if 'log' in str(integral_expr):
-                        # Add a small epsilon to avoid log(0)
-                        int_values = np.where(np.isfinite(int_values), int_values, np.nan)
-                        # Interpolate NaN values
-                        mask = np.isnan(int_values)
-                        int_values[mask] = np.interp(x_range[mask], x_range[~mask], int_values[~mask])
-                    
-                    int_values = np.nan_to_num(int_values, nan=0.0, posinf=1e10, neginf=-1e10)
-                    
-                    if self.normalize.isChecked():
-                        int_max = max(abs(np.max(int_values)), abs(np.min(int_values)))
-                        if int_max > 0:
-                            int_values = int_values / int_max
-                            
-                except Exception as e:
-                    print(f"Error calculating integral for '{expr}': {e}")
-                    int_values = None
-                    integral_expr = "undefined"
-                
-                # Store data for entire view
-                all_functions_data.append((expr, x_range, y_values, colors[i % len(colors)]))
-                all_derivatives_data.append((expr, derivative_expr, x_range, d_values, colors[i % len(colors)]))
-                all_integrals_data.append((expr, integral_expr, x_range, int_values, colors[i % len(colors)]))
+                    self.plot_model_series(canvas, function, "f''", linewidth=1, linestyle='-.')
+                if self.show_integral.isChecked():
+                    self.plot_model_series(canvas, function, 'integral', linewidth=1.5, linestyle=':')
                 
-                # Find critical points (where derivative = 0)
-                critical_points = []
-                for j in range(1, len(x_range) - 1):
-                    if (d_values[j-1] * d_values[j+1] <= 0) or abs(d_values[j]) < 1e-6:
-                        critical_points.append((x_range[j], y_values[j]))
-                
-                all_critical_points.extend([(expr, cp[0], cp[1], colors[i % len(colors)]) for cp in critical_points])
-                
-                # Plot on individual canvases
-                canvas = None
-                if i == 0:
-                    canvas = self.canvas1
-                elif i == 1:
-                    canvas = self.canvas2
-                elif i == 2:
-                    canvas = self.canvas3
-                
-                # Also plot on the function-specific canvas in Entire View
-                func_canvas = self.function_canvases[i] if i < len(self.function_canvases) else None
-                
-                for current_canvas in [canvas, func_canvas]:
-                    if current_canvas is not None:
-                        if self.show_function.isChecked():
-                            current_canvas.axes.plot(x_range, y_values, color=colors[i % len(colors)], 
-                                                   linewidth=2, label=f"f(x) = {expr}")
-                        
-                        if self.show_derivative.isChecked():
-                            current_canvas.axes.plot(x_range, d_values, color=colors[i % len(colors)], 
-                                                   linewidth=1.5, linestyle='--', 
-                                                   label=f"f'(x) = {derivative_expr}")
-                        
-                        if self.show_second_derivative.isChecked() and d2_values is not None:
-                            current_canvas.axes.plot(x_range, d2_values, color=colors[i % len(colors)], 
-                                                   linewidth=1, linestyle='-.', 
-                                                   label=f"f''(x) = {second_derivative_expr}")
-                        
-                        if self.show_integral.isChecked() and int_values is not None:
-                            current_canvas.axes.plot(x_range, int_values, color=colors[i % len(colors)], 
-                                                   linewidth=1.5, linestyle=':', 
-                                                   label=f"∫f(x)dx = {integral_expr} + C")
-                        
-                        # Plot critical points
-                        for cp in critical_points:
-                            current_canvas.axes.plot(cp[0], cp[1], 'o', color=colors[i % len(colors)], 
-                                                  markersize=6)
-                        
-                        current_canvas.axes.set_xlabel('x')
-                        current_canvas.axes.set_ylabel('y')
-                        
-                        if self.legend.isChecked():
-                            current_canvas.axes.legend(loc='upper left', fontsize='small')
-                        
-                        # Apply axis limits if auto-scale is disabled
-                        self.apply_axis_limits(current_canvas.axes)
-                        
-                        # Draw the plots
-                        current_canvas.draw()
-            
-            except Exception as e:
-                print(f"Error plotting function '{expr}': {e}")
+                # Plot critical points as a single marker series
+                points = function.critical_points
+                self.plot_series(canvas, (function.text, "critical", i), points['x'], points['y'],
+                                 overlay=True, color=PLOT_COLORS[i % len(PLOT_COLORS)],
+                                 linestyle='None', marker='o', markersize=6)
         
         # Plot combined view on both big and small canvases
-        for current_canvas in [self.combined_canvas, self.combined_small_canvas]:
-            for data in all_functions_data:
-                if self.show_function.isChecked():
-                    current_canvas.axes.plot(data[1], data[2], color=data[3], linewidth=2, 
-                                          label=f"f(x) = {data[0]}")
-            
-            # Set axis limits for combined view
-            current_canvas.axes.set_xlabel('x')
-            current_canvas.axes.set_ylabel('y')
-            
-            if self.legend.isChecked():
-                current_canvas.axes.legend(loc='upper left', fontsize='small')
-            
-            # Apply theme settings
-            self.apply_plot_theme(current_canvas.axes)
-            
-            # Apply axis limits if auto-scale is disabled
-            self.apply_axis_limits(current_canvas.axes)
-            
-            # Draw the plots
-            current_canvas.draw()
+        for canvas in [self.combined_canvas, self.combined_small_canvas]:
+            for function in model.functions:
+                if plot_type != "all":
+                    self.plot_model_series(canvas, function, PLOT_TYPE_KINDS[plot_type], linewidth=2)
+                elif self.show_function.isChecked():
+                    self.plot_model_series(canvas, function, 'f', linewidth=2)
         
         # Plot analysis view on both big and small canvases
-        for current_canvas in [self.analysis_canvas, self.analysis_small_canvas]:
-            # Plot derivatives
-            if self.show_derivative.isChecked():
-                for data in all_derivatives_data:
-                    current_canvas.axes.plot(data[2], data[3], color=data[4], linewidth=1.5, 
-                                          linestyle='--', label=f"d/dx({data[0]})")
-            
-            # Plot critical points
-            for point in all_critical_points:
-                current_canvas.axes.plot(point[1], point[2], 'o', color=point[3], markersize=6)
-                current_canvas.axes.annotate(f"({point[1]:.2f}, {point[2]:.2f})", 
-                                          (point[1], point[2]), 
-                                          textcoords="offset points", 
-                                          xytext=(0,10), 
-                                          ha='center')
-            
-            current_canvas.axes.set_xlabel('x')
-            current_canvas.axes.set_ylabel('y')
+        all_critical_points = [(function.text, function.critical_points,
+                                PLOT_COLORS[function.index % len(PLOT_COLORS)], function.index)
+                               for function in model.functions]
+        for canvas in [self.analysis_canvas, self.analysis_small_canvas]:
+            if plot_type not in ("all", "derivatives"):
+                canvas.set_annotations([])
+                continue
+            if plot_type == "derivatives" or self.show_derivative.isChecked():
+                for function in model.functions:
+                    self.plot_model_series(canvas, function, "f'", key_kind="d/dx",
+                                           label=f"d/dx({function.text})",
+                                           linewidth=1.5, linestyle='--')
+            self.plot_critical_points(canvas, all_critical_points)
+        
+        # Finish every canvas: drop stale series, rescale and update legends,
+        # then draw the visible ones first
+        for canvas in canvases:
+            self.finish_canvas(canvas)
+        self.render_scheduler.schedule(canvases)
+    
+    def schedule_live_plot(self, *args):
+        """Restart the debounce timer when an input changes in live mode"""
+        if self.live_plot.isChecked():
+            self.live_timer.start()
+    
+    def request_live_plot(self):
+        """Build the model for the current inputs in the background"""
+        expressions = self.current_expressions()
+        key = self.model_key(expressions)
+        if self.plot_model is not None and self.plot_model_key == key:
+            self.on_model_ready(key, self.plot_model)
+            return
+        self.model_worker.submit(key, *key)
+    
+    def model_ready(self, expressions):
+        """True when the model can be used now; streamed resolutions build in the background"""
+        key = self.model_key(expressions)
+        if self.plot_model is not None and self.plot_model_key == key:
+            return True
+        if key[1].adaptive or key[1].resolution <= STREAMING_RESOLUTION:
+            # Built right here, so a background build for older inputs is moot
+            self.model_worker.cancel_all()
+            return True
+        self.model_worker.submit(key, *key)
+        return False
+    
+    def on_model_ready(self, key, model):
+        """Render a finished background model unless the inputs changed meanwhile"""
+        if key != self.model_key(self.current_expressions()):
+            return
+        self.plot_model = model
+        self.plot_model_key = key
+        plot_type = self.last_plot_request[0] if self.last_plot_request else "all"
+        # The render finishes the request that started the build
+        with tracing.continue_request():
+            if plot_type == "all":
+                self.plot_all_graphs()
+            else:
+                self.plot_specific(plot_type)
+    
+    def plot_all_graphs(self):
+        """Plot all graphs: individual functions, combined view, and analysis"""
+        tracing.begin_request("all")
+        with span("plot_all_graphs", "ui"):
+            expressions = self.current_expressions()
+            self.last_plot_request = ("all", self.function_input.text())
+            if not self.model_ready(expressions):
+                return
             
-            if self.legend.isChecked():
-                current_canvas.axes.legend(loc='upper left', fontsize='small')
+            # Update individual tab layout first to create canvases
+            self.update_individual_tab_layout(expressions)
             
-            # Apply theme settings
-            self.apply_plot_theme(current_canvas.axes)
+            # Create dynamic canvases for the Entire View tab
+            self.create_dynamic_canvases(expressions)
             
-            # Apply axis limits if auto-scale is disabled
-            self.apply_axis_limits(current_canvas.axes)
+            # Update function visibility from checkboxes
+            for checkbox in self.function_visibility_checkboxes:
+                index = checkbox.property("function_index")
+                self.function_visibility[index] = checkbox.isChecked()
             
-            # Draw the plots
-            current_canvas.draw()
-    
+            self.render_model(self.get_plot_model(expressions), "all")
+
     def plot_specific(self, plot_type):
         """Plot specific graph types (functions, derivatives, or integrals)"""
-        expressions = [expr.strip() for expr in self.function_input.text().split(",") if expr.strip()]
-        
-        # Create x range from user inputs
-        x_min = self.x_min_input.value()
-        x_max = self.x_max_input.value()
-        resolution = self.resolution_slider.value()
-        x_range = np.linspace(x_min, x_max, resolution)
-        x = symbols('x')  # Define symbolic x variable
-        
-        # Update individual tab layout first to create canvases
-        self.update_individual_tab_layout(expressions)
-        
-        # Create dynamic canvases for the Entire View tab
-        self.create_dynamic_canvases(expressions)
-        
-        # Clear all canvases and apply theme
-        canvases = [self.combined_canvas, self.analysis_canvas, 
-                    self.combined_small_canvas, self.analysis_small_canvas,
-                    self.canvas1, self.canvas2, self.canvas3]
-
-        for canvas in canvases:
-            if canvas:  # Check if canvas exists
-                canvas.axes.clear()
-                canvas.axes.grid(self.grid_lines.isChecked(), linestyle='--', alpha=0.7)
-                self.set_y_scale(canvas.axes)
-                self.apply_plot_theme(canvas.axes)
-
-        # Colors for different functions
-        colors = ['#3a86ff', '#ff3a5e', '#38b000', '#fcbf49', '#9d4edd', 
-                 '#f72585', '#4cc9f0', '#fb8500', '#0077b6', '#7209b7']
-        
-        # Store data for combined and analysis views
-        all_functions_data = []
-        all_derivatives_data = []
-        all_integrals_data = []
-        all_critical_points = []
-        
-        # Plot selected graph type
-        for i, expr in enumerate(expressions):
-            # Skip if function is hidden
-            if i in self.function_visibility and not self.function_visibility[i]:
-                continue
-                
-            parsed_expr, func = self.parse_function(expr)
+        tracing.begin_request(plot_type)
+        with span("plot_specific", "ui", plot_type=plot_type):
+            expressions = self.current_expressions()
+            self.last_plot_request = (plot_type, self.function_input.text())
+            if not self.model_ready(expressions):
+                return
             
-            if parsed_expr is None or func is None:
-                continue
-                
-            try:
-                # Get the individual canvas and the dynamic canvas
-                canvas = None
-                if i == 0:
-                    canvas = self.canvas1
-                elif i == 1:
-                    canvas = self.canvas2
-                elif i == 2:
-                    canvas = self.canvas3
-                
-                dynamic_canvas = self.function_canvases[i] if i < len(self.function_canvases) else None
-                
-                if canvas is None:
-                    continue
-                
-                # Calculate values based on plot type
-                if plot_type == "functions":
-                    y_values = func(x_range)
-                    y_values = np.nan_to_num(y_values, nan=0.0, posinf=1e10, neginf=-1e10)
-                    if self.normalize.isChecked():
-                        y_max = max(abs(np.max(y_values)), abs(np.min(y_values)))
-                        if y_max > 0:
-                            y_values = y_values / y_max
-                    all_functions_data.append((expr, x_range, y_values, colors[i % len(colors)]))
-                
-                elif plot_type == "derivatives":
-                    derivative_expr = diff(parsed_expr, x)
-                    derivative_func = lambdify(x, derivative_expr, 'numpy')
-                    d_values = derivative_func(x_range)
-                    d_values = np.nan_to_num(d_values, nan=0.0, posinf=1e10, neginf=-1e10)
-                    if self.normalize.isChecked():
-                        d_max = max(abs(np.max(d_values)), abs(np.min(d_values)))
-                        if d_max > 0:
-                            d_values = d_values / d_max
-                    all_derivatives_data.append((expr, derivative_expr, x_range, d_values, colors[i % len(colors)]))
-                    
-                    # Find critical points
-                    critical_points = []
-                    for j in range(1, len(x_range) - 1):
-                        if (d_values[j-1] * d_values[j+1] <= 0) or abs(d_values[j]) < 1e-6:
-                            y_val = func(x_range[j])
-                            critical_points.append((x_range[j], y_val))
-                    all_critical_points.extend([(expr, cp[0], cp[1], colors[i % len(colors)]) for cp in critical_points])
-                
-                elif plot_type == "integrals":
-                    integral_expr = integrate(parsed_expr, x)
-                    integral_func = lambdify(x, integral_expr, 'numpy')
-                    int_values = integral_func(x_range)
-                    
-                    # Handle special cases for functions like tan(x)
-                    if 'log' in str(integral_expr):
-                        # Add a small epsilon to avoid log(0)
-                        int_values = np.where(np.isfinite(int_values), int_values, np.nan)
-                        # Interpolate NaN values
-                        mask = np.isnan(int_values)
-                        int_values[mask] = np.interp(x_range[mask], x_range[~mask], int_values[~mask])
-                    
-                    int_values = np.nan_to_num(int_values, nan=0.0, posinf=1e10, neginf=-1e10)
-                    
-                    if self.normalize.isChecked():
-                        int_max = max(abs(np.max(int_values)), abs(np.min(int_values)))
-                        if int_max > 0:
-                            int_values = int_values / int_max
-                    all_integrals_data.append((expr, integral_expr, x_range, int_values, colors[i % len(colors)]))
-                
-                # Plot on individual and dynamic canvases
-                for current_canvas in [canvas, dynamic_canvas]:
-                    if current_canvas is None:
-                        continue
-                        
-                    if plot_type == "functions":
-                        current_canvas.axes.plot(x_range, y_values, color=colors[i % len(colors)], 
-                                              linewidth=2, label=f"f(x) = {expr}")
-                    elif plot_type == "derivatives":
-                        current_canvas.axes.plot(x_range, d_values, color=colors[i % len(colors)], 
-                                              linewidth=2, label=f"f'(x) = {derivative_expr}")
-                    elif plot_type == "integrals":
-                        current_canvas.axes.plot(x_range, int_values, color=colors[i % len(colors)], 
-                                              linewidth=2, label=f"∫f(x)dx = {integral_expr} + C")
-                    
-                    current_canvas.axes.set_xlabel('x')
-                    current_canvas.axes.set_ylabel('y')
-                    if self.legend.isChecked():
-                        current_canvas.axes.legend(loc='upper left', fontsize='small')
-                    self.apply_axis_limits(current_canvas.axes)
-                    current_canvas.draw()
-            
-            except Exception as e:
-                print(f"Error plotting {plot_type} for function '{expr}': {e}")
-        
-        # Update Combined View (both big and small)
-        for current_canvas in [self.combined_canvas, self.combined_small_canvas]:
-            if plot_type == "functions":
-                for data in all_functions_data:
-                    current_canvas.axes.plot(data[1], data[2], color=data[3], 
-                                          linewidth=2, label=f"f(x) = {data[0]}")
-            elif plot_type == "derivatives":
-                for data in all_derivatives_data:
-                    current_canvas.axes.plot(data[2], data[3], color=data[4], 
-                                          linewidth=2, label=f"f'(x) = {data[1]}")
-            elif plot_type == "integrals":
-                for data in all_integrals_data:
-                    current_canvas.axes.plot(data[2], data[3], color=data[4], 
-                                          linewidth=2, label=f"∫f(x)dx = {data[1]} + C")
+            # Update individual tab layout first to create canvases
+            self.update_individual_tab_layout(expressions)
             
-            current_canvas.axes.set_xlabel('x')
-            current_canvas.axes.set_ylabel('y')
-            if self.legend.isChecked():
-                current_canvas.axes.legend(loc='upper left', fontsize='small')
-            self.apply_plot_theme(current_canvas.axes)
-            self.apply_axis_limits(current_canvas.axes)
-            current_canvas.draw()
-        
-        # Update Analysis View (both big and small)
-        for current_canvas in [self.analysis_canvas, self.analysis_small_canvas]:
-            if plot_type == "derivatives":
-                # Plot derivatives and critical points in analysis view
-                for data in all_derivatives_data:
-                    current_canvas.axes.plot(data[2], data[3], color=data[4], 
-                                          linewidth=1.5, linestyle='--', 
-                                          label=f"d/dx({data[0]})")
-                
-                # Plot critical points
-                for point in all_critical_points:
-                    current_canvas.axes.plot(point[1], point[2], 'o', color=point[3], markersize=6)
-                    current_canvas.axes.annotate(f"({point[1]:.2f}, {point[2]:.2f})", 
-                                              (point[1], point[2]), 
-                                              textcoords="offset points", 
-                                              xytext=(0,10), 
-                                              ha='center')
+            # Create dynamic canvases for the Entire View tab
+            self.create_dynamic_canvases(expressions)
             
-            current_canvas.axes.set_xlabel('x')
-            current_canvas.axes.set_ylabel('y')
-            if self.legend.isChecked():
-                current_canvas.axes.legend(loc='upper left', fontsize='small')
-            self.apply_plot_theme(current_canvas.axes)
-            self.apply_axis_limits(current_canvas.axes)
-            current_canvas.draw()
+            # Every plot type renders from the same model, so switching costs no computation
+            self.render_model(self.get_plot_model(expressions), plot_type)
+    
+    def on_render_drained(self):
+        """Report the traced plot request once its visible canvases are drawn"""
+        # A build still running belongs to the request and renders later
+        if not self.model_worker.is_busy():
+            tracing.end_request()
     
     def apply_plot_theme(self, ax):
         """Apply the selected theme to a matplotlib axis"""
@@ -1432,19 +1413,15 @@ class GraphingApp(QMainWindow):
             # Clear each canvas safely
             for canvas in canvases:
                 if canvas and not canvas.isDeleted():
-                    canvas.axes.clear()
+                    canvas.reset()
                     canvas.axes.grid(self.grid_lines.isChecked(), linestyle='--', alpha=0.7)
                     canvas.axes.set_xlabel('x')
                     canvas.axes.set_ylabel('y')
                     self.apply_plot_theme(canvas.axes)
-                    canvas.draw()
-            
-            # Reset canvas references
-            self.canvas1 = None
-            self.canvas2 = None
-            self.canvas3 = None
+            self.render_scheduler.schedule(canvases)
             
             # Reset the individual tab to show single empty graph
+            self.clear_individual_layout()
             self.create_empty_individual_graph()
             
             # Reset the top layout to show single empty graph
@@ -1461,38 +1438,76 @@ class GraphingApp(QMainWindow):
         except Exception as e:
             print(f"Error in clear_plots: {e}")
     
+    def export_targets(self):
+        """(file stem, title, canvas) for every view that can be exported"""
+        targets = [(f"function{i + 1}", f"Function {i + 1}: {expr}", canvas)
+                   for i, (expr, canvas) in enumerate(zip(self.function_canvas_expressions,
+                                                          self.function_canvases))]
+        targets.append(("combined_view", "Combined View", self.combined_canvas))
+        targets.append(("analysis_view", "Analysis View", self.analysis_canvas))
+        return targets
+    
     def save_plots(self):
         """Save plots with customizable options"""
         from PyQt6.QtWidgets import QFileDialog, QDialog, QVBoxLayout, QCheckBox, QComboBox, QLabel, QDialogButtonBox
         
+        if self.export_worker.is_running():
+            QMessageBox.information(self, "Export", "An export is already running.")
+            return
+        
         # Create a custom dialog for save options
         dialog = QDialog(self)
         dialog.setWindowTitle("Save Plot Options")
 
-        dialog.setMinimumSize(270, 290)
-        dialog.setMaximumSize(300, 300)
+        dialog.setMinimumSize(300, 320)
 
         layout = QVBoxLayout(dialog)
         
-        # Plot selection checkboxes
+        # Plot selection checkboxes, one per function plus the shared views
         layout.addWidget(QLabel("Select plots to save:"))
-        cb_function1 = QCheckBox("Function 1")
-        cb_function2 = QCheckBox("Function 2")
-        cb_function3 = QCheckBox("Function 3")
-        cb_combined = QCheckBox("Combined View")
-        cb_analysis = QCheckBox("Analysis View")
+        targets = self.export_targets()
+        checkbox_area = QScrollArea()
+        checkbox_area.setWidgetResizable(True)
+        checkbox_widget = QWidget()
+        checkbox_layout = QVBoxLayout(checkbox_widget)
+        checkboxes = []
         
         # Check all by default
-        for cb in [cb_function1, cb_function2, cb_function3, cb_combined, cb_analysis]:
+        for _, title, _ in targets:
+            cb = QCheckBox(title)
             cb.setChecked(True)
-            layout.addWidget(cb)
+            checkbox_layout.addWidget(cb)
+            checkboxes.append(cb)
+        checkbox_area.setWidget(checkbox_widget)
+        layout.addWidget(checkbox_area)
         
         # File format selection
         layout.addWidget(QLabel("File format:"))
         format_combo = QComboBox()
-        format_combo.addItems(["PNG", "JPG", "SVG", "PDF"])
+        format_combo.addItems([file_format.upper() for file_format in EXPORT_FORMATS])
         layout.addWidget(format_combo)
         
+        # Resolution and size of the exported figures
+        size_layout = QGridLayout()
+        dpi_input = QSpinBox()
+        dpi_input.setRange(50, 1200)
+        dpi_input.setValue(150)
+        width_input = QDoubleSpinBox()
+        width_input.setRange(2, 40)
+        width_input.setValue(10)
+        width_input.setSuffix(" in")
+        height_input = QDoubleSpinBox()
+        height_input.setRange(2, 40)
+        height_input.setValue(6)
+        height_input.setSuffix(" in")
+        size_layout.addWidget(QLabel("DPI:"), 0, 0)
+        size_layout.addWidget(dpi_input, 0, 1)
+        size_layout.addWidget(QLabel("Width:"), 1, 0)
+        size_layout.addWidget(width_input, 1, 1)
+        size_layout.addWidget(QLabel("Height:"), 2, 0)
+        size_layout.addWidget(height_input, 2, 1)
+        layout.addLayout(size_layout)
+        
         # Dialog buttons
         buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
         buttons.accepted.connect(dialog.accept)
@@ -1518,46 +1533,42 @@ class GraphingApp(QMainWindow):
             return
         
         try:
-            import os
-            saved_files = []
+            # Capture the plot data now; rendering happens in worker processes
+            snapshots = [snapshot_axes(name, canvas.axes, canvas.full_data)
+                         for (name, _, canvas), cb in zip(targets, checkboxes)
+                         if cb.isChecked() and canvas and not canvas.isDeleted()]
+            if not snapshots:
+                return
+            self.export_dir = save_dir
+            self.export_progress = QProgressDialog("Saving plots...", "Cancel", 0, len(snapshots), self)
+            self.export_progress.setWindowTitle("Save Plots")
+            self.export_progress.setMinimumDuration(0)
+            self.export_progress.canceled.connect(self.export_worker.cancel)
+            self.export_worker.start(snapshots, save_dir, file_format, dpi_input.value(),
+                                     (width_input.value(), height_input.value()))
             
-            # Save selected plots
-            if cb_function1.isChecked():
-                filename = os.path.join(save_dir, f"function1.{file_format}")
-                self.canvas1.fig.savefig(filename)
-                saved_files.append(filename)
-                
-            if cb_function2.isChecked():
-                filename = os.path.join(save_dir, f"function2.{file_format}")
-                self.canvas2.fig.savefig(filename)
-                saved_files.append(filename)
-                
-            if cb_function3.isChecked():
-                filename = os.path.join(save_dir, f"function3.{file_format}")
-                self.canvas3.fig.savefig(filename)
-                saved_files.append(filename)
-                
-            if cb_combined.isChecked():
-                filename = os.path.join(save_dir, f"combined_view.{file_format}")
-                self.combined_canvas.fig.savefig(filename)
-                saved_files.append(filename)
-                
-            if cb_analysis.isChecked():
-                filename = os.path.join(save_dir, f"analysis_view.{file_format}")
-                self.analysis_canvas.fig.savefig(filename)
-                saved_files.append(filename)
-            
-            # Show success message
-            from PyQt6.QtWidgets import QMessageBox
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Error saving plots: {e}")
+    
+    def on_export_progress(self, done, total):
+        if self.export_progress is not None:
+            self.export_progress.setMaximum(total)
+            self.export_progress.setValue(done)
+    
+    def on_export_finished(self, saved, errors):
+        """Report the outcome of a background export"""
+        if self.export_progress is not None:
+            self.export_progress.close()
+            self.export_progress = None
+        if errors:
+            details = "\n".join(f"{os.path.basename(path)}: {error}" for path, error in errors)
+            QMessageBox.critical(self, "Error", f"Error saving plots:\n{details}")
+        if saved:
             QMessageBox.information(
                 self, 
                 "Success", 
-                f"Saved {len(saved_files)} plot(s) to:\n{save_dir}"
+                f"Saved {len(saved)} plot(s) to:\n{self.export_dir}"
             )
-            
-        except Exception as e:
-            from PyQt6.QtWidgets import QMessageBox
-            QMessageBox.critical(self, "Error", f"Error saving plots: {e}")
 
     def create_empty_individual_graph(self):
         """Create a single empty graph for the Individual Functions tab"""
@@ -1581,19 +1592,19 @@ class GraphingApp(QMainWindow):
         canvas_frame_layout = QVBoxLayout(canvas_frame)
         canvas_frame_layout.setContentsMargins(0, 0, 0, 0)
 
-        # Create empty canvas
-        canvas = MplCanvas(width=8, height=6, dpi=100)
+        # Take an empty canvas from the pool
+        canvas, _ = self.individual_pool.acquire()
         canvas.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
         
         # Set up empty graph with axes
-        canvas.axes.clear()
         canvas.axes.grid(self.grid_lines.isChecked(), linestyle='--', alpha=0.7)
         canvas.axes.set_xlabel('x')
         canvas.axes.set_ylabel('y')
         self.apply_plot_theme(canvas.axes)
-        canvas.draw()
+        self.render_scheduler.schedule([canvas])
 
         canvas_frame_layout.addWidget(canvas)
+        canvas.show()
 
         # Add canvas frame to container
         container_layout.addWidget(canvas_frame)
@@ -1624,14 +1635,28 @@ class GraphingApp(QMainWindow):
 
         # Add to layout centered
         self.individual_graphs_layout.addWidget(frame, 0, 0, 1, 1)
+        self.individual_pool.trim()
 
-    def update_individual_tab_layout(self, expressions):
-        """Update the Individual Functions tab layout based on number of functions"""
-        # Clear existing layout
+    def clear_individual_layout(self):
+        """Remove the Individual Functions frames, keeping their canvases for reuse"""
+        self.individual_pool.release_all()
+        self.individual_layout_expressions = None
+        self.canvas1 = None
+        self.canvas2 = None
+        self.canvas3 = None
         while self.individual_graphs_layout.count():
             item = self.individual_graphs_layout.takeAt(0)
             if item.widget():
                 item.widget().deleteLater()
+    
+    def update_individual_tab_layout(self, expressions):
+        """Update the Individual Functions tab layout based on number of functions"""
+        # The same functions keep their frames, canvases and plotted lines
+        if expressions and list(expressions) == self.individual_layout_expressions:
+            return
+
+        # Clear existing layout
+        self.clear_individual_layout()
 
         if not expressions:
             self.create_empty_individual_graph()
@@ -1667,29 +1692,16 @@ class GraphingApp(QMainWindow):
             canvas_frame_layout = QVBoxLayout(canvas_frame)
             canvas_frame_layout.setContentsMargins(0, 0, 0, 0)
 
-            # Create canvas
-            canvas = MplCanvas(width=8, height=6, dpi=100)
+            # Take a canvas and its navigation toolbar from the pool, keeping
+            # the plot of a canvas that showed this expression before
+            canvas, toolbar = self.individual_pool.acquire(expr)
             canvas.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
             canvas_frame_layout.addWidget(canvas)
+            canvas.show()
 
             # Add navigation toolbar for zoom/pan functionality
-            toolbar = NavigationToolbar2QT(canvas, self)
-            toolbar.setStyleSheet("""
-                QToolBar {
-                    background-color: #2e2e2e;
-                    border: none;
-                }
-                QToolButton {
-                    color: white;
-                    background-color: #3e3e3e;
-                    border: none;
-                    padding: 4px;
-                }
-                QToolButton:hover {
-                    background-color: #4a94ff;
-                }
-            """)
             canvas_frame_layout.addWidget(toolbar)
+            toolbar.show()
 
             # Store canvas reference
             if i == 0:
@@ -1749,4 +1761,6 @@ class GraphingApp(QMainWindow):
 
         # Set alignment for the grid layout
         self.individual_graphs_layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.individual_layout_expressions = list(expressions)
+        self.individual_pool.trim()
 
@@ -1,7 +1,19 @@
+import numpy as np
 from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+from calcvisualizer.core.calculator import evaluate_function
+from calcvisualizer.core.decimate import decimate
+from calcvisualizer.core.sampling import adaptive_sample
+from calcvisualizer.utils.tracing import span, traced
 
 class MplCanvas(FigureCanvas):
+    # Delay before re-sampling once panning or zooming stops
+    VIEWPORT_DEBOUNCE_MS = 120
+
+    # How lines with more samples than pixel columns are reduced: "m4" or "lttb"
+    DECIMATION = "m4"
+
     def __init__(self, width=10, height=12, dpi=100):
         self.fig = Figure(figsize=(width, height), dpi=dpi)
         self.fig.set_facecolor("#f0f0f0")
@@ -9,7 +21,37 @@ class MplCanvas(FigureCanvas):
         super(MplCanvas, self).__init__(self.fig)
         self.setMinimumSize(400, 300)
         self.fig.set_layout_engine("constrained")
-        
+
+        # Persistent artists keyed by (expression, series kind, index)
+        self.series = {}
+        self.touched_series = set()
+        self.annotations = []
+        self.decoration = None
+        self.legend_labels = None
+
+        # Set when the canvas changed while hidden; drawn once it is shown
+        self.needs_draw = False
+
+        # Animated artists redrawn over a cached copy of the static background
+        self.overlay_artists = []
+        self.overlay_visible = True
+        self.background = None
+        self.overlay_background = None
+        self.readout = None
+        self.mpl_connect('draw_event', self.on_draw)
+        self.mpl_connect('motion_notify_event', self.on_hover)
+        self.mpl_connect('axes_leave_event', self.on_leave)
+
+        # Lines that can be re-evaluated for the visible x-range
+        self.live_series = {}
+        self._limits_callbacks = None
+        # Full samples of lines that are drawn decimated
+        self.full_data = {}
+        self.viewport_timer = QTimer(self)
+        self.viewport_timer.setSingleShot(True)
+        self.viewport_timer.setInterval(self.VIEWPORT_DEBOUNCE_MS)
+        self.viewport_timer.timeout.connect(self.refresh_viewport)
+
     def isDeleted(self):
         """Check if the canvas has been deleted"""
         try:
@@ -17,4 +59,331 @@ class MplCanvas(FigureCanvas):
             return False
         except RuntimeError:
             return True
-        
\ No newline at end of file
+
+    def showEvent(self, event):
+        """Render changes that were deferred while the canvas was hidden"""
+        super().showEvent(event)
+        if self.needs_draw:
+            self.draw_idle()
+
+    def resizeEvent(self, event):
+        """Decimate again for the new width once resizing settles"""
+        super().resizeEvent(event)
+        if self.full_data:
+            self.viewport_timer.start()
+
+    def draw(self):
+        with span("canvas.draw", "render"):
+            super().draw()
+
+    def request_draw(self):
+        """Draw soon when on screen, otherwise wait until the canvas is shown"""
+        if self.isVisible():
+            self.draw_idle()
+        else:
+            self.needs_draw = True
+
+    def reset(self):
+        """Clear the axes and forget every registered artist"""
+        self.axes.clear()
+        self.series = {}
+        self.touched_series = set()
+        self.annotations = []
+        self.decoration = None
+        self.legend_labels = None
+        self.live_series = {}
+        self.full_data = {}
+        self.overlay_artists = []
+        self.background = None
+        self.overlay_background = None
+        self.readout = None
+
+    def begin_update(self, decoration):
+        """Start a replot; returns True when the static decorations must be redone"""
+        self.touched_series = set()
+        self.axes.autoscale(enable=True)
+        restyle = decoration != self.decoration
+        self.decoration = decoration
+        return restyle
+
+    def update_series(self, key, x_values, y_values, overlay=False, **style):
+        """Update the line for key in place, creating it the first time
+
+        Overlay lines are animated and drawn over the cached background.
+        Lines with more samples than the axes are wide are drawn decimated.
+        """
+        x_values = np.asarray(x_values, dtype=float)
+        y_values = np.asarray(y_values, dtype=float)
+        x_shown, y_shown = decimate(x_values, y_values, self.pixel_width(), self.DECIMATION)
+
+        line = self.series.get(key)
+        if line is None or line.axes is not self.axes:
+            line, = self.axes.plot(x_shown, y_shown, **style)
+            self.series[key] = line
+        else:
+            line.set_data(x_shown, y_shown)
+            line.set(**style)
+        if len(x_shown) < len(x_values):
+            self.watch_limits()
+            self.full_data[line] = (x_values, y_values)
+        else:
+            self.full_data.pop(line, None)
+        if overlay:
+            self.add_overlay(line)
+        self.touched_series.add(key)
+        return line
+
+    def pixel_width(self):
+        """Width of the axes in device pixels"""
+        return max(int(self.axes.bbox.width), 2)
+
+    def set_annotations(self, annotations):
+        """Replace the point annotations with (text, (x, y)) pairs"""
+        for annotation in self.annotations:
+            self.remove_overlay(annotation)
+            if annotation.axes is not None:
+                annotation.remove()
+        self.annotations = []
+        for text, xy in annotations:
+            annotation = self.axes.annotate(text, xy, textcoords="offset points",
+                                            xytext=(0, 10), ha='center')
+            self.annotations.append(self.add_overlay(annotation))
+
+    def add_overlay(self, artist):
+        """Draw an artist on the blitted overlay instead of the static background"""
+        artist.set_animated(True)
+        artist.set_visible(self.overlay_visible)
+        # Overlay artists should not push the layout around
+        artist.set_in_layout(False)
+        if artist not in self.overlay_artists:
+            self.overlay_artists.append(artist)
+        return artist
+
+    def remove_overlay(self, artist):
+        if artist in self.overlay_artists:
+            self.overlay_artists.remove(artist)
+
+    def set_overlay_visible(self, visible):
+        """Show or hide the overlay with a blit instead of a full redraw"""
+        self.overlay_visible = visible
+        for artist in self.overlay_artists:
+            artist.set_visible(visible)
+        self.update_overlay()
+
+    def draw_overlay(self):
+        """Draw the overlay artists onto the current canvas buffer"""
+        self.overlay_artists = [artist for artist in self.overlay_artists if artist.figure is self.fig]
+        for artist in self.overlay_artists:
+            self.fig.draw_artist(artist)
+
+    def draw_readout(self):
+        if self.readout is not None and self.readout.axes is self.axes and self.readout.get_visible():
+            self.fig.draw_artist(self.readout)
+
+    def on_draw(self, event):
+        """Cache the freshly rendered background and put the overlay back on top"""
+        if event.canvas is not self:
+            # savefig renders through a temporary canvas that includes the overlay
+            return
+        self.needs_draw = False
+        self.background = self.copy_from_bbox(self.fig.bbox)
+        self.draw_overlay()
+        # The hover readout moves far more often than the markers, so keep a
+        # second copy that already has them drawn
+        self.overlay_background = self.copy_from_bbox(self.fig.bbox)
+        self.draw_readout()
+
+    def update_overlay(self):
+        """Redraw only the overlay, falling back to a full draw without a background"""
+        if self.background is None:
+            self.request_draw()
+            return
+        self.restore_region(self.background)
+        self.draw_overlay()
+        self.overlay_background = self.copy_from_bbox(self.fig.bbox)
+        self.draw_readout()
+        self.blit(self.fig.bbox)
+
+    def update_readout(self):
+        """Redraw only the hover readout over the cached background and markers"""
+        if self.overlay_background is None:
+            self.request_draw()
+            return
+        self.restore_region(self.overlay_background)
+        self.draw_readout()
+        self.blit(self.fig.bbox)
+
+    def hover_text(self, x):
+        """Cursor x with the value of every labelled line at that position"""
+        rows = [f"x = {x:.4g}"]
+        for line in self.axes.get_lines():
+            label = line.get_label()
+            if label.startswith('_') or not line.get_visible():
+                continue
+            # Read decimated lines from their full samples
+            x_data, y_data = self.full_data.get(line, (line.get_xdata(), line.get_ydata()))
+            x_data = np.asarray(x_data, dtype=float)
+            if len(x_data) < 2 or not x_data[0] <= x <= x_data[-1]:
+                continue
+            y = np.interp(x, x_data, np.asarray(y_data, dtype=float))
+            rows.append(f"{label.split(' = ')[0]} = {y:.4g}")
+        return "\n".join(rows)
+
+    def on_hover(self, event):
+        """Show the values under the cursor without re-rendering the plot"""
+        if event.inaxes is not self.axes or event.xdata is None or not self.axes.get_lines():
+            self.on_leave(event)
+            return
+        if self.readout is None or self.readout.axes is not self.axes:
+            self.readout = self.axes.text(
+                0.99, 0.01, "", transform=self.axes.transAxes, ha='right', va='bottom',
+                fontsize='small', family='monospace', animated=True, in_layout=False,
+                bbox=dict(boxstyle='round', facecolor='white', alpha=0.8))
+        self.readout.set_text(self.hover_text(event.xdata))
+        self.readout.set_visible(True)
+        self.update_readout()
+
+    def on_leave(self, event):
+        if self.readout is not None and self.readout.get_visible():
+            self.readout.set_visible(False)
+            self.update_readout()
+
+    @traced("canvas.end_update", "render")
+    def end_update(self, legend=True):
+        """Remove series that were not updated, rescale and refresh the legend"""
+        for key in list(self.series):
+            if key in self.touched_series:
+                continue
+            line = self.series.pop(key)
+            self.live_series.pop(line, None)
+            self.full_data.pop(line, None)
+            if line.axes is not None:
+                line.remove()
+
+        self.axes.relim()
+        self.axes.autoscale_view()
+
+        labels = [line.get_label() for line in self.axes.get_lines()
+                  if not line.get_label().startswith('_')]
+        current = self.axes.get_legend()
+        if not legend or not labels:
+            if current is not None:
+                current.remove()
+            self.legend_labels = None
+        elif current is None or labels != self.legend_labels:
+            with span("legend", "render"):
+                self.axes.legend(loc='upper left', fontsize='small')
+            self.legend_labels = labels
+
+    def register_series(self, line, func, scale=1.0, adaptive=False):
+        """Re-sample a line from its compiled function when the view needs more detail"""
+        self.watch_limits()
+        x_data = np.asarray(line.get_xdata(), dtype=float)
+        span = x_data[-1] - x_data[0] if len(x_data) else 0.0
+        self.live_series[line] = [func, scale, adaptive, span]
+
+    def watch_limits(self):
+        """Follow x-limit changes of the current axes"""
+        if self._limits_callbacks is not self.axes.callbacks:
+            # Clearing the axes drops both their lines and their callbacks
+            self.live_series = {}
+            self.full_data = {}
+            self._limits_callbacks = self.axes.callbacks
+            self.axes.callbacks.connect('xlim_changed', self.schedule_viewport_refresh)
+
+    def schedule_viewport_refresh(self, axes=None):
+        """Debounce limit changes so a drag triggers a single re-evaluation"""
+        if self.live_series or self.full_data:
+            self.viewport_timer.start()
+
+    @traced("canvas.refresh_viewport", "render")
+    def refresh_viewport(self):
+        """Re-evaluate lines over the visible interval at about one sample per pixel
+
+        A line is only re-sampled when the view extends past its data or is
+        zoomed in at least twice as far as when it was sampled. Other
+        decimated lines are decimated again for the visible interval.
+        """
+        x_min, x_max = self.axes.get_xlim()
+        view_span = x_max - x_min
+        samples = self.pixel_width()
+        updated = False
+
+        for line, series in list(self.live_series.items()):
+            if line.axes is None:
+                del self.live_series[line]
+                continue
+            func, scale, adaptive, span = series
+            x_data = line.get_xdata()
+            # Autoscale margins alone do not call for new samples
+            pad = self.axes.margins()[0] * (x_data[-1] - x_data[0]) * 1.01 if len(x_data) else 0.0
+            covered = len(x_data) > 0 and x_data[0] <= x_min + pad and x_data[-1] >= x_max - pad
+            if covered and view_span * 2 > span:
+                continue
+
+            if adaptive:
+                x_values, y_values = adaptive_sample(func, x_min, x_max, pixel_width=samples,
+                                                     pixel_height=int(self.axes.bbox.height))
+            else:
+                x_values = np.linspace(x_min, x_max, samples)
+                y_values = evaluate_function(func, x_values)
+            y_values = np.where(np.isfinite(y_values), y_values, np.nan) / scale
+            line.set_data(x_values, y_values)
+            self.full_data.pop(line, None)
+            series[3] = view_span
+            updated = True
+
+        for line, (x_values, y_values) in list(self.full_data.items()):
+            if line.axes is None:
+                del self.full_data[line]
+                continue
+            line.set_data(*decimate(x_values, y_values, samples, self.DECIMATION, x_min, x_max))
+            updated = True
+
+        if updated:
+            self.request_draw()
+
+
+class RenderScheduler(QObject):
+    """Draws visible canvases first, one per event loop pass, and defers hidden ones
+
+    Hidden canvases are only flagged; they draw themselves when shown, so the
+    time to the first visible plot does not depend on the number of views.
+    drained is emitted once the last queued canvas has been drawn.
+    """
+
+    drained = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.queue = []
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(0)
+        self.timer.timeout.connect(self.render_next)
+
+    def schedule(self, canvases):
+        """Queue canvases for drawing, on-screen ones ahead of everything else"""
+        canvases = [canvas for canvas in canvases if canvas and not canvas.isDeleted()]
+        for canvas in canvases:
+            canvas.needs_draw = True
+        visible = [canvas for canvas in canvases if canvas.isVisible()]
+        self.queue = visible + [canvas for canvas in self.queue if canvas not in visible]
+        if self.queue:
+            self.timer.start()
+        else:
+            self.drained.emit()
+
+    def render_next(self):
+        """Draw the next queued canvas that is still on screen"""
+        while self.queue:
+            canvas = self.queue.pop(0)
+            if canvas.isDeleted() or not canvas.needs_draw:
+                continue
+            if canvas.isVisible():
+                canvas.draw()
+                break
+        if self.queue:
+            self.timer.start()
+        else:
+            self.drained.emit()
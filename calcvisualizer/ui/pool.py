@@ -0,0 +1,82 @@
+from calcvisualizer.ui.canvas import MplCanvas
+
+class CanvasPool:
+    """Recycles canvases and their navigation toolbars between replots
+
+    Released canvases are detached from their frames and kept for the next
+    layout instead of being deleted with them. A canvas acquired for a key,
+    such as the expression it shows, keeps its plot when it is acquired for
+    the same key again; any other canvas is cleared. Idle canvases beyond
+    ``max_idle``, or beyond ``max_bytes`` of estimated render buffers across
+    the whole pool, are dropped oldest first.
+    """
+
+    def __init__(self, width=8, height=6, dpi=100, toolbar_factory=None,
+                 max_idle=4, max_bytes=256 * 1024 * 1024):
+        self.width = width
+        self.height = height
+        self.dpi = dpi
+        self.toolbar_factory = toolbar_factory
+        self.max_idle = max_idle
+        self.max_bytes = max_bytes
+        self.idle = []
+        self.in_use = []
+
+    def acquire(self, key=None):
+        """Return a (canvas, toolbar) pair, reusing an idle one when possible
+
+        An idle canvas last acquired for key is returned as it is; otherwise
+        the canvas is blank.
+        """
+        self.idle = [item for item in self.idle if not item[0].isDeleted()]
+        match = None
+        if key is not None:
+            match = next((i for i, item in enumerate(self.idle) if item[2] == key), None)
+        if match is not None:
+            canvas, toolbar, _ = self.idle.pop(match)
+        else:
+            if self.idle:
+                # The oldest, which is also the first trim would drop
+                canvas, toolbar, _ = self.idle.pop(0)
+            else:
+                canvas = MplCanvas(width=self.width, height=self.height, dpi=self.dpi)
+                toolbar = self.toolbar_factory(canvas) if self.toolbar_factory else None
+            canvas.reset()
+            if toolbar is not None:
+                # Forget the zoom and pan history of the previous plot
+                toolbar.update()
+        self.in_use.append((canvas, toolbar, key))
+        return canvas, toolbar
+
+    def release_all(self):
+        """Detach every canvas in use so its frame can be deleted safely
+
+        Call trim once the next layout has acquired its canvases, so the ones
+        it reuses are not dropped first.
+        """
+        for canvas, toolbar, key in self.in_use:
+            if canvas.isDeleted():
+                continue
+            canvas.setParent(None)
+            if toolbar is not None:
+                toolbar.setParent(None)
+            self.idle.append((canvas, toolbar, key))
+        self.in_use = []
+
+    def canvas_bytes(self, canvas):
+        """Estimated size of the render buffer and the two cached overlay backgrounds"""
+        width, height = canvas.get_width_height(physical=True)
+        return width * height * 4 * 3
+
+    def memory_usage(self):
+        return sum(self.canvas_bytes(item[0]) for item in self.in_use + self.idle)
+
+    def trim(self):
+        """Drop idle canvases over the count or memory limits"""
+        usage = self.memory_usage()
+        while self.idle and (len(self.idle) > self.max_idle or usage > self.max_bytes):
+            canvas, toolbar, _ = self.idle.pop(0)
+            usage -= self.canvas_bytes(canvas)
+            if toolbar is not None:
+                toolbar.deleteLater()
+            canvas.deleteLater()
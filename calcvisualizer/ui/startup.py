@@ -0,0 +1,109 @@
+"""Staged startup: heavy imports and first-use costs paid while the splash is shown"""
+import threading
+import time
+
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+def load_numpy():
+    import numpy as np
+    np.linspace(0.0, 1.0, 16).sum()
+
+def load_sympy():
+    import sympy
+    import calcvisualizer.core.symbolic
+
+def warm_lambdify():
+    """Parse, differentiate and compile a sample so the first plot skips sympy's setup"""
+    import numpy as np
+    from sympy import symbols, sympify, diff, lambdify
+    from calcvisualizer.core.cache import math_functions, NUMPY_FUNCTIONS
+
+    x = symbols('x')
+    expression = sympify("sin(x)*exp(-x**2/4) + sqrt(x)", locals=math_functions())
+    x_values = np.linspace(0.5, 2.0, 8)
+    for func in (expression, diff(expression, x)):
+        lambdify(x, func, ["numpy", NUMPY_FUNCTIONS])(x_values)
+
+def warm_matplotlib():
+    """Import the Qt backend and render once off screen to build the font cache"""
+    import matplotlib.backends.backend_qtagg
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(2, 2), dpi=50, layout="constrained")
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot(111)
+    ax.plot([0, 1], [0, 1], label="f(x)")
+    ax.annotate("(0, 0)", (0, 0), textcoords="offset points", xytext=(0, 10))
+    ax.legend(fontsize='small')
+    ax.set_title("x")
+    fig.canvas.draw()
+
+def start_workers():
+    """Start the forkserver so the first symbolic integral does not wait for it"""
+    from calcvisualizer.core.background import get_context
+    if get_context().get_start_method() == "forkserver":
+        from multiprocessing import forkserver
+        forkserver.ensure_running()
+
+def load_interface():
+    import calcvisualizer.ui.app
+    import calcvisualizer.ui.pool
+
+# (splash message, function) run in order on the startup thread
+STARTUP_STAGES = [
+    ("Loading NumPy...", load_numpy),
+    ("Loading SymPy...", load_sympy),
+    ("Compiling expressions...", warm_lambdify),
+    ("Loading Matplotlib...", warm_matplotlib),
+    ("Starting workers...", start_workers),
+    ("Building interface...", load_interface),
+]
+
+class StartupLoader(QObject):
+    """Runs the startup stages on a background thread and reports on the GUI thread
+
+    A failing stage is reported and skipped; whatever it left undone happens
+    on first use instead.
+    """
+
+    # finished stages, total stages, message of the next stage
+    progress = pyqtSignal(int, int, str)
+    # seconds the stages took
+    finished = pyqtSignal(float)
+
+    def __init__(self, stages=None, parent=None, interval=30):
+        super().__init__(parent)
+        self.stages = list(STARTUP_STAGES if stages is None else stages)
+        self.durations = []
+        self._thread = None
+        self._timer = QTimer(self)
+        self._timer.setInterval(interval)
+        self._timer.timeout.connect(self._poll)
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="startup", daemon=True)
+        self._thread.start()
+        self._reported = -1
+        self._timer.start()
+
+    def _run(self):
+        for message, stage in self.stages:
+            started = time.perf_counter()
+            try:
+                stage()
+            except Exception as e:
+                print(f"Startup stage '{message}' failed: {e}")
+            self.durations.append((message, time.perf_counter() - started))
+
+    def _poll(self):
+        done = len(self.durations)
+        if done != self._reported:
+            self._reported = done
+            message = self.stages[done][0] if done < len(self.stages) else "Opening window..."
+            self.progress.emit(done, len(self.stages), message)
+        if self._thread.is_alive():
+            return
+        self._timer.stop()
+        self.finished.emit(time.perf_counter() - self.started)
@@ -0,0 +1,99 @@
+"""User interface components for the calculus visualizer."""
+from PyQt6.QtWidgets import (QApplication, QLabel, QWidget, QVBoxLayout, QHBoxLayout, QFrame,
+                             QProgressBar)
+from PyQt6.QtGui import QMovie, QPixmap
+from PyQt6.QtCore import Qt, QSize
+from assets.assets import LOADING_ICON, WINDOW_ICON
+
+class LoadingScreen(QWidget):
+    def __init__(self):
+        super().__init__()
+        self.setFixedSize(300, 200)
+        
+        # Remove window title and frame & Translucent background
+        self.setWindowFlags(Qt.WindowType.FramelessWindowHint)
+        self.setAttribute(Qt.WidgetAttribute.WA_TranslucentBackground)
+        
+        self.frame = QFrame(self)
+        self.frame.setStyleSheet("""
+            QFrame#mainFrame {
+                background-color: #3e3e3e;
+                border-radius: 10px;
+                color: black;
+                border: 5px double #3e3e3e;
+            }
+            QLabel {
+                border: none;
+                background-color: transparent;
+                color: #cfcfcf;
+            }
+            QProgressBar {
+                border: none;
+                border-radius: 3px;
+                background-color: #2b2b2b;
+                max-height: 6px;
+            }
+            QProgressBar::chunk {
+                border-radius: 3px;
+                background-color: #3a86ff;
+            }
+        """)
+        self.frame.setObjectName("mainFrame") 
+        
+        # Setup the main layout
+        main_layout = QVBoxLayout(self)
+        main_layout.setContentsMargins(0, 0, 0, 0)
+        main_layout.addWidget(self.frame)
+        
+        # Create frame layout
+        frame_layout = QVBoxLayout(self.frame)
+        frame_layout.setSpacing(5)
+        
+        # Create a custom image label for the top
+        self.image_label = QLabel()
+        self.image_label.setPixmap(QPixmap(WINDOW_ICON))
+        self.image_label.setAlignment(Qt.AlignmentFlag.AlignBottom | Qt.AlignmentFlag.AlignHCenter)
+        
+        # Create horizontal layout for GIF and text
+        horizontal_layout = QHBoxLayout()
+        
+        # Create label for GIF
+        self.label = QLabel()
+        self.movie = QMovie(LOADING_ICON)
+        self.movie.setScaledSize(QSize(30, 30))
+        self.label.setMovie(self.movie)
+        self.movie.start()
+        
+        # Add loading text
+        self.loading_text = QLabel("Loading application...")
+        self.loading_text.setStyleSheet("font-size: 14px; font-weight: bold;")
+        
+        # Add GIF and text to horizontal layout
+        horizontal_layout.addWidget(self.label)
+        horizontal_layout.addWidget(self.loading_text)
+        horizontal_layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        horizontal_layout.setSpacing(10)
+        
+        # Add widgets to frame layout
+        frame_layout.addWidget(self.image_label)
+        frame_layout.addLayout(horizontal_layout)
+
+        # Startup progress, filled in by set_progress
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setTextVisible(False)
+        self.progress_bar.setRange(0, 0)
+        frame_layout.addWidget(self.progress_bar)
+        
+        self.center_on_screen()
+    
+    def set_progress(self, done, total, message):
+        """Show how many startup stages have finished and what is loading now"""
+        self.progress_bar.setRange(0, total)
+        self.progress_bar.setValue(done)
+        self.loading_text.setText(message)
+
+    def center_on_screen(self):
+        screen = QApplication.primaryScreen().geometry()
+        x = (screen.width() - self.width()) // 2
+        y = (screen.height() - self.height()) // 2 - 50
+        self.move(x, y)
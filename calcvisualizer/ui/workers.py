@@ -0,0 +1,173 @@
+from concurrent.futures import ThreadPoolExecutor
+import threading
+
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+from calcvisualizer.core.background import SymbolicTask, DEFAULT_TIMEOUT
+from calcvisualizer.core.pipeline import build_plot_model
+from calcvisualizer.core.export import ExportBatch
+
+class SymbolicWorker(QObject):
+    """Runs symbolic computations in worker processes and reports back on the GUI thread"""
+
+    # kind, expression, derivative order, result (None on failure), error message
+    finished = pyqtSignal(str, object, int, object, str)
+
+    def __init__(self, parent=None, timeout=DEFAULT_TIMEOUT, interval=50):
+        super().__init__(parent)
+        self.timeout = timeout
+        self._tasks = {}
+        self._timer = QTimer(self)
+        self._timer.setInterval(interval)
+        self._timer.timeout.connect(self._poll)
+
+    def submit(self, kind, expression, order=1):
+        """Start a computation unless the same one is already running"""
+        key = (kind, expression, order)
+        if key in self._tasks:
+            return
+        self._tasks[key] = SymbolicTask(kind, expression, order, timeout=self.timeout)
+        self._timer.start()
+
+    def is_pending(self, kind, expression, order=1):
+        return (kind, expression, order) in self._tasks
+
+    def pending(self):
+        return len(self._tasks)
+
+    def cancel_except(self, keep=()):
+        """Cancel every running task whose (kind, expression) is not in keep"""
+        keep = set(keep)
+        for key, task in list(self._tasks.items()):
+            if key[:2] not in keep:
+                task.cancel()
+                del self._tasks[key]
+        if not self._tasks:
+            self._timer.stop()
+
+    def cancel_all(self):
+        self.cancel_except()
+
+    def _poll(self):
+        for key, task in list(self._tasks.items()):
+            if not task.poll():
+                continue
+            del self._tasks[key]
+            self.finished.emit(task.kind, task.expression, task.order, task.result,
+                               task.error or "")
+        if not self._tasks:
+            self._timer.stop()
+
+
+class ModelWorker(QObject):
+    """Builds plot models on a background thread, rendering only the newest request
+
+    At most one build runs at a time. Submitting while one is running cancels
+    it and keeps only the latest request to start next, so a burst of
+    requests never turns into a queue of builds.
+    """
+
+    # key, model
+    finished = pyqtSignal(object, object)
+
+    def __init__(self, parent=None, interval=20):
+        super().__init__(parent)
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._job = None
+        self._next = None
+        self._timer = QTimer(self)
+        self._timer.setInterval(interval)
+        self._timer.timeout.connect(self._poll)
+
+    def submit(self, key, expressions, settings, hidden=()):
+        """Build the model for key, superseding any request still in flight"""
+        args = (expressions, settings, hidden)
+        if self._job is not None:
+            self._job[2].set()
+            self._next = (key, args)
+            return
+        self._start(key, args)
+
+    def is_busy(self):
+        return self._job is not None
+
+    def cancel_all(self):
+        if self._job is not None:
+            self._job[2].set()
+        self._next = None
+
+    def shutdown(self):
+        self.cancel_all()
+        self._executor.shutdown(wait=False)
+
+    def _start(self, key, args):
+        cancel = threading.Event()
+        future = self._executor.submit(build_plot_model, *args, cancelled=cancel.is_set)
+        self._job = (key, future, cancel)
+        self._timer.start()
+
+    def _poll(self):
+        if self._job is None:
+            self._timer.stop()
+            return
+        key, future, cancel = self._job
+        if not future.done():
+            return
+        self._job = None
+        if self._next is not None:
+            next_key, args = self._next
+            self._next = None
+            self._start(next_key, args)
+            return
+        self._timer.stop()
+        if cancel.is_set():
+            return
+        try:
+            model = future.result()
+        except Exception as e:
+            print(f"Error computing plot model: {e}")
+            return
+        if model is not None:
+            self.finished.emit(key, model)
+
+
+class ExportWorker(QObject):
+    """Reports progress of an ExportBatch on the GUI thread"""
+
+    # finished renders, total renders
+    progress = pyqtSignal(int, int)
+    # saved paths, (path, error) pairs
+    finished = pyqtSignal(list, list)
+
+    def __init__(self, parent=None, interval=100):
+        super().__init__(parent)
+        self._batch = None
+        self._timer = QTimer(self)
+        self._timer.setInterval(interval)
+        self._timer.timeout.connect(self._poll)
+
+    def start(self, snapshots, directory, file_format, dpi, size):
+        """Start rendering the snapshots in worker processes"""
+        self._batch = ExportBatch(snapshots, directory, file_format, dpi, size)
+        self._timer.start()
+        self.progress.emit(0, len(snapshots))
+
+    def is_running(self):
+        return self._batch is not None
+
+    def cancel(self):
+        if self._batch is not None:
+            self._batch.cancel()
+
+    def _poll(self):
+        if self._batch is None:
+            self._timer.stop()
+            return
+        done, total = self._batch.progress()
+        self.progress.emit(done, total)
+        if done < total:
+            return
+        batch, self._batch = self._batch, None
+        self._timer.stop()
+        saved, errors = batch.results()
+        self.finished.emit(saved, errors)
@@ -0,0 +1,37 @@
+import importlib
+import os
+import sys
+
+class LazyModule:
+    """Stand-in for a module that is imported on first attribute access"""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            # import_module holds the import lock, so concurrent first uses are safe
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module '{self._name}' ({state})>"
+
+def lazy_import(name):
+    """Return a module that loads when first used, keeping import time low"""
+    return LazyModule(name)
+
+def user_cache_dir(app_name="calcvisualizer"):
+    """Per-user cache directory of the platform; CALCVISUALIZER_CACHE_DIR overrides it"""
+    override = os.environ.get("CALCVISUALIZER_CACHE_DIR")
+    if override:
+        return override
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser(r"~\AppData\Local")
+        return os.path.join(base, app_name, "Cache")
+    if sys.platform == "darwin":
+        return os.path.join(os.path.expanduser("~/Library/Caches"), app_name)
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base, app_name)
@@ -0,0 +1,225 @@
+"""Timing spans for the plotting hot paths, off unless asked for
+
+Wrap a stage in ``with span("name"):`` or decorate a function with
+``@traced()``. While tracing is disabled a span is one flag check and a
+shared no-op context manager. When enabled, spans from every thread are
+recorded and each plot request can be reported as a per-stage summary
+table, a Chrome trace-event file (open it in chrome://tracing or
+https://ui.perfetto.dev), or both.
+
+Set CALCVISUALIZER_TRACE to a comma-separated list of ``summary`` and
+``chrome`` or ``chrome=DIRECTORY`` (the default directory is ``traces``).
+"""
+from collections import deque, namedtuple
+from contextlib import contextmanager
+import functools
+import json
+import os
+import re
+import threading
+import time
+
+# Oldest events are dropped beyond this many
+MAX_EVENTS = 200_000
+
+# One finished span; times are perf_counter_ns values, self_ns excludes nested spans
+Event = namedtuple('Event', ['name', 'category', 'start_ns', 'duration_ns', 'self_ns',
+                             'thread_id', 'thread_name', 'args'])
+
+class NullSpan:
+    """What span returns while tracing is off"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+NULL_SPAN = NullSpan()
+
+class Span:
+    __slots__ = ('tracer', 'name', 'category', 'args', 'start', 'children')
+
+    def __init__(self, tracer, name, category, args):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self):
+        self.tracer.stack().append(self)
+        self.children = 0
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        end = time.perf_counter_ns()
+        duration = end - self.start
+        stack = self.tracer.stack()
+        stack.pop()
+        if stack:
+            stack[-1].children += duration
+        thread = threading.current_thread()
+        self.tracer.record(Event(self.name, self.category, self.start, duration,
+                                 duration - self.children, thread.ident, thread.name, self.args))
+        return False
+
+class Tracer:
+    """Collects spans and reports them per plot request"""
+
+    def __init__(self):
+        self.enabled = False
+        self.summary = False
+        self.directory = None
+        self.events = deque(maxlen=MAX_EVENTS)
+        self.request = None
+        self.requests = 0
+        self.continuing = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def configure(self, summary=False, directory=None):
+        """Turn tracing on for the given outputs, or off when there are none"""
+        self.summary = summary
+        self.directory = directory
+        self.enabled = bool(summary or directory)
+
+    def stack(self):
+        """Open spans of the calling thread, innermost last"""
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def record(self, event):
+        with self._lock:
+            self.events.append(event)
+
+    def begin_request(self, label):
+        """Start a plot request, reporting the previous one if it is still open"""
+        if not self.enabled or (self.continuing and self.request is not None):
+            return
+        self.end_request()
+        with self._lock:
+            self.requests += 1
+            self.request = (self.requests, label, time.perf_counter_ns())
+
+    @contextmanager
+    def continue_request(self):
+        """Treat plot requests made inside as part of the open one, such as a deferred render"""
+        self.continuing += 1
+        try:
+            yield
+        finally:
+            self.continuing -= 1
+
+    def end_request(self):
+        """Report every span recorded since the request began"""
+        with self._lock:
+            if self.request is None:
+                return
+            number, label, started = self.request
+            self.request = None
+            events = [event for event in self.events if event.start_ns >= started]
+        wall_ns = time.perf_counter_ns() - started
+        if self.summary:
+            print(f"Plot request {number} ({label}): {wall_ns / 1e6:.1f} ms")
+            print(summary_table(events, wall_ns))
+        if self.directory:
+            name = re.sub(r'[^A-Za-z0-9_-]+', '_', label)
+            path = os.path.join(self.directory, f"trace-{number:04d}-{name}.json")
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                write_chrome_trace(events, path)
+                print(f"Trace of plot request {number} written to {path}")
+            except OSError as e:
+                print(f"Could not write trace {path}: {e}")
+
+tracer = Tracer()
+
+def span(name, category="app", **args):
+    """Context manager timing a stage; args are shown with the span in a trace"""
+    if not tracer.enabled:
+        return NULL_SPAN
+    return Span(tracer, name, category, args)
+
+def traced(name=None, category="app"):
+    """Decorator wrapping every call of a function in a span"""
+    def decorate(func):
+        label = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            with Span(tracer, label, category, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def begin_request(label):
+    tracer.begin_request(label)
+
+def end_request():
+    tracer.end_request()
+
+def continue_request():
+    return tracer.continue_request()
+
+def summary_table(events, wall_ns=None):
+    """Calls, total, self and longest time per span name, most total time first"""
+    stages = {}
+    for event in events:
+        stage = stages.setdefault(event.name, [0, 0, 0, 0])
+        stage[0] += 1
+        stage[1] += event.duration_ns
+        stage[2] += event.self_ns
+        stage[3] = max(stage[3], event.duration_ns)
+    rows = [f"{'stage':32} {'calls':>6} {'total ms':>10} {'self ms':>10} {'max ms':>9}"
+            + (f" {'% wall':>7}" if wall_ns else "")]
+    for name, (calls, total, own, longest) in sorted(stages.items(), key=lambda item: -item[1][1]):
+        row = f"{name[:32]:32} {calls:6d} {total / 1e6:10.2f} {own / 1e6:10.2f} {longest / 1e6:9.2f}"
+        if wall_ns:
+            row += f" {100 * total / wall_ns:6.1f}%"
+        rows.append(row)
+    return "\n".join(rows)
+
+def chrome_trace(events):
+    """Trace-event JSON document with one complete ("X") event per span"""
+    pid = os.getpid()
+    trace_events = []
+    threads = {}
+    for event in events:
+        threads[event.thread_id] = event.thread_name
+        trace_events.append({"name": event.name, "cat": event.category, "ph": "X",
+                             "ts": event.start_ns / 1000, "dur": event.duration_ns / 1000,
+                             "pid": pid, "tid": event.thread_id,
+                             "args": {key: str(value) for key, value in event.args.items()}})
+    for thread_id, thread_name in threads.items():
+        trace_events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": thread_id,
+                             "args": {"name": thread_name}})
+    return {"traceEvents": trace_events, "displayTimeUnit": "ms"}
+
+def write_chrome_trace(events, path):
+    with open(path, "w") as output:
+        json.dump(chrome_trace(events), output)
+
+def configure_from_environment():
+    """Apply CALCVISUALIZER_TRACE, such as "summary" or "summary,chrome=traces" """
+    summary = False
+    directory = None
+    for item in os.environ.get("CALCVISUALIZER_TRACE", "").split(","):
+        item = item.strip()
+        if item == "summary":
+            summary = True
+        elif item == "chrome":
+            directory = "traces"
+        elif item.startswith("chrome="):
+            directory = item.split("=", 1)[1]
+        elif item:
+            print(f"Unknown CALCVISUALIZER_TRACE option '{item}'")
+    tracer.configure(summary, directory)
+
+configure_from_environment()
@@ -1,82 +1,23 @@
-from calcvisualizer.ui.app import GraphingApp
-from PyQt6.QtWidgets import QApplication, QLabel, QWidget, QVBoxLayout, QHBoxLayout, QFrame
-from PyQt6.QtGui import QMovie, QPixmap
-from PyQt6.QtCore import Qt, QTimer, QSize
 import sys
-from assets.assets import LOADING_ICON, WINDOW_ICON
+import time
 
-class LoadingScreen(QWidget):
-    def __init__(self):
-        super().__init__()
-        self.setFixedSize(300, 200)
-        
-        # Remove window title and frame & Translucent background
-        self.setWindowFlags(Qt.WindowType.FramelessWindowHint)
-        self.setAttribute(Qt.WidgetAttribute.WA_TranslucentBackground)
-        
-        self.frame = QFrame(self)
-        self.frame.setStyleSheet("""
-            QFrame#mainFrame {
-                background-color: #3e3e3e;
-                border-radius: 10px;
-                color: black;
-                border: 5px double #3e3e3e;
-            }
-            QLabel {
-                border: none;
-                background-color: transparent;
-                color: #cfcfcf;
-            }
-        """)
-        self.frame.setObjectName("mainFrame") 
-        
-        # Setup the main layout
-        main_layout = QVBoxLayout(self)
-        main_layout.setContentsMargins(0, 0, 0, 0)
-        main_layout.addWidget(self.frame)
-        
-        # Create frame layout
-        frame_layout = QVBoxLayout(self.frame)
-        frame_layout.setSpacing(5)
-        
-        # Create a custom image label for the top
-        self.image_label = QLabel()
-        self.image_label.setPixmap(QPixmap(WINDOW_ICON))
-        self.image_label.setAlignment(Qt.AlignmentFlag.AlignBottom | Qt.AlignmentFlag.AlignHCenter)
-        
-        # Create horizontal layout for GIF and text
-        horizontal_layout = QHBoxLayout()
-        
-        # Create label for GIF
-        self.label = QLabel()
-        self.movie = QMovie(LOADING_ICON)
-        self.movie.setScaledSize(QSize(30, 30))
-        self.label.setMovie(self.movie)
-        self.movie.start()
-        
-        # Add loading text
-        self.loading_text = QLabel("Loading application...")
-        self.loading_text.setStyleSheet("font-size: 14px; font-weight: bold;")
-        
-        # Add GIF and text to horizontal layout
-        horizontal_layout.addWidget(self.label)
-        horizontal_layout.addWidget(self.loading_text)
-        horizontal_layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        horizontal_layout.setSpacing(10)
-        
-        # Add widgets to frame layout
-        frame_layout.addWidget(self.image_label)
-        frame_layout.addLayout(horizontal_layout)
-        
-        self.center_on_screen()
-    
-    def center_on_screen(self):
-        screen = QApplication.primaryScreen().geometry()
-        x = (screen.width() - self.width()) // 2
-        y = (screen.height() - self.height()) // 2 - 50
-        self.move(x, y)
+# Time-to-interactive is measured from here, before any heavy import
+STARTED = time.perf_counter()
 
 def main():
+    # The batch and cache commands must run without Qt, so GUI imports happen below
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        from calcvisualizer.batch import main as batch_main
+        sys.exit(batch_main(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "cache":
+        from calcvisualizer.core.diskcache import main as cache_main
+        sys.exit(cache_main(sys.argv[2:]))
+
+    from PyQt6.QtWidgets import QApplication
+    from PyQt6.QtCore import QTimer
+    from calcvisualizer.ui.widgets import LoadingScreen
+    from calcvisualizer.ui.startup import StartupLoader
+
     app = QApplication(sys.argv)
 
     loading_screen = LoadingScreen()
@@ -84,14 +25,28 @@ def main():
 
     QApplication.processEvents()
 
-    def finish_loading():
-        window = GraphingApp()
-        window.showMaximized()
+    # SymPy, Matplotlib and the interface load on a background thread while
+    # the splash stays responsive; the window opens as soon as they are done
+    loader = StartupLoader()
+    loader.progress.connect(loading_screen.set_progress)
+
+    def report_ready(stages_elapsed, window_started):
+        print(f"Ready in {time.perf_counter() - STARTED:.2f}s (startup stages "
+              f"{stages_elapsed:.2f}s, window {time.perf_counter() - window_started:.2f}s)")
+
+    def finish_loading(elapsed):
+        from calcvisualizer.ui.app import GraphingApp
+        window_started = time.perf_counter()
+        app.window = GraphingApp()
+        app.window.showMaximized()
         loading_screen.close()
-    
-    QTimer.singleShot(5000, finish_loading)
+        # Fires once the event loop has processed the first show and paint
+        QTimer.singleShot(0, lambda: report_ready(elapsed, window_started))
+
+    loader.finished.connect(finish_loading)
+    loader.start()
 
     sys.exit(app.exec())
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
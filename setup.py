@@ -13,6 +13,7 @@ setup(
     entry_points={
         "console_scripts": [
             "calcvisualizer=main:main",
+            "calcvisualizer-batch=calcvisualizer.batch:main",
         ],
     },
 )
\ No newline at end of file
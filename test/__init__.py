@@ -0,0 +1,10 @@
+import atexit
+import os
+import shutil
+import tempfile
+
+# Keep the disk cache and the symbolic database of the test run out of the
+# user's cache directory; both resolve their paths on first use
+CACHE_DIR = tempfile.mkdtemp(prefix="calcvisualizer-test-")
+os.environ["CALCVISUALIZER_CACHE_DIR"] = CACHE_DIR
+atexit.register(shutil.rmtree, CACHE_DIR, ignore_errors=True)
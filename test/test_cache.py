@@ -0,0 +1,130 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import numpy as np
+import sympy
+
+from calcvisualizer.core import pipeline
+from calcvisualizer.core.diskcache import disk_cache, DiskCache, META_FILE
+from calcvisualizer.core.symbolicdb import symbolic_database, SymbolicDatabase
+from test import CACHE_DIR
+
+class DiskCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = DiskCache(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def store(self, key, size, last_used):
+        """Store an entry of size float64 values and date its last use"""
+        self.assertTrue(self.cache.store(key, {"y": np.zeros(size)}, {"kind": "f"}, evict=False))
+        meta_path = os.path.join(self.cache.directory, key, META_FILE)
+        os.utime(meta_path, (last_used, last_used))
+
+    def test_round_trip(self):
+        arrays = {"x": np.linspace(0, 1, 1000), "y": np.arange(1000.0) ** 2}
+        self.assertTrue(self.cache.store("key", arrays, {"kind": "f", "scale": 2.0}))
+        loaded, meta = self.cache.load("key")
+        self.assertEqual(meta["kind"], "f")
+        self.assertEqual(meta["arrays"], ["x", "y"])
+        for name, values in arrays.items():
+            self.assertIsInstance(loaded[name], np.memmap)
+            self.assertFalse(loaded[name].flags.writeable)
+            np.testing.assert_array_equal(loaded[name], values)
+        self.assertIsNone(self.cache.load("missing"))
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_evicts_least_recently_used(self):
+        for age, key in enumerate(["newest", "middle", "oldest"]):
+            self.store(key, 10_000, 1_000_000 - age * 100)
+        sizes = {entry.key: entry.size for entry in self.cache.entries()}
+        self.assertEqual([entry.key for entry in self.cache.entries()], ["oldest", "middle", "newest"])
+
+        # Loading marks an entry as used now
+        self.cache.load("oldest")
+        removed = self.cache.evict(sizes["oldest"] + sizes["newest"])
+        self.assertEqual(removed, 1)
+        self.assertEqual(sorted(entry.key for entry in self.cache.entries()), ["newest", "oldest"])
+
+        self.cache.max_bytes = sizes["oldest"]
+        self.store("latest", 10, time.time() + 100)
+        self.cache.evict()
+        self.assertLessEqual(self.cache.total_size(), self.cache.max_bytes)
+        self.assertEqual([entry.key for entry in self.cache.entries()], ["latest"])
+
+    def test_evicts_once_per_model(self):
+        settings = pipeline.PlotSettings(-5, 5, 2000, False, False, False, False)
+        with mock.patch.object(pipeline, "disk_cache", self.cache):
+            model = pipeline.compute_function_model(
+                0, "x**2", *pipeline.compile_expression("x**2", ["numpy", pipeline.NUMPY_FUNCTIONS]),
+                pipeline.derivative_function(pipeline.compile_expression("x**2")[0], 1, settings),
+                settings)
+            with mock.patch.object(self.cache, "evict", wraps=self.cache.evict) as evict:
+                pipeline.store_function_model(model, settings)
+            self.assertEqual(evict.call_count, 1)
+            # Every series and the critical points were stored and load back
+            self.assertEqual(len(self.cache.entries()), len(model.series) + 1)
+            loaded = pipeline.load_function_model(0, "x**2", model.expression,
+                                                  model.series[0].func, model.series[1].func, settings)
+        self.assertIsNotNone(loaded)
+        for stored, series in zip(loaded.series, model.series):
+            np.testing.assert_array_equal(stored.y, series.y)
+
+    def test_staging_directories(self):
+        self.store("entry", 100, 1_000_000)
+        # What an interrupted store leaves behind
+        staging = os.path.join(self.cache.directory, ".tmp-interrupted")
+        os.makedirs(staging)
+        np.save(os.path.join(staging, "y.npy"), np.zeros(100))
+        self.assertEqual([entry.key for entry in self.cache.entries()], ["entry"])
+
+        self.assertEqual(self.cache.purge(), 1)
+        self.assertEqual(os.listdir(self.cache.directory), [])
+
+class SymbolicDatabaseTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.database = SymbolicDatabase(os.path.join(self.directory.name, "symbolic.sqlite3"))
+        self.x = sympy.Symbol("x")
+
+    def tearDown(self):
+        if self.database._connection is not None:
+            self.database._connection.close()
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        expression = sympy.sin(self.x) ** 2
+        self.assertIsNone(self.database.get("derivative", expression, 1))
+        self.database.put("derivative", expression, sympy.sin(2 * self.x), 1)
+        self.database.put("integral", expression, sympy.Integral(expression, self.x))
+        self.assertEqual(self.database.get("derivative", expression, 1), sympy.sin(2 * self.x))
+        self.assertIsNone(self.database.get("derivative", expression, 2))
+        self.assertEqual(self.database.get("integral", expression), sympy.Integral(expression, self.x))
+        self.assertEqual(self.database.count(), {"derivative": 1, "integral": 1})
+        self.database.clear()
+        self.assertEqual(self.database.count(), {})
+
+    def test_keyed_on_sympy_version(self):
+        expression = sympy.exp(-self.x ** 2)
+        with mock.patch.object(sympy, "__version__", "0.0.1"):
+            self.database.put("derivative", expression, sympy.Integer(0), 1)
+            self.assertEqual(self.database.get("derivative", expression, 1), 0)
+        # A result from another SymPy release is never read back
+        self.assertIsNone(self.database.get("derivative", expression, 1))
+        self.database.put("derivative", expression, sympy.diff(expression, self.x), 1)
+        self.assertEqual(self.database.get("derivative", expression, 1), sympy.diff(expression, self.x))
+        self.assertEqual(self.database.count(), {"derivative": 2})
+
+    def test_suite_uses_temporary_directory(self):
+        self.assertEqual(os.path.dirname(symbolic_database.path), CACHE_DIR)
+        self.assertEqual(os.path.dirname(disk_cache.directory), CACHE_DIR)
+
+if __name__ == "__main__":
+    unittest.main()
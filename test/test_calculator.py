@@ -0,0 +1,333 @@
+import unittest
+
+import numpy as np
+
+from calcvisualizer.core import autodiff
+from calcvisualizer.core.cache import expression_cache, sympy, NUMPY_FUNCTIONS
+from calcvisualizer.core.calculator import (cumulative_integral, evaluate_function, evaluate_fused,
+                                            find_critical_points, FUSED_CHUNK, parse_function)
+from calcvisualizer.core.decimate import decimate, lttb, m4
+from calcvisualizer.core.sampling import adaptive_sample
+from calcvisualizer.core.streaming import (critical_point_chunks, evaluate_chunks, grid_chunks,
+                                           integrate_chunks, stream_series)
+from calcvisualizer.core.symbolic import SymbolicStore
+
+class ParseFunctionTest(unittest.TestCase):
+
+    def test_whitespace_does_not_join_tokens(self):
+        for text in ["x y", "sin x", "1 000"]:
+            with self.subTest(text=text):
+                self.assertIsNone(parse_function(text)[0])
+
+    def test_whitespace_variants_share_a_result(self):
+        expression_cache.cache_clear()
+        first = parse_function("x**2 + 1")[0]
+        second = parse_function("  x**2   +\t1 ")[0]
+        self.assertEqual(first, second)
+        self.assertEqual(str(parse_function("xy")[0]), "xy")
+
+class CumulativeIntegralTest(unittest.TestCase):
+
+    def test_sine_over_half_period(self):
+        x = np.linspace(0, np.pi, 201)
+        values, errors = cumulative_integral(x, np.sin(x))
+        self.assertAlmostEqual(values[-1], 2.0, places=7)
+        np.testing.assert_allclose(values, 1 - np.cos(x), atol=1e-7)
+        self.assertLess(errors[-1], 1e-5)
+
+    def test_non_uniform_grid(self):
+        x = np.linspace(0, 1, 101) ** 2
+        values, _ = cumulative_integral(x, x ** 2, initial=1.0)
+        np.testing.assert_allclose(values, 1.0 + x ** 3 / 3, atol=1e-12)
+
+    def test_pole_splits_into_segments(self):
+        x = np.linspace(0, 2, 201)
+        with np.errstate(divide='ignore'):
+            y = 1 / (x - 1)
+        values, _ = cumulative_integral(x, y, initial=5.0)
+        self.assertTrue(np.isnan(values[100]))
+        self.assertEqual(values[0], 5.0)
+        # The segment after the pole starts again from the initial value
+        self.assertEqual(values[101], 5.0)
+        self.assertAlmostEqual(values[-1], 5.0 + np.log(1 / 0.01), delta=0.05)
+        self.assertTrue(np.all(np.isfinite(np.delete(values, 100))))
+
+def critical_points(text, x_min=-10, x_max=10, resolution=400):
+    """Critical points of an expression on a grid, as find_critical_points sees it in the app"""
+    expression, func = parse_function(text)
+    derivative_func = SymbolicStore().derivative_function(expression, 1)
+    x_values = np.linspace(x_min, x_max, resolution)
+    with np.errstate(all='ignore'):
+        derivative_values = np.broadcast_to(derivative_func(x_values), x_values.shape)
+    return find_critical_points(func, x_values, derivative_values, derivative_func)
+
+class FindCriticalPointsTest(unittest.TestCase):
+
+    def test_minimum_and_maximum(self):
+        points = critical_points("x**3 - 3*x")
+        self.assertEqual(list(points['kind']), ['max', 'min'])
+        np.testing.assert_allclose(points['x'], [-1, 1], atol=1e-12)
+        np.testing.assert_allclose(points['y'], [2, -2], atol=1e-12)
+
+    def test_saddle_between_samples(self):
+        # No sample of f' is exactly zero on the default grid
+        for text, x in [("x**3", 0.0), ("(x-1)**3", 1.0)]:
+            with self.subTest(text=text):
+                points = critical_points(text)
+                self.assertEqual(list(points['kind']), ['saddle'])
+                self.assertAlmostEqual(points['x'][0], x, places=6)
+
+    def test_saddle_on_a_sample_is_reported_once(self):
+        # The odd grid has a sample at x=0, where f' is exactly zero
+        for text in ["x**3", "x**5 - x**3"]:
+            with self.subTest(text=text):
+                points = critical_points(text, resolution=401)
+                saddles = points['x'][points['kind'] == 'saddle']
+                self.assertEqual(len(saddles), 1)
+                self.assertEqual(saddles[0], 0.0)
+
+    def test_saddle_between_extrema(self):
+        points = critical_points("x**5 - x**3")
+        self.assertEqual(list(points['kind']), ['max', 'saddle', 'min'])
+        np.testing.assert_allclose(points['x'], [-np.sqrt(0.6), 0, np.sqrt(0.6)], atol=1e-6)
+
+    def test_poles_are_not_critical_points(self):
+        self.assertEqual(len(critical_points("1/(x-1)**2")), 0)
+        self.assertEqual(len(critical_points("tan(x)")), 0)
+
+    def test_no_touch_without_a_zero(self):
+        self.assertEqual(len(critical_points("x**3/3 + x")), 0)
+
+class EvaluateFusedTest(unittest.TestCase):
+
+    def test_matches_separate_functions(self):
+        store = SymbolicStore()
+        modules = ["numpy", NUMPY_FUNCTIONS]
+        # Spans two chunk boundaries, the last chunk partly filled
+        x_values = np.linspace(-3, 3, 2 * FUSED_CHUNK + 7)
+        for text in ["x**3 - 3*x", "exp(sin(x**2))*cos(x)", "tan(x)/(1 + x**2)", "7"]:
+            expression, func = parse_function(text)
+            fused = evaluate_fused(store.fused_function(expression, 2, modules), x_values)
+            separate = [evaluate_function(func, x_values)] + [
+                evaluate_function(store.derivative_function(expression, order, modules), x_values)
+                for order in (1, 2)]
+            for order in range(3):
+                with self.subTest(text=text, order=order):
+                    np.testing.assert_allclose(fused[order], separate[order], rtol=1e-12, atol=1e-12)
+
+    def test_chunk_boundaries(self):
+        expression = parse_function("sin(x)*exp(-x/5)")[0]
+        kernel = SymbolicStore().fused_function(expression, 2, ["numpy", NUMPY_FUNCTIONS])
+        x_values = np.linspace(0, 10, 1001)
+        whole = evaluate_fused(kernel, x_values, chunk=len(x_values))
+        for chunk in [1, 7, 1000]:
+            with self.subTest(chunk=chunk):
+                np.testing.assert_array_equal(evaluate_fused(kernel, x_values, chunk=chunk), whole)
+
+class StreamingTest(unittest.TestCase):
+    """Blocks of a streamed grid must give what the full grid gives"""
+
+    # (expression, x_min, x_max, resolutions); the odd grids of the first two
+    # have the critical points -1, 0 and 1 as samples
+    CASES = [("x**3 - 3*x", -2, 2, [401, 400]),
+             ("x**5 - x**3", -2, 2, [401, 1000]),
+             ("tan(x)", -5, 5, [999, 1000]),
+             ("1/(x - 1)", -2, 3, [501, 1000]),
+             ("sin(3*x)*exp(-x/4)", -6, 6, [777])]
+
+    CHUNKS = [7, 16, 100, 333]
+
+    def full_grid(self, text, x_min, x_max, resolution):
+        store = SymbolicStore()
+        expression, func = parse_function(text)
+        derivative_func = store.derivative_function(expression, 1)
+        kernel = store.fused_function(expression, 1)
+        x_values = np.linspace(x_min, x_max, resolution)
+        values = evaluate_fused(kernel, x_values)
+        return func, derivative_func, kernel, x_values, values
+
+    def test_critical_points(self):
+        for text, x_min, x_max, resolutions in self.CASES:
+            for resolution in resolutions:
+                func, derivative_func, kernel, x_values, (_, d_values) = self.full_grid(
+                    text, x_min, x_max, resolution)
+                expected = find_critical_points(func, x_values, d_values, derivative_func)
+                for chunk in self.CHUNKS:
+                    with self.subTest(text=text, resolution=resolution, chunk=chunk):
+                        chunks = evaluate_chunks(grid_chunks(x_min, x_max, resolution, chunk),
+                                                 kernel, ['f', "f'"])
+                        points = np.concatenate([block.critical_points for block in
+                                                 critical_point_chunks(chunks, func, derivative_func)])
+                        self.assertEqual(list(points['kind']), list(expected['kind']))
+                        np.testing.assert_allclose(points['x'], expected['x'], atol=1e-9)
+
+    def test_zero_run_across_boundaries(self):
+        # f' is exactly zero on [-0.3, 0.3]: one minimum, wherever the blocks split the run
+        def derivative_func(x):
+            return np.where(np.abs(x) < 0.3, 0.0, x)
+
+        def func(x):
+            return np.where(np.abs(x) < 0.3, 0.045, x ** 2 / 2)
+
+        def kernel(x):
+            return [func(x), derivative_func(x)]
+
+        x_values = np.linspace(-1, 1, 201)
+        expected = find_critical_points(func, x_values, derivative_func(x_values), derivative_func)
+        self.assertEqual(list(expected['kind']), ['min'])
+        for chunk in [3, 7, 16, 29, 100]:
+            with self.subTest(chunk=chunk):
+                chunks = evaluate_chunks(grid_chunks(-1, 1, 201, chunk), kernel, ['f', "f'"])
+                points = np.concatenate([block.critical_points for block in
+                                         critical_point_chunks(chunks, func, derivative_func)])
+                np.testing.assert_array_equal(points, expected)
+
+    def test_integral(self):
+        for text, x_min, x_max, resolutions in self.CASES:
+            for resolution in resolutions:
+                _, _, kernel, x_values, (y_values, _) = self.full_grid(text, x_min, x_max, resolution)
+                expected, expected_error = cumulative_integral(x_values, y_values)
+                for chunk in self.CHUNKS:
+                    with self.subTest(text=text, resolution=resolution, chunk=chunk):
+                        errors = []
+                        chunks = integrate_chunks(evaluate_chunks(
+                            grid_chunks(x_min, x_max, resolution, chunk), kernel, ['f', "f'"]),
+                            errors=errors)
+                        values = np.concatenate([block.values['integral'] for block in chunks])
+                        np.testing.assert_array_equal(np.isnan(values), np.isnan(expected))
+                        # Both are within their error estimates of the exact integral
+                        finite = np.isfinite(expected)
+                        tolerance = errors[0] + np.nanmax(expected_error) + 1e-12
+                        self.assertLessEqual(np.max(np.abs(values[finite] - expected[finite])),
+                                             tolerance)
+
+    def test_stream_series(self):
+        text, x_min, x_max = "tan(x)", -5, 5
+        func, derivative_func, kernel, x_values, (y_values, d_values) = self.full_grid(
+            text, x_min, x_max, 9999)
+        lines, points, max_error = stream_series(x_min, x_max, 9999, kernel, ['f', "f'"], func,
+                                                 derivative_func, bins=100, chunk=333)
+        self.assertEqual(len(points), len(find_critical_points(func, x_values, d_values,
+                                                               derivative_func)))
+        # The envelope spans the finite values of the full grid
+        x, y = lines['f']
+        self.assertEqual(len(x), 200)
+        self.assertEqual(np.nanmax(y), np.nanmax(np.where(np.isfinite(y_values), y_values, np.nan)))
+        self.assertIsNotNone(max_error)
+
+class AutodiffTest(unittest.TestCase):
+
+    EXPRESSIONS = ["x**3 - 3*x", "sin(x)*exp(-x/5)", "log(x**2 + 1)", "sqrt(x**2 + 1)*tan(x/3)",
+                   "exp(sin(x**2)*log(x**2 + 1))*cos(x)**3", "x**2.5 + 1/(1 + x**2)", "5"]
+
+    def test_jets_match_symbolic_derivatives(self):
+        x = sympy.symbols('x')
+        x_values = np.linspace(0.3, 2.7, 17)
+        for text in self.EXPRESSIONS:
+            expression = parse_function(text)[0]
+            jets = autodiff.jet_function(expression, 3)(x_values)
+            for order in range(4):
+                with self.subTest(text=text, order=order):
+                    exact = sympy.lambdify(x, sympy.diff(expression, x, order), "numpy")(x_values)
+                    np.testing.assert_allclose(np.broadcast_to(jets[order], x_values.shape),
+                                               np.broadcast_to(exact, x_values.shape),
+                                               rtol=1e-10, atol=1e-10)
+
+    def test_single_derivative(self):
+        expression = parse_function("x*exp(x)")[0]
+        x_values = np.linspace(-1, 1, 5)
+        np.testing.assert_allclose(autodiff.derivative_function(expression, 2)(x_values),
+                                   (x_values + 2) * np.exp(x_values))
+
+    def test_unsupported_functions(self):
+        self.assertFalse(autodiff.supports(sympy.gamma(sympy.symbols('x'))))
+        self.assertTrue(autodiff.supports(parse_function("tan(x)**3")[0]))
+
+class DecimateTest(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.x = np.linspace(0, 1, 20_000)
+        self.y = np.cumsum(rng.normal(size=len(self.x)))
+
+    def test_m4_keeps_column_extrema(self):
+        width = 50
+        x, y = m4(self.x, self.y, width)
+        self.assertLessEqual(len(x), 4 * width + 2)
+        self.assertEqual((x[0], x[-1]), (self.x[0], self.x[-1]))
+        self.assertTrue(np.all(np.diff(x) > 0))
+        columns = np.minimum((self.x * width).astype(int), width - 1)
+        for column in range(width):
+            inside = columns == column
+            kept = np.minimum((x * width).astype(int), width - 1) == column
+            with self.subTest(column=column):
+                self.assertEqual(y[kept].min(), self.y[inside].min())
+                self.assertEqual(y[kept].max(), self.y[inside].max())
+
+    def test_m4_keeps_nan_gaps(self):
+        values = self.y.copy()
+        values[5000:5100] = np.nan
+        x, y = m4(self.x, values, 50)
+        gap = (x >= self.x[5000]) & (x <= self.x[5099])
+        self.assertTrue(np.any(gap))
+        self.assertTrue(np.all(np.isnan(y[gap])))
+        self.assertTrue(np.all(np.isfinite(y[~gap])))
+
+    def test_small_series_untouched(self):
+        x, y = decimate(self.x[:100], self.y[:100], 50)
+        np.testing.assert_array_equal(y, self.y[:100])
+
+    def test_lttb(self):
+        x, y = lttb(self.x, self.y, 200)
+        self.assertEqual(len(x), 200)
+        self.assertEqual((x[0], x[-1]), (self.x[0], self.x[-1]))
+        np.testing.assert_array_equal(y, self.y[np.searchsorted(self.x, x)])
+
+        values = self.y.copy()
+        values[5000:5100] = np.nan
+        x, y = decimate(self.x, values, 100, method="lttb")
+        self.assertEqual(np.isnan(y).sum(), 1)
+        self.assertTrue(self.x[5000] <= x[np.isnan(y)][0] <= self.x[5099])
+
+class AdaptiveSampleTest(unittest.TestCase):
+
+    def check_samples(self, x, y, x_min, x_max):
+        self.assertTrue(np.all(np.diff(x) > 0))
+        self.assertEqual((x[0], x[-1]), (x_min, x_max))
+        self.assertEqual(len(x), len(y))
+
+    def test_refines_sharp_features(self):
+        x, y = adaptive_sample(lambda x: 1 / (1 + 100 * x ** 2), -5, 5)
+        self.check_samples(x, y, -5, 5)
+        # The peak at 0 gets far more samples than an equally wide flat stretch
+        self.assertGreater(np.sum(np.abs(x) < 0.5), 5 * np.sum(np.abs(x - 4) < 0.5))
+        np.testing.assert_allclose(y, 1 / (1 + 100 * x ** 2))
+
+    def test_point_budget(self):
+        for max_points in [100, 300, 1000]:
+            with self.subTest(max_points=max_points):
+                x, y = adaptive_sample(lambda x: np.sin(40 * x) * np.exp(x), -3, 3,
+                                       max_points=max_points)
+                self.check_samples(x, y, -3, 3)
+                # NaN breaks at jumps come on top of the budget
+                self.assertLessEqual(len(x) - np.isnan(y).sum(), max_points)
+
+    def test_poles_become_gaps(self):
+        with np.errstate(all='ignore'):
+            x, y = adaptive_sample(lambda x: 1 / (x - 1), -5, 5)
+            self.check_samples(x, y, -5, 5)
+            # Gaps only next to the pole, and no line segment joins the two branches
+            gaps = np.flatnonzero(np.isnan(y))
+            self.assertGreater(len(gaps), 0)
+            self.assertTrue(np.all(np.abs(x[gaps] - 1) < 0.05))
+            joined = np.isfinite(y[:-1]) & np.isfinite(y[1:]) & (x[:-1] < 1) & (x[1:] > 1)
+            self.assertFalse(np.any(joined))
+
+            x, y = adaptive_sample(np.tan, -10, 10, max_points=500)
+            self.check_samples(x, y, -10, 10)
+            self.assertLessEqual(len(x) - np.isnan(y).sum(), 500)
+            # tan has six poles in [-10, 10]
+            self.assertGreaterEqual(np.isnan(y).sum(), 6)
+
+if __name__ == "__main__":
+    unittest.main()
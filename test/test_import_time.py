@@ -0,0 +1,69 @@
+"""Import-time budget for the calcvisualizer modules
+
+Each module is imported in a fresh interpreter and timed, best of a few
+runs. Budgets are in seconds and can be overridden per module with the
+CALCVISUALIZER_IMPORT_BUDGET environment variable, for example
+``calcvisualizer.ui.app=0.5,calcvisualizer=0.02``.
+"""
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_BUDGETS = {
+    "calcvisualizer": 0.05,
+    "calcvisualizer.core.calculator": 0.5,
+    "calcvisualizer.ui.app": 1.0,
+}
+
+# Modules that must stay unloaded until they are first used
+DEFERRED_MODULES = {
+    "calcvisualizer": ["numpy", "sympy", "matplotlib", "PyQt6"],
+    "calcvisualizer.core.calculator": ["sympy", "matplotlib", "PyQt6"],
+    "calcvisualizer.ui.app": ["sympy", "matplotlib"],
+}
+
+RUNS = 3
+
+MEASURE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+print(json.dumps([elapsed, sorted(name for name in sys.modules if "." not in name)]))
+"""
+
+def budgets():
+    """Default budgets updated from CALCVISUALIZER_IMPORT_BUDGET"""
+    result = dict(DEFAULT_BUDGETS)
+    for item in os.environ.get("CALCVISUALIZER_IMPORT_BUDGET", "").split(","):
+        if item.strip():
+            module, seconds = item.split("=")
+            result[module.strip()] = float(seconds)
+    return result
+
+def measure_import(module):
+    """Seconds to import a module in a fresh interpreter, and the top-level modules loaded"""
+    output = subprocess.run([sys.executable, "-c", MEASURE.format(module=module)],
+                            cwd=ROOT, capture_output=True, text=True, check=True).stdout
+    elapsed, loaded = json.loads(output.splitlines()[-1])
+    return elapsed, set(loaded)
+
+class ImportTimeTest(unittest.TestCase):
+    def test_import_budgets(self):
+        for module, budget in budgets().items():
+            with self.subTest(module=module):
+                times = []
+                for _ in range(RUNS):
+                    elapsed, loaded = measure_import(module)
+                    times.append(elapsed)
+                    for heavy in DEFERRED_MODULES.get(module, []):
+                        self.assertNotIn(heavy, loaded, f"importing {module} loads {heavy}")
+                self.assertLessEqual(min(times), budget,
+                                     f"importing {module} took {min(times):.3f}s, budget {budget:g}s")
+
+if __name__ == "__main__":
+    unittest.main()